@@ -1,13 +1,13 @@
 from datetime import datetime
 from typing import AsyncGenerator, List, Optional, Dict
 from sqlmodel.ext.asyncio.session import AsyncSession
-from langchain_openai import AzureChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage
 from langgraph.graph.graph import CompiledGraph
 from app.database.main import TenantModel
 from app.database.agent import MessageModel, MessageService
 from app.utils.logging import AppLogger
-from app.utils.langfuse_client import StatefulTraceClient, StatefulSpanClient
+from app.utils.tracing import TraceHandle, ObservationHandle
+from app.utils.openai.client_registry import AzureOpenAIClientRegistry
 from app.enums import MessageRoleEnum
 from app.config import get_settings
 from ..schemas import AgentStreamingEvent
@@ -21,7 +21,8 @@ class BaseAgent:
         self,
         tenant: TenantModel,
         db_session: AsyncSession,
-        langfuse_trace: Optional[StatefulTraceClient] = None,
+        langfuse_trace: Optional[TraceHandle] = None,
+        model: Optional[str] = None,
         **kwargs
     ):
         self.settings = get_settings()
@@ -33,17 +34,12 @@ class BaseAgent:
         # if self.langfuse_trace:
         #     self.langfuse_event = self.langfuse_trace.event(name=self.agent_name) # agent_name must be set on a main agent class
             
-        if self.langfuse_trace:
-            self.model_callbacks = [self.langfuse_trace.get_langchain_handler(update_parent=True)]
-        else:
-            self.model_callbacks = []
+        langfuse_handler = self.langfuse_trace.get_langchain_handler(update_parent=True) if self.langfuse_trace else None
+        self.model_callbacks = [langfuse_handler] if langfuse_handler else []
             
-        self.model = AzureChatOpenAI(
+        self.model = AzureOpenAIClientRegistry().get_chat_model(
             name=self.agent_name,
-            model=self.settings.SMART_LLM_MODEL,
-            azure_endpoint=self.settings.AZURE_OPENAI_ENDPOINT,
-            azure_deployment=self.settings.AZURE_OPENAI_DEPLOYMENT_NAME,
-            openai_api_version=self.settings.AZURE_OPENAI_API_VERSION,
+            model=model or self.settings.SMART_LLM_MODEL,
             callbacks=self.model_callbacks
         )
         
@@ -133,7 +129,7 @@ class BaseAgent:
                     - `output`: The output data from the tool.    
         """
         agent_span = None
-        events: Dict[str, StatefulSpanClient] = {}
+        events: Dict[str, ObservationHandle] = {}
         final_response = ""
         
         async for event in agent_executor.astream_events(
@@ -55,6 +55,7 @@ class QAAgent(BaseAgent):
         )
         
         self.tavily_search_tool = TavilySearchTool(
+            tenant_id=str(self.tenant.uuid),
             cfg = {
                 'top': self.tool_cfg['web_top']
             }
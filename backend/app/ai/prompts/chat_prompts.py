@@ -1,6 +1,6 @@
 from typing import Optional
 from datetime import datetime
-from app.utils.langfuse_client import LangFuseClient
+from app.utils.prompt_registry import PromptRegistry
 from app.utils.logging import AppLogger
 
 logger = AppLogger().get_logger()
@@ -8,15 +8,15 @@ logger = AppLogger().get_logger()
 class QAPrompts:
     
     @classmethod
-    def chat_agent_prompt(self, **kwargs):
-        return LangFuseClient().get_prompt_str(name="chat-agent-prompt").format(current_date=datetime.now().strftime('%Y-%m-%d'), **kwargs)
+    async def chat_agent_prompt(self, **kwargs):
+        return (await PromptRegistry().aget_prompt_str(name="chat-agent-prompt")).format(current_date=datetime.now().strftime('%Y-%m-%d'), **kwargs)
     
     @classmethod
-    def qa_system_prompt(self, **kwargs):
-        chat_agent_prompt = self.chat_agent_prompt(**kwargs)
-        return LangFuseClient().get_prompt_str(name="qa-agent-prompt").format(current_date=datetime.now().strftime('%Y-%m-%d'), **kwargs) + "\n\n" + chat_agent_prompt
+    async def qa_system_prompt(self, **kwargs):
+        chat_agent_prompt = await self.chat_agent_prompt(**kwargs)
+        return (await PromptRegistry().aget_prompt_str(name="qa-agent-prompt")).format(current_date=datetime.now().strftime('%Y-%m-%d'), **kwargs) + "\n\n" + chat_agent_prompt
 
     @classmethod
-    def report_chat_system_prompt(self, **kwargs):
-        chat_agent_prompt = self.chat_agent_prompt(**kwargs)
-        return LangFuseClient().get_prompt_str(name="report-agent-prompt").format(current_date=datetime.now().strftime('%Y-%m-%d'), **kwargs) + "\n\n" + chat_agent_prompt
\ No newline at end of file
+    async def report_chat_system_prompt(self, **kwargs):
+        chat_agent_prompt = await self.chat_agent_prompt(**kwargs)
+        return (await PromptRegistry().aget_prompt_str(name="report-agent-prompt")).format(current_date=datetime.now().strftime('%Y-%m-%d'), **kwargs) + "\n\n" + chat_agent_prompt
\ No newline at end of file
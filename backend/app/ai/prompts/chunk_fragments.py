@@ -0,0 +1,67 @@
+import json
+from typing import Optional, List, Sequence, Any
+from app.config import get_settings
+from app.database.agent import ChunkModel
+from app.utils.cache import TTLCache
+from app.utils.singleton import SingletonMeta
+
+
+class ChunkPromptFragments(metaclass=SingletonMeta):
+    """
+    Serialize-once JSON fragments of chunks for prompts.
+
+    Chunk content never changes once a chunk exists, so each chunk field is JSON-encoded once and cached by chunk
+    uuid. Prompts are assembled by concatenating the cached fragments, which produces the same text as `json.dumps`
+    of the equivalent list of dicts. The same chunks therefore always give a byte-identical prompt section.
+
+    Example:
+        >>> fragments = ChunkPromptFragments()
+        >>> fragments.assemble(chunks, ids=[1, 2, 3])
+        '[{"id": 1, "content": "..."}, {"id": 2, "content": "..."}, {"id": 3, "content": "..."}]'
+    """
+    def __init__(self):
+        settings = get_settings()
+        self.cache = TTLCache(max_size=settings.CHUNK_FRAGMENT_CACHE_SIZE, ttl=settings.CHUNK_FRAGMENT_CACHE_TTL)
+
+    def __encode__(self, chunk: ChunkModel, field: str) -> str:
+        key = (chunk.uuid, field)
+        encoded = self.cache.get(key)
+        if encoded is None:
+            value = str(chunk.uuid) if field == "id" else getattr(chunk, field)
+            encoded = json.dumps(value)
+            self.cache.set(key, encoded)
+        return encoded
+
+    def fragment(self, chunk: ChunkModel, fields: Sequence[str] = ("id", "content"), id: Optional[Any] = None) -> str:
+        """
+        JSON object of the chunk's fields.
+
+        Parameters:
+
+            chunk (ChunkModel): chunk.
+
+            fields (Sequence[str]): chunk fields, in order. "id" is the chunk uuid unless `id` is given.
+
+            id (Optional[Any]): prompt-local id to use instead of the uuid, e.g. a position for scoring prompts.
+        """
+        return "{" + ", ".join(
+            f'"{field}": {json.dumps(id) if field == "id" and id is not None else self.__encode__(chunk, field)}'
+            for field in fields
+        ) + "}"
+
+    def assemble(self, chunks: List[ChunkModel], fields: Sequence[str] = ("id", "content"), ids: Optional[List[Any]] = None) -> str:
+        """
+        JSON array of the chunks' fragments.
+
+        Parameters:
+
+            chunks (List[ChunkModel]): chunks.
+
+            fields (Sequence[str]): chunk fields, in order.
+
+            ids (Optional[List[Any]]): prompt-local ids, one per chunk. Default is the chunk uuids.
+        """
+        return "[" + ", ".join(
+            self.fragment(chunk, fields=fields, id=ids[index] if ids else None)
+            for index, chunk in enumerate(chunks)
+        ) + "]"
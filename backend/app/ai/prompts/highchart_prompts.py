@@ -1,6 +1,6 @@
 from typing import Optional
 from datetime import datetime
-from app.utils.langfuse_client import LangFuseClient
+from app.utils.prompt_registry import PromptRegistry
 from app.utils.logging import AppLogger
 
 logger = AppLogger().get_logger()
@@ -8,5 +8,5 @@ logger = AppLogger().get_logger()
 class HighChartPrompts:
     
     @classmethod
-    def highchart_generation_prompt(self, **kwargs):
-        return LangFuseClient().get_prompt_str(name="generate-chart").format(**kwargs)
\ No newline at end of file
+    async def highchart_generation_prompt(self, **kwargs):
+        return (await PromptRegistry().aget_prompt_str(name="generate-chart")).format(**kwargs)
\ No newline at end of file
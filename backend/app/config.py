@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from functools import lru_cache
 from enum import Enum
 from pydantic_settings import BaseSettings
@@ -26,6 +27,17 @@ class Settings(BaseSettings):
     LANGFUSE_SECRET_KEY: str
     LANGFUSE_PUBLIC_KEY: str
     LANGFUSE_HOST: str
+    LANGFUSE_PROMPT_LABEL: str = "latest"
+    # per prompt name label overrides, e.g. '{"generate-report": "production"}'
+    LANGFUSE_PROMPT_LABELS: dict[str, str] = {}
+    LANGFUSE_TRACING_ENABLED: bool = True
+    # share of traces recorded, per trace name overrides e.g. '{"chat": 0.1}'
+    LANGFUSE_SAMPLE_RATE: float = 1.0
+    LANGFUSE_SAMPLE_RATES: dict[str, float] = {}
+    LANGFUSE_QUEUE_SIZE: int = 10000
+    LANGFUSE_MAX_STRING_LENGTH: int = 2000
+    LANGFUSE_MAX_LIST_ITEMS: int = 20
+    LANGFUSE_MAX_DEPTH: int = 6
 
     FAST_LLM_MODEL: str
     SMART_LLM_MODEL: str
@@ -39,6 +51,161 @@ class Settings(BaseSettings):
     DJANGO_SERVER: str
     DJANGO_SERVER_JWT_SECRET_KEY: str
 
+    # Azure OpenAI connection pool
+    AZURE_OPENAI_MAX_CONNECTIONS: int = 100
+    AZURE_OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    AZURE_OPENAI_KEEPALIVE_EXPIRY: float = 60.0
+    AZURE_OPENAI_CONNECT_TIMEOUT: float = 10.0
+    AZURE_OPENAI_TIMEOUT: float = 600.0
+    AZURE_OPENAI_MAX_RETRIES: int = 2
+    # Per-deployment overrides, e.g. '{"gpt-35-turbo": {"timeout": 45, "max_retries": 1}}'
+    AZURE_OPENAI_DEPLOYMENT_SETTINGS: dict[str, dict] = {}
+
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_SIZE: int = 2048
+    LLM_CACHE_TTL: int = 3600
+    LLM_CACHE_POSTGRES_ENABLED: bool = False
+    LLM_CACHE_POSTGRES_TTL: int = 86400
+
+    # LLM rate limiting, per deployment, e.g. '{"gpt-4o": {"rpm": 300, "tpm": 50000}}'
+    LLM_RATE_LIMITS: dict[str, dict] = {}
+    # Local quota is divided by this when the shared store is disabled (gunicorn worker count)
+    LLM_RATE_LIMIT_WORKERS: int = 4
+    LLM_RATE_LIMIT_SHARED_STORE: bool = False
+    LLM_INITIAL_CONCURRENCY: int = 8
+    LLM_MIN_CONCURRENCY: int = 2
+    LLM_MAX_CONCURRENCY: int = 32
+
+    # Hedged requests for latency-critical calls
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_PERCENTILE: float = 0.9
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_MIN_DELAY: float = 2.0
+    LLM_HEDGE_DEFAULT_DELAY: float = 15.0
+
+    # Multi-endpoint load balancing
+    # e.g. [{"name": "eastus", "endpoint": "...", "api_key": "...", "api_version": "...", "deployments": {"gpt-4o": "gpt-4o"}, "weight": 1.0}]
+    AZURE_OPENAI_ENDPOINTS: list[dict] = []
+    LLM_ENDPOINT_EWMA_ALPHA: float = 0.2
+    LLM_ENDPOINT_EJECT_AFTER_FAILURES: int = 3
+    LLM_ENDPOINT_EJECT_SECONDS: float = 30.0
+    LLM_ENDPOINT_HEALTH_CHECK_INTERVAL: float = 10.0
+    LLM_ENDPOINT_HEALTH_CHECK_TIMEOUT: float = 5.0
+
+    # Usage ledger and per-tenant budgets
+    LLM_USAGE_LEDGER_ENABLED: bool = True
+    LLM_USAGE_FLUSH_INTERVAL: float = 5.0
+    LLM_USAGE_MAX_BUFFER: int = 10000
+    # USD per 1K tokens, e.g. '{"gpt-4o": {"prompt": 0.005, "completion": 0.015}}'
+    LLM_MODEL_PRICES: dict[str, dict] = {}
+    # monthly USD budget per tenant id, e.g. '{"<tenant id>": {"monthly_limit": 100, "economy_ratio": 0.8}}'
+    LLM_TENANT_BUDGETS: dict[str, dict] = {}
+    LLM_DEFAULT_MONTHLY_BUDGET: Optional[float] = None
+    # switch to cheaper pipelines once this share of the budget is spent
+    LLM_BUDGET_ECONOMY_RATIO: float = 0.8
+    LLM_BUDGET_CACHE_TTL: int = 60
+
+    # Offline batch execution for non-interactive jobs
+    LLM_BATCH_BACKEND: str = "azure"  # "azure" or "local"
+    # model name -> global batch deployment name
+    LLM_BATCH_DEPLOYMENTS: dict[str, str] = {}
+    LLM_BATCH_MAX_REQUESTS: int = 500
+    LLM_BATCH_FLUSH_INTERVAL: float = 10.0
+    LLM_BATCH_POLL_INTERVAL: float = 30.0
+    LLM_BATCH_COMPLETION_WINDOW: str = "24h"
+    LLM_BATCH_LOCAL_DIR: str = "./data/llm-batches"
+    # send failed batch requests through the real-time path instead of failing the job
+    LLM_BATCH_FALLBACK_REALTIME: bool = True
+
+    # Retries of whole LLM calls (request and response parsing)
+    LLM_RETRY_MAX_ATTEMPTS: int = 3
+    LLM_RETRY_BASE_DELAY: float = 1.0
+    LLM_RETRY_MAX_DELAY: float = 20.0
+
+    # Prompt registry
+    PROMPT_CACHE_TTL: int = 300
+    PROMPT_RETRY_INTERVAL: int = 30
+    PROMPT_FALLBACK_DIR: str = "./data/prompts"
+
+    # Pre-encoded chunk prompt fragments
+    CHUNK_FRAGMENT_CACHE_SIZE: int = 20000
+    CHUNK_FRAGMENT_CACHE_TTL: int = 3600
+
+    # Azure AI Search
+    AZURE_AI_SEARCH_API_KEY: str = ""
+    AZURE_AI_SEARCH_API_VERSION: str = "2024-05-01-preview"
+    AZURE_AI_SEARCH_CACHE_ENABLED: bool = True
+    AZURE_AI_SEARCH_CACHE_MAX_SIZE: int = 4096
+    AZURE_AI_SEARCH_CACHE_TTL: int = 3600
+    # seconds a worker may keep serving results of an index invalidated by another worker
+    AZURE_AI_SEARCH_CACHE_GENERATION_TTL: float = 5.0
+    # "text", "vector", "hybrid" or "semantic" (semantic reranking of the text query)
+    AZURE_AI_SEARCH_DEFAULT_MODE: str = "semantic"
+    # mode of the short LLM generated rag queries of reports, e.g. "vector" for the cheaper path
+    AZURE_AI_SEARCH_GENERATED_QUERY_MODE: str = "semantic"
+    AZURE_AI_SEARCH_SEMANTIC_CONFIGURATION: str = "my-semantic-config"
+    AZURE_AI_SEARCH_VECTOR_FIELD: str = "contentVector"
+    # highlight length when the mode has no semantic captions
+    AZURE_AI_SEARCH_HIGHLIGHT_LENGTH: int = 500
+
+    # Tavily web search
+    TAVILY_API_URL: str = "https://api.tavily.com"
+    TAVILY_MAX_CONNECTIONS: int = 20
+    TAVILY_TIMEOUT: float = 30.0
+    TAVILY_MAX_CONTEXT_TOKENS: int = 4000
+
+    # Web search result cache (Postgres)
+    WEB_SEARCH_CACHE_ENABLED: bool = True
+    WEB_SEARCH_CACHE_SCOPE: str = "global"  # "global" or "tenant"
+    WEB_SEARCH_CACHE_TTL: int = 86400
+    # how much older than WEB_SEARCH_CACHE_TTL results may be served by stale-while-revalidate
+    WEB_SEARCH_CACHE_MAX_STALE: int = 604800
+
+    # Exa contents
+    EXA_API_URL: str = "https://api.exa.ai"
+    EXA_MAX_CONNECTIONS: int = 20
+    EXA_TIMEOUT: float = 60.0
+    EXA_CONTENTS_CACHE_SIZE: int = 1024
+    EXA_CONTENTS_CACHE_TTL: int = 3600
+
+    # URL research: "exa" (Exa highlights per query) or "local" (pages fetched once, highlights from a local index)
+    URL_SEARCH_MODE: str = "exa"
+    URL_HIGHLIGHT_WINDOW_SENTENCES: int = 3
+    URL_HIGHLIGHT_WINDOW_OVERLAP: int = 1
+    URL_HIGHLIGHT_MAX_WINDOWS_PER_URL: int = 1000
+
+    # Research providers (tavily, azure-ai-search, exa, faiss)
+    RETRIEVER_CONCURRENCY: int = 8
+    RETRIEVER_TIMEOUT: float = 60.0
+    RETRIEVER_MAX_ATTEMPTS: int = 2
+    RETRIEVER_RETRY_BASE_DELAY: float = 0.5
+    # per provider overrides, e.g. '{"tavily": {"concurrency": 4, "timeout": 20, "max_attempts": 3}}'
+    RETRIEVER_PROVIDER_SETTINGS: dict[str, dict] = {}
+    # seconds initiate_research waits for the research pipelines before returning partial results
+    RESEARCH_DEADLINE: float = 120.0
+    # seconds before the deadline at which the pipelines stop searching and score what they found
+    RESEARCH_SCORING_RESERVE: float = 20.0
+
+    # Loaded FAISS indexes kept in memory
+    FAISS_INDEX_CACHE_MAX_BYTES: int = 536870912
+    # open saved FAISS indexes memory mapped; documents are always read lazily from their SQLite docstore
+    FAISS_INDEX_MMAP: bool = True
+
+    # Embedding cache, keyed by (embedding model, sha256 of the text)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MEMORY_SIZE: int = 20000
+    EMBEDDING_CACHE_POSTGRES_ENABLED: bool = True
+    # entries unused for this long are evicted
+    EMBEDDING_CACHE_TTL: int = 2592000
+
+    # Uploaded file ingestion
+    FILE_PARSE_CONCURRENCY: int = 4
+    # chunks are pooled across files into embedding requests of at most this many texts / estimated tokens
+    FAISS_EMBEDDING_BATCH_SIZE: int = 256
+    FAISS_EMBEDDING_BATCH_TOKENS: int = 100000
+    FAISS_EMBEDDING_CONCURRENCY: int = 4
+
 
 @lru_cache
 def get_settings():
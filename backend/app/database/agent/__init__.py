@@ -3,4 +3,16 @@ from .chunk.service import ChunkService
 from .report.model import ReportModel
 from .report.service import ReportService
 from .message.model import MessageModel
-from .message.service import MessageService
\ No newline at end of file
+from .message.service import MessageService
+from .llm_cache.model import LLMCacheModel
+from .llm_cache.service import LLMCacheService
+from .llm_rate_limit.model import LLMRateLimitModel
+from .llm_rate_limit.service import LLMRateLimitService
+from .llm_usage.model import LLMUsageModel
+from .llm_usage.service import LLMUsageService
+from .web_search_cache.model import WebSearchCacheModel
+from .web_search_cache.service import WebSearchCacheService
+from .embedding_cache.model import EmbeddingCacheModel
+from .embedding_cache.service import EmbeddingCacheService
+from .search_cache_generation.model import SearchCacheGenerationModel
+from .search_cache_generation.service import SearchCacheGenerationService
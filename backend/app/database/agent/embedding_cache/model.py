@@ -0,0 +1,29 @@
+from datetime import datetime
+from sqlmodel import Field
+from app.database.base.model import BaseModel, CreatedAtOnlyTimeStampMixin
+
+
+class EmbeddingCacheModel(BaseModel, CreatedAtOnlyTimeStampMixin, table=True):
+    """
+    Represents a cached embedding in the agent database, shared by all workers.
+
+    Attributes:
+
+        cache_key (str): sha256 of the embedding model and the text.
+
+        model (str): embedding deployment name.
+
+        dimensions (int): number of dimensions of the vector.
+
+        vector (bytes): float32 vector.
+
+        last_used_at (datetime): last time the embedding was served or stored. Entries unused for
+                                 EMBEDDING_CACHE_TTL seconds are evicted.
+    """
+
+    __tablename__ = "embedding_cache"
+    cache_key: str = Field(index=True, unique=True, nullable=False)
+    model: str = Field(nullable=False)
+    dimensions: int = Field(nullable=False)
+    vector: bytes = Field(nullable=False)
+    last_used_at: datetime = Field(default_factory=datetime.now, nullable=False)
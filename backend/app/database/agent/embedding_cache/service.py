@@ -0,0 +1,73 @@
+import uuid
+from datetime import datetime
+from typing import List
+from sqlmodel import select
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert
+from .model import EmbeddingCacheModel
+from app.database.base.service import BaseService
+from app.utils.logging import AppLogger
+
+
+logger = AppLogger().get_logger()
+
+
+class EmbeddingCacheService(BaseService):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+    async def find_by_keys(self, cache_keys: List[str]) -> List[EmbeddingCacheModel]:
+        """
+        Retrieve the cached embeddings of the given keys.
+
+        Parameters:
+
+            cache_keys (List[str]): cache keys
+
+        Returns:
+
+            List[EmbeddingCacheModel]: the entries found, in no particular order.
+        """
+        if not cache_keys:
+            return []
+        statement = select(EmbeddingCacheModel).where(EmbeddingCacheModel.cache_key.in_(cache_keys))
+        result = await self.db_session.exec(statement)
+        return result.all()
+
+    async def add_embeddings(self, embeddings: List[dict]):
+        """
+        Bulk insert embeddings, ignoring keys that already exist.
+
+        Parameters:
+
+            embeddings (List[dict]): cache_key, model, dimensions and vector of each entry.
+        """
+        if not embeddings:
+            return
+        now = datetime.now()
+        statement = insert(EmbeddingCacheModel).values(
+            [{"uuid": uuid.uuid4(), "created_at": now, "last_used_at": now, **embedding} for embedding in embeddings]
+        ).on_conflict_do_nothing(index_elements=[EmbeddingCacheModel.cache_key])
+        await self.db_session.execute(statement)
+        await self.db_session.commit()
+
+    async def touch(self, cache_keys: List[str]):
+        """
+        Mark entries as used now.
+        """
+        if not cache_keys:
+            return
+        statement = update(EmbeddingCacheModel).where(
+            EmbeddingCacheModel.cache_key.in_(cache_keys)
+        ).values(last_used_at=datetime.now())
+        await self.db_session.execute(statement)
+        await self.db_session.commit()
+
+    async def delete_unused_since(self, before: datetime) -> int:
+        """
+        Delete entries last used before the given time.
+        """
+        statement = delete(EmbeddingCacheModel).where(EmbeddingCacheModel.last_used_at < before)
+        result = await self.db_session.execute(statement)
+        await self.db_session.commit()
+        return result.rowcount
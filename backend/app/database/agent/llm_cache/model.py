@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Optional
+from sqlmodel import Field
+from app.database.base.model import BaseModel, TimeStampMixin
+
+
+class LLMCacheModel(BaseModel, TimeStampMixin, table=True):
+    """
+    Represents a cached LLM response in the agent database, shared by all workers.
+
+    Attributes:
+
+        cache_key (str): sha256 of the canonical (model, messages, response_format, temperature) request.
+
+        model (str): deployment name used for the request.
+
+        name (Optional[str]): call name, e.g. "generate-rag-search-queries". Default is None.
+
+        response (str): cached completion content.
+
+        expires_at (datetime): the entry is ignored after this time.
+    """
+
+    __tablename__ = "llm_response_cache"
+    cache_key: str = Field(index=True, unique=True, nullable=False)
+    model: str = Field(nullable=False)
+    name: Optional[str] = Field(default=None)
+    response: str = Field(nullable=False)
+    expires_at: datetime = Field(nullable=False)
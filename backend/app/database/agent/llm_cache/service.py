@@ -0,0 +1,75 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+from sqlmodel import select
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import NoResultFound
+from .model import LLMCacheModel
+from app.database.base.service import BaseService
+from app.utils.logging import AppLogger
+
+
+logger = AppLogger().get_logger()
+
+
+class LLMCacheService(BaseService):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+    async def find_by_key(self, cache_key: str) -> Optional[LLMCacheModel]:
+        """
+        Retrieve a non-expired cache entry by key.
+
+        Parameters:
+
+            cache_key (str): cache key
+
+        Returns:
+
+            Optional[LLMCacheModel]: cache entry if found, otherwise None.
+        """
+        statement = select(LLMCacheModel).where(
+            LLMCacheModel.cache_key == cache_key,
+            LLMCacheModel.expires_at > datetime.now()
+        )
+
+        try:
+            result = await self.db_session.exec(statement)
+            return result.one()
+        except NoResultFound:
+            return None
+
+    async def upsert(self, cache_key: str, model: str, response: str, expires_at: datetime, name: Optional[str] = None):
+        """
+        Insert or refresh a cache entry.
+        """
+        now = datetime.now()
+        statement = insert(LLMCacheModel).values(
+            uuid=uuid.uuid4(),
+            cache_key=cache_key,
+            model=model,
+            name=name,
+            response=response,
+            expires_at=expires_at,
+            created_at=now,
+            updated_at=now
+        ).on_conflict_do_update(
+            index_elements=[LLMCacheModel.cache_key],
+            set_={
+                "response": response,
+                "expires_at": expires_at,
+                "updated_at": now
+            }
+        )
+        await self.db_session.execute(statement)
+        await self.db_session.commit()
+
+    async def delete_expired(self) -> int:
+        """
+        Delete expired cache entries.
+        """
+        statement = delete(LLMCacheModel).where(LLMCacheModel.expires_at <= datetime.now())
+        result = await self.db_session.execute(statement)
+        await self.db_session.commit()
+        return result.rowcount
@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Optional
+from sqlmodel import Field
+from app.database.base.model import BaseModel
+
+
+class LLMRateLimitModel(BaseModel, table=True):
+    """
+    Shared per-deployment rate limit window, used to coordinate LLM quota across gunicorn workers.
+
+    Attributes:
+
+        deployment (str): Azure OpenAI deployment name. One row per deployment.
+
+        window_start (datetime): start of the current one-minute window.
+
+        requests (int): requests reserved in the current window.
+
+        tokens (int): estimated tokens reserved in the current window.
+
+        blocked_until (Optional[datetime]): no worker sends requests before this time (set from 429 Retry-After).
+    """
+
+    __tablename__ = "llm_rate_limits"
+    deployment: str = Field(index=True, unique=True, nullable=False)
+    window_start: datetime = Field(nullable=False)
+    requests: int = Field(default=0, nullable=False)
+    tokens: int = Field(default=0, nullable=False)
+    blocked_until: Optional[datetime] = Field(default=None)
@@ -0,0 +1,69 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import update, case, func
+from sqlalchemy.dialects.postgresql import insert
+from .model import LLMRateLimitModel
+from app.database.base.service import BaseService
+from app.utils.logging import AppLogger
+
+
+logger = AppLogger().get_logger()
+
+
+class LLMRateLimitService(BaseService):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+    async def reserve(self, deployment: str, window_start: datetime, requests: int, tokens: int):
+        """
+        Atomically add requests and tokens to the deployment's current window.
+        The counters are reset when a new window starts.
+
+        Returns:
+
+            Row(requests, tokens, blocked_until): totals of the window after the reservation.
+        """
+        statement = insert(LLMRateLimitModel).values(
+            uuid=uuid.uuid4(),
+            deployment=deployment,
+            window_start=window_start,
+            requests=requests,
+            tokens=tokens
+        )
+        same_window = LLMRateLimitModel.window_start == statement.excluded.window_start
+        statement = statement.on_conflict_do_update(
+            index_elements=[LLMRateLimitModel.deployment],
+            set_={
+                "requests": case((same_window, LLMRateLimitModel.requests + statement.excluded.requests), else_=statement.excluded.requests),
+                "tokens": case((same_window, LLMRateLimitModel.tokens + statement.excluded.tokens), else_=statement.excluded.tokens),
+                "window_start": statement.excluded.window_start
+            }
+        ).returning(LLMRateLimitModel.requests, LLMRateLimitModel.tokens, LLMRateLimitModel.blocked_until)
+
+        result = await self.db_session.execute(statement)
+        row = result.one()
+        await self.db_session.commit()
+        return row
+
+    async def release(self, deployment: str, window_start: datetime, requests: int, tokens: int):
+        """
+        Take back a reservation of the window, if the window has not been reset since.
+        """
+        statement = (update(LLMRateLimitModel)
+                     .where(LLMRateLimitModel.deployment == deployment, LLMRateLimitModel.window_start == window_start)
+                     .values(
+                         requests=func.greatest(LLMRateLimitModel.requests - requests, 0),
+                         tokens=func.greatest(LLMRateLimitModel.tokens - tokens, 0)
+                     ))
+        await self.db_session.execute(statement)
+        await self.db_session.commit()
+
+    async def block(self, deployment: str, until: datetime):
+        """
+        Block the deployment for every worker until the given time.
+        """
+        statement = (update(LLMRateLimitModel)
+                     .where(LLMRateLimitModel.deployment == deployment)
+                     .values(blocked_until=func.greatest(func.coalesce(LLMRateLimitModel.blocked_until, until), until)))
+        await self.db_session.execute(statement)
+        await self.db_session.commit()
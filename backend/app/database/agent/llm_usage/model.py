@@ -0,0 +1,51 @@
+from uuid import UUID
+from typing import Optional
+from sqlmodel import Field
+from app.database.base.model import BaseModel, CreatedAtOnlyTimeStampMixin
+
+
+class LLMUsageModel(BaseModel, CreatedAtOnlyTimeStampMixin, table=True):
+    """
+    Represents one LLM or embedding call in the usage ledger.
+
+    Attributes:
+
+        tenant_id (Optional[UUID]): tenant that the call is billed to. Default is None.
+
+        report_id (Optional[UUID]): report that the call was made for. Default is None.
+
+        session_id (Optional[str]): chat session that the call was made for. Default is None.
+
+        name (Optional[str]): call name, e.g. "score-chunks". Default is None.
+
+        model (str): deployment name.
+
+        kind (str): "chat" or "embedding".
+
+        prompt_tokens (int): prompt tokens.
+
+        completion_tokens (int): completion tokens.
+
+        total_tokens (int): total tokens.
+
+        estimated (bool): True when the token counts are estimated (streaming and embeddings) rather than
+                          read from the response usage.
+
+        latency (float): call latency in seconds.
+
+        cost (float): estimated cost in USD, from LLM_MODEL_PRICES.
+    """
+
+    __tablename__ = "llm_usage"
+    tenant_id: Optional[UUID] = Field(default=None, index=True)
+    report_id: Optional[UUID] = Field(default=None, index=True)
+    session_id: Optional[str] = Field(default=None, index=True)
+    name: Optional[str] = Field(default=None)
+    model: str = Field(nullable=False)
+    kind: str = Field(nullable=False)
+    prompt_tokens: int = Field(default=0, nullable=False)
+    completion_tokens: int = Field(default=0, nullable=False)
+    total_tokens: int = Field(default=0, nullable=False)
+    estimated: bool = Field(default=False, nullable=False)
+    latency: float = Field(default=0.0, nullable=False)
+    cost: float = Field(default=0.0, nullable=False)
@@ -0,0 +1,116 @@
+from uuid import UUID
+from datetime import datetime
+from typing import Optional, List
+from sqlmodel import select
+from sqlalchemy import func, insert
+from .model import LLMUsageModel
+from app.database.base.service import BaseService
+from app.utils.logging import AppLogger
+
+
+logger = AppLogger().get_logger()
+
+
+class LLMUsageService(BaseService):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+    def __filters__(
+        self,
+        tenant_id: Optional[UUID] = None,
+        report_id: Optional[UUID] = None,
+        session_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> list:
+        filters = []
+        if tenant_id:
+            filters.append(LLMUsageModel.tenant_id == tenant_id)
+        if report_id:
+            filters.append(LLMUsageModel.report_id == report_id)
+        if session_id:
+            filters.append(LLMUsageModel.session_id == session_id)
+        if since:
+            filters.append(LLMUsageModel.created_at >= since)
+        if until:
+            filters.append(LLMUsageModel.created_at < until)
+        return filters
+
+    async def add_usages(self, usages: List[dict]):
+        """
+        Bulk insert ledger rows.
+
+        Parameters:
+
+            usages (List[dict]): LLMUsageModel fields of each row.
+        """
+        if not usages:
+            return
+        await self.db_session.execute(insert(LLMUsageModel), [LLMUsageModel(**usage).model_dump() for usage in usages])
+        await self.db_session.commit()
+
+    async def find_all(self, skip: int = 0, limit: int = 100, **kwargs) -> List[LLMUsageModel]:
+        """
+        Retrieve ledger rows, newest first.
+
+        Parameters:
+
+            skip (int): number of rows to skip.
+
+            limit (int): max number of rows.
+
+            kwargs: tenant_id, report_id, session_id, since and until filters.
+
+        Returns:
+
+            List[LLMUsageModel]: ledger rows.
+        """
+        statement = select(LLMUsageModel).where(*self.__filters__(**kwargs)).order_by(LLMUsageModel.created_at.desc()).offset(skip).limit(limit)
+        result = await self.db_session.exec(statement)
+        return result.all()
+
+    async def summarize(self, group_by: str = "model", **kwargs) -> List[dict]:
+        """
+        Aggregate tokens, cost and latency of matching ledger rows.
+
+        Parameters:
+
+            group_by (str): "model", "name", "kind", "tenant_id", "report_id" or "session_id".
+
+            kwargs: tenant_id, report_id, session_id, since and until filters.
+
+        Returns:
+
+            List[dict]: one row per group.
+        """
+        column = getattr(LLMUsageModel, group_by)
+        statement = select(
+            column,
+            func.count(LLMUsageModel.uuid),
+            func.sum(LLMUsageModel.prompt_tokens),
+            func.sum(LLMUsageModel.completion_tokens),
+            func.sum(LLMUsageModel.total_tokens),
+            func.sum(LLMUsageModel.cost),
+            func.avg(LLMUsageModel.latency)
+        ).where(*self.__filters__(**kwargs)).group_by(column)
+        result = await self.db_session.execute(statement)
+        return [
+            {
+                group_by: key,
+                "calls": calls,
+                "prompt_tokens": prompt_tokens or 0,
+                "completion_tokens": completion_tokens or 0,
+                "total_tokens": total_tokens or 0,
+                "cost": cost or 0.0,
+                "avg_latency": avg_latency or 0.0,
+            }
+            for key, calls, prompt_tokens, completion_tokens, total_tokens, cost, avg_latency in result.all()
+        ]
+
+    async def total_cost(self, tenant_id: UUID, since: datetime) -> float:
+        """
+        Sum of the cost billed to the tenant since the given time.
+        """
+        statement = select(func.coalesce(func.sum(LLMUsageModel.cost), 0.0)).where(*self.__filters__(tenant_id=tenant_id, since=since))
+        result = await self.db_session.execute(statement)
+        return float(result.scalar_one())
@@ -0,0 +1,19 @@
+from sqlmodel import Field
+from app.database.base.model import BaseModel, TimeStampMixin
+
+
+class SearchCacheGenerationModel(BaseModel, TimeStampMixin, table=True):
+    """
+    Represents the invalidation generation of cached Azure AI Search results, shared by all workers.
+    Cached results of an older generation are never served.
+
+    Attributes:
+
+        scope (str): "<service name>/<index name>", with "*" for any service or index.
+
+        generation (int): incremented on every invalidation of the scope.
+    """
+
+    __tablename__ = "search_cache_generations"
+    scope: str = Field(index=True, unique=True, nullable=False)
+    generation: int = Field(default=0, nullable=False)
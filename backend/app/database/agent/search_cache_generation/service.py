@@ -0,0 +1,60 @@
+import uuid
+from datetime import datetime
+from typing import Dict, List
+from sqlmodel import select
+from sqlalchemy.dialects.postgresql import insert
+from .model import SearchCacheGenerationModel
+from app.database.base.service import BaseService
+from app.utils.logging import AppLogger
+
+
+logger = AppLogger().get_logger()
+
+
+class SearchCacheGenerationService(BaseService):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+    async def find_by_scopes(self, scopes: List[str]) -> Dict[str, int]:
+        """
+        Retrieve the generations of the scopes.
+
+        Parameters:
+
+            scopes (List[str]): scopes
+
+        Returns:
+
+            Dict[str, int]: generation per scope, for the scopes that were ever invalidated.
+        """
+        statement = select(SearchCacheGenerationModel).where(SearchCacheGenerationModel.scope.in_(scopes))
+        result = await self.db_session.exec(statement)
+        return {entry.scope: entry.generation for entry in result.all()}
+
+    async def increment(self, scope: str) -> int:
+        """
+        Atomically increment the generation of the scope.
+
+        Returns:
+
+            int: new generation.
+        """
+        now = datetime.now()
+        statement = insert(SearchCacheGenerationModel).values(
+            uuid=uuid.uuid4(),
+            scope=scope,
+            generation=1,
+            created_at=now,
+            updated_at=now
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[SearchCacheGenerationModel.scope],
+            set_={
+                "generation": SearchCacheGenerationModel.generation + 1,
+                "updated_at": now
+            }
+        ).returning(SearchCacheGenerationModel.generation)
+        result = await self.db_session.execute(statement)
+        generation = result.scalar_one()
+        await self.db_session.commit()
+        return generation
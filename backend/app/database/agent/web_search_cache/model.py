@@ -0,0 +1,34 @@
+from datetime import datetime
+from sqlmodel import Field
+from app.database.base.model import BaseModel, TimeStampMixin
+
+
+class WebSearchCacheModel(BaseModel, TimeStampMixin, table=True):
+    """
+    Represents cached web search results in the agent database, shared by all workers and reports.
+
+    Attributes:
+
+        cache_key (str): sha256 of the (scope, normalized query, search depth, max results, options) request.
+
+        scope (str): "global", or the tenant uuid when results are cached per tenant.
+
+        query (str): normalized search query.
+
+        search_depth (str): "basic" or "advanced".
+
+        max_results (int): number of requested results.
+
+        results (str): JSON list of the results.
+
+        fetched_at (datetime): when the results were fetched from the provider. Freshness is computed from it.
+    """
+
+    __tablename__ = "web_search_cache"
+    cache_key: str = Field(index=True, unique=True, nullable=False)
+    scope: str = Field(nullable=False)
+    query: str = Field(nullable=False)
+    search_depth: str = Field(nullable=False)
+    max_results: int = Field(nullable=False)
+    results: str = Field(nullable=False)
+    fetched_at: datetime = Field(nullable=False)
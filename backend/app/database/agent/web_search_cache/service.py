@@ -0,0 +1,74 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+from sqlmodel import select
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import NoResultFound
+from .model import WebSearchCacheModel
+from app.database.base.service import BaseService
+from app.utils.logging import AppLogger
+
+
+logger = AppLogger().get_logger()
+
+
+class WebSearchCacheService(BaseService):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+    async def find_by_key(self, cache_key: str) -> Optional[WebSearchCacheModel]:
+        """
+        Retrieve a cache entry by key, fresh or stale.
+
+        Parameters:
+
+            cache_key (str): cache key
+
+        Returns:
+
+            Optional[WebSearchCacheModel]: cache entry if found, otherwise None.
+        """
+        statement = select(WebSearchCacheModel).where(WebSearchCacheModel.cache_key == cache_key)
+
+        try:
+            result = await self.db_session.exec(statement)
+            return result.one()
+        except NoResultFound:
+            return None
+
+    async def upsert(self, cache_key: str, scope: str, query: str, search_depth: str, max_results: int, results: str):
+        """
+        Insert or refresh a cache entry.
+        """
+        now = datetime.now()
+        statement = insert(WebSearchCacheModel).values(
+            uuid=uuid.uuid4(),
+            cache_key=cache_key,
+            scope=scope,
+            query=query,
+            search_depth=search_depth,
+            max_results=max_results,
+            results=results,
+            fetched_at=now,
+            created_at=now,
+            updated_at=now
+        ).on_conflict_do_update(
+            index_elements=[WebSearchCacheModel.cache_key],
+            set_={
+                "results": results,
+                "fetched_at": now,
+                "updated_at": now
+            }
+        )
+        await self.db_session.execute(statement)
+        await self.db_session.commit()
+
+    async def delete_fetched_before(self, before: datetime) -> int:
+        """
+        Delete entries fetched before the given time.
+        """
+        statement = delete(WebSearchCacheModel).where(WebSearchCacheModel.fetched_at < before)
+        result = await self.db_session.execute(statement)
+        await self.db_session.commit()
+        return result.rowcount
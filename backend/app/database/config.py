@@ -1,5 +1,6 @@
 import os
 from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from ..config import get_settings
@@ -8,6 +9,12 @@ settings = get_settings()
 # Create SQLModel engine
 agent_db_engine = create_async_engine(settings.PG_AGENT_DATABASE_URL, future=True)
 main_db_engine = create_async_engine(settings.PG_MAIN_DATABASE_URL, future=True)
+agent_db_sessionmaker = async_sessionmaker(
+    agent_db_engine, class_=AsyncSession, expire_on_commit=False
+)
+main_db_sessionmaker = async_sessionmaker(
+    main_db_engine, class_=AsyncSession, expire_on_commit=False
+)
 
 
 async def get_agent_db_session() -> AsyncGenerator:
@@ -24,3 +31,22 @@ async def get_main_db_session() -> AsyncGenerator:
     )
     async with async_session() as session:
         yield session
+
+
+@asynccontextmanager
+async def agent_db_session_scope():
+    """
+    Standalone agent db session for background work outside of a request,
+    e.g. shared caches that must not reuse the request session concurrently.
+    """
+    async with agent_db_sessionmaker() as session:
+        yield session
+
+
+@asynccontextmanager
+async def main_db_session_scope():
+    """
+    Standalone main db session for background work outside of a request.
+    """
+    async with main_db_sessionmaker() as session:
+        yield session
@@ -1,3 +1,5 @@
 from .chunk_enum import *
 from .message_enum import *
-from .chat_enum import *
\ No newline at end of file
+from .chat_enum import *
+from .budget_enum import *
+from .search_enum import *
@@ -0,0 +1,6 @@
+from enum import Enum as PyEnum
+
+class BudgetStatusEnum(PyEnum):
+    OK = "OK"
+    ECONOMY = "ECONOMY"
+    EXCEEDED = "EXCEEDED"
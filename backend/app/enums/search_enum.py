@@ -0,0 +1,7 @@
+from enum import Enum as PyEnum
+
+class SearchModeEnum(PyEnum):
+    TEXT = "text"
+    VECTOR = "vector"
+    HYBRID = "hybrid"
+    SEMANTIC = "semantic"
@@ -27,6 +27,14 @@ class AuthTokenExpiredHTTPException(HTTPException):
         )
 
 
+class BudgetExceededHTTPException(HTTPException):
+    def __init__(self, msg=None):
+        super().__init__(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail=msg or "Budget exceeded",
+        )
+
+
 class NotFoundHTTPException(HTTPException):
     def __init__(self, msg=None):
         super().__init__(
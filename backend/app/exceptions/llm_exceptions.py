@@ -0,0 +1,7 @@
+
+class LLMResponseParseError(Exception):
+    def __init__(self, name="", content=""):
+        self.message = f"""
+        Response of {name} is not valid JSON: {content[:200]}
+        """
+        super().__init__(self.message)
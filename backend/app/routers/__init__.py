@@ -2,4 +2,7 @@ from .report.router import router as report_router
 from .chunk.router import router as chunk_router
 from .logging.router import router as logging_router
 from .message.router import router as message_router
-from .chat.router import router as chat_router
\ No newline at end of file
+from .chat.router import router as chat_router
+from .metrics.router import router as metrics_router
+from .usage.router import router as usage_router
+from .search.router import router as search_router
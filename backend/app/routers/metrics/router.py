@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from app.utils.metrics import MetricsRegistry
+from app.utils.openai.response_cache import LLMResponseCache
+from app.utils.openai.hedging import LatencyTracker
+from app.utils.openai.load_balancer import AzureOpenAILoadBalancer
+from app.utils.tracing import TracingClient
+from app.utils.vector_retriever import AzureAISearchResultCache, FaissIndexCache
+from app.utils.web_search_cache import WebSearchCache
+from app.utils.retriever import ProviderGuardRegistry
+from app.utils.openai.embedding_cache import EmbeddingCache
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+@router.get("")
+async def get_metrics():
+    """
+    Return in-process metrics of this worker.
+    
+    Response:
+
+        counters, gauges and timers collected by MetricsRegistry, plus cache statistics.
+    """
+    return {
+        **MetricsRegistry().snapshot(),
+        "llm_cache": LLMResponseCache().stats(),
+        "llm_hedging": LatencyTracker().stats(),
+        "llm_endpoints": AzureOpenAILoadBalancer().stats(),
+        "tracing": TracingClient().stats(),
+        "search_cache": AzureAISearchResultCache().stats(),
+        "web_search_cache": WebSearchCache().stats(),
+        "retrievers": ProviderGuardRegistry().stats(),
+        "faiss_index_cache": FaissIndexCache().stats(),
+        "embedding_cache": EmbeddingCache().stats(),
+    }
@@ -1,14 +1,15 @@
-import json
 from uuid import UUID
-from typing import List
-from fastapi import APIRouter, Depends, File, Form, UploadFile
-from app.database.config import get_agent_db_session, get_main_db_session
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, UploadFile
+from app.database.config import get_agent_db_session, get_main_db_session, agent_db_session_scope, main_db_session_scope
 from app.database.main import TenantService
 from app.database.agent import ReportService, ReportModel, ChunkService, MessageService, MessageModel
 from app.services import ReportFlowService
 from app.enums import ChunkTypeEnum, MessageRoleEnum, MessageTypeEnum
+from app.enums.budget_enum import BudgetStatusEnum
 from app.utils.logging import AppLogger
-from app.exceptions.http_exception import NotFoundHTTPException
+from app.utils.openai.usage import LLMUsageLedger
+from app.exceptions.http_exception import NotFoundHTTPException, BudgetExceededHTTPException
 from .schema import *
 from .dependency import get_report_by_id
 
@@ -125,6 +126,7 @@ async def run_query(
             },
         },
     )
+    await report_flow_service.apply_budget()
     results = await report_flow_service.run_custom_query(query=model.query, type=model.type)
     return [ChunkResponseModel(**result.model_dump()) for result in results]
 
@@ -166,6 +168,7 @@ async def initiate_research(
     report_additional_information: str = Form(...),  
     report_objective: str = Form(...), 
     files: List[UploadFile] = None,
+    research_deadline: Optional[float] = Form(None, gt=0),
     agent_db_session=Depends(get_agent_db_session),
     main_db_session=Depends(get_main_db_session),
 ):
@@ -184,11 +187,14 @@ async def initiate_research(
         
         files (List[UploadFile]): custom files to use for research.
         
+        research_deadline (Optional[float]): seconds to wait for the research providers. Providers still running
+                                             after it are cancelled. Default is RESEARCH_DEADLINE.
+        
     Response:
 
         report_id (UUID): UUID of the new report.
         
-        research_chunks: internal and web search chunks.
+        research_chunks: internal and web search chunks, and the providers that timed out or failed.
         
             Example: 
                 {
@@ -246,6 +252,8 @@ async def initiate_research(
         },
     )
     
+    await report_flow_service.apply_budget()
+    
     return await report_flow_service.initiate_research(
         report_conf={
             'tenant_id': tenant_id,
@@ -254,6 +262,7 @@ async def initiate_research(
             'report_objective': report_objective            
         },
         files=files,
+        deadline=research_deadline
         # urls=urls
     )
 
@@ -276,7 +285,6 @@ async def generate_report(
         chunk_ids (List[UUID]): list of chunk ids to use. It will be ignoed when 'auto_select' is True. Default is [].
     """
     logger.info("getting db sessions")
-    chunk_service = ChunkService(db_session=agent_db_session)
     tenant_service = TenantService(db_session=main_db_session)
     
     tenant_model = await tenant_service.find_by_uuid(report.tenant_id)
@@ -296,14 +304,73 @@ async def generate_report(
         },
     )
     
-    if model.auto_select:
-        internal_chunks = await chunk_service.find_chunks_by_report_id_and_type(report_id=report.uuid, type=ChunkTypeEnum.INTERNAL.value)
-        web_chunks = await chunk_service.find_chunks_by_report_id_and_type(report_id=report.uuid, type=ChunkTypeEnum.WEB.value)
-        logger.info("get chunks")
-        return await report_flow_service.generate_report_from_chunks(chunks=web_chunks+internal_chunks)
-    else:
-        chunks = [ await chunk_service.find_chunk_by_id(id=id) for id in model.chunk_ids]
-        return await report_flow_service.generate_report_from_chunks(chunks=chunks)
+    await report_flow_service.apply_budget()
+    
+    chunks = await report_flow_service.select_chunks(auto_select=model.auto_select, chunk_ids=model.chunk_ids)
+    logger.info("get chunks")
+    return await report_flow_service.generate_report_from_chunks(chunks=chunks)
+
+async def generate_report_batch_job(report_id: UUID, model: GenerateReportRequestModel):
+    """
+    Background job of `generate_report_batch`. Generates the report with batch_mode=True in its own db sessions,
+    since the request sessions are closed once the response is sent.
+    """
+    try:
+        async with agent_db_session_scope() as agent_db_session, main_db_session_scope() as main_db_session:
+            report = await ReportService(db_session=agent_db_session).find_by_id(report_id)
+            tenant_model = await TenantService(db_session=main_db_session).find_by_uuid(report.tenant_id)
+            
+            report_flow_service = ReportFlowService(
+                tenant=tenant_model,
+                report=report,
+                db_session=agent_db_session,
+                batch_mode=True,
+                langfuse_trace_args={
+                    "name": "generate-report-batch",
+                    "metadata": {
+                        "reportID": report.uuid,
+                        "request_params": model.model_dump()
+                    },
+                },
+            )
+            await report_flow_service.apply_budget()
+            
+            chunks = await report_flow_service.select_chunks(auto_select=model.auto_select, chunk_ids=model.chunk_ids)
+            await report_flow_service.generate_report_from_chunks(chunks=chunks)
+            logger.info(f"Generated report {report_id} in batch mode")
+    except Exception as e:
+        logger.error(f"failed to generate report {report_id} in batch mode: {e}")
+
+@router.post("/{report_id}/generate-report/batch", response_model=ReportResponseModel, status_code=202)
+async def generate_report_batch(
+    model: GenerateReportRequestModel,
+    background_tasks: BackgroundTasks,
+    report: ReportModel = Depends(get_report_by_id),
+    main_db_session=Depends(get_main_db_session)
+):
+    """
+    Queue report generation as a background job. Its LLM calls run as offline batch jobs, on the batch quota
+    instead of the real-time quota, so it can take up to LLM_BATCH_COMPLETION_WINDOW.
+    
+    The report is returned as it is now; poll GET /report/{report_id} for its content.
+    
+    Parameters:
+    
+        auto_select (bool): same as generate-report. Default is True.
+        
+        chunk_ids (List[UUID]): same as generate-report. Default is [].
+    """
+    tenant_service = TenantService(db_session=main_db_session)
+    
+    tenant_model = await tenant_service.find_by_uuid(report.tenant_id)
+    if not tenant_model:
+        raise NotFoundHTTPException(msg=f"Tenant with {report.tenant_id} not found")
+    
+    if await LLMUsageLedger().check_budget(tenant_model.uuid) == BudgetStatusEnum.EXCEEDED:
+        raise BudgetExceededHTTPException(msg=f"Tenant {tenant_model.uuid} has exceeded its monthly LLM budget")
+    
+    background_tasks.add_task(generate_report_batch_job, report_id=report.uuid, model=model)
+    return report
 
 @router.post("/generate-report/v2")  
 async def generate_report_v2(  
@@ -380,6 +447,8 @@ async def generate_report_v2(
         },
     )
 
+    await report_flow_service.apply_budget()
+    
     report = await report_flow_service.generate_report_v2(  
         report_conf={  
             'tenant_id': tenant_id,  
@@ -390,7 +459,7 @@ async def generate_report_v2(
         },  
         files=files  
     )  
-    return json.loads(report)["content"] 
+    return report["content"] 
 
 @router.post("/{report_id}/chat/{session_id}", response_model=ChatWithReportResponseModel)
 async def chat_with_report(
@@ -48,6 +48,10 @@ class ResearchResponseModel(BaseModel):
     web: List[ChunkResponseModel] = []
     file: List[ChunkResponseModel] = []
     url: List[ChunkResponseModel] = []
+    # research pipelines ("internal", "web", "file", "url") cancelled at the research deadline
+    timed_out: List[str] = []
+    # research pipelines that failed
+    failed: List[str] = []
     
     
 class InitiateResearchResponseModel(BaseModel):
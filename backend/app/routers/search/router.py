@@ -0,0 +1,52 @@
+from uuid import UUID
+from typing import Optional
+from fastapi import APIRouter, Depends
+from app.database.config import get_main_db_session
+from app.database.main import TenantService
+from app.utils.vector_retriever import AzureAISearchResultCache
+from app.utils.logging import AppLogger
+from app.exceptions.http_exception import NotFoundHTTPException
+from .schema import *
+
+logger = AppLogger().get_logger()
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+@router.delete("/cache/tenants/{tenant_id}", response_model=SearchCacheInvalidateResponseModel)
+async def invalidate_tenant_search_cache(
+    tenant_id: UUID,
+    main_db_session=Depends(get_main_db_session)
+):
+    """
+    Drop the cached Azure AI Search results of the tenant's index in every worker. Call it after the index is re-crawled.
+    """
+    tenant_service = TenantService(db_session=main_db_session)
+    tenant_model = await tenant_service.find_by_uuid(tenant_id)
+    if not tenant_model:
+        raise NotFoundHTTPException(msg=f"Tenant with {tenant_id} not found")
+
+    invalidated = await AzureAISearchResultCache().invalidate(
+        service_name=tenant_model.ai_search_service_name,
+        index_name=tenant_model.ai_search_index_name
+    )
+    logger.info(f"Invalidated {invalidated} cached search results of index {tenant_model.ai_search_index_name}")
+    return SearchCacheInvalidateResponseModel(
+        service_name=tenant_model.ai_search_service_name,
+        index_name=tenant_model.ai_search_index_name,
+        invalidated=invalidated
+    )
+
+@router.delete("/cache", response_model=SearchCacheInvalidateResponseModel)
+async def invalidate_search_cache(
+    service_name: Optional[str] = None,
+    index_name: Optional[str] = None
+):
+    """
+    Drop cached Azure AI Search results of an index, or of every index when no names are given, in every worker.
+    """
+    invalidated = await AzureAISearchResultCache().invalidate(service_name=service_name, index_name=index_name)
+    return SearchCacheInvalidateResponseModel(
+        service_name=service_name,
+        index_name=index_name,
+        invalidated=invalidated
+    )
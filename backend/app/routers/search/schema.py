@@ -0,0 +1,7 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class SearchCacheInvalidateResponseModel(BaseModel):
+    service_name: Optional[str] = None
+    index_name: Optional[str] = None
+    invalidated: int
@@ -0,0 +1,98 @@
+from uuid import UUID
+from datetime import datetime
+from typing import List, Optional, Literal
+from fastapi import APIRouter, Depends
+from app.database.config import get_agent_db_session
+from app.database.agent import LLMUsageService
+from app.utils.openai.usage import LLMUsageLedger
+from app.utils.logging import AppLogger
+from .schema import *
+
+logger = AppLogger().get_logger()
+
+router = APIRouter(prefix="/usage", tags=["Usage"])
+
+@router.get("", response_model=List[LLMUsageResponseModel])
+async def get_usages(
+    tenant_id: Optional[UUID] = None,
+    report_id: Optional[UUID] = None,
+    session_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    agent_db_session=Depends(get_agent_db_session)
+):
+    """
+    Get LLM and embedding calls from the usage ledger, newest first.
+    """
+    await LLMUsageLedger().flush()
+    usage_service = LLMUsageService(db_session=agent_db_session)
+    usages = await usage_service.find_all(
+        skip=skip,
+        limit=limit,
+        tenant_id=tenant_id,
+        report_id=report_id,
+        session_id=session_id,
+        since=since,
+        until=until
+    )
+    return [LLMUsageResponseModel(**usage.model_dump()) for usage in usages]
+
+@router.get("/summary")
+async def get_usage_summary(
+    group_by: Literal["model", "name", "kind", "tenant_id", "report_id", "session_id"] = "model",
+    tenant_id: Optional[UUID] = None,
+    report_id: Optional[UUID] = None,
+    session_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    agent_db_session=Depends(get_agent_db_session)
+):
+    """
+    Aggregate tokens, cost and latency of the usage ledger.
+    
+    Parameters:
+    
+        group_by (str): "model", "name", "kind", "tenant_id", "report_id" or "session_id". Default is "model".
+        
+    Example Responses:
+    
+        [
+            {
+                "model": "gpt-4o",
+                "calls": 42,
+                "prompt_tokens": 183204,
+                "completion_tokens": 20391,
+                "total_tokens": 203595,
+                "cost": 1.22,
+                "avg_latency": 6.4
+            }
+        ]
+    """
+    await LLMUsageLedger().flush()
+    usage_service = LLMUsageService(db_session=agent_db_session)
+    return await usage_service.summarize(
+        group_by=group_by,
+        tenant_id=tenant_id,
+        report_id=report_id,
+        session_id=session_id,
+        since=since,
+        until=until
+    )
+
+@router.get("/tenants/{tenant_id}/budget", response_model=TenantBudgetResponseModel)
+async def get_tenant_budget(
+    tenant_id: UUID
+):
+    """
+    Get the monthly LLM budget, current spend and budget status of a tenant.
+    """
+    ledger = LLMUsageLedger()
+    budget = ledger.get_budget(tenant_id) or {}
+    return TenantBudgetResponseModel(
+        tenant_id=tenant_id,
+        monthly_limit=budget.get("monthly_limit"),
+        monthly_spend=await ledger.get_monthly_spend(tenant_id),
+        status=await ledger.check_budget(tenant_id)
+    )
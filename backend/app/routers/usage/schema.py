@@ -0,0 +1,27 @@
+from uuid import UUID
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+from app.enums.budget_enum import BudgetStatusEnum
+
+class LLMUsageResponseModel(BaseModel):
+    uuid: UUID
+    tenant_id: Optional[UUID] = None
+    report_id: Optional[UUID] = None
+    session_id: Optional[str] = None
+    name: Optional[str] = None
+    model: str
+    kind: str
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    estimated: bool
+    latency: float
+    cost: float
+    created_at: datetime
+
+class TenantBudgetResponseModel(BaseModel):
+    tenant_id: UUID
+    monthly_limit: Optional[float] = None
+    monthly_spend: float
+    status: BudgetStatusEnum
@@ -6,9 +6,20 @@ from pathlib import Path
 from contextlib import asynccontextmanager
 from .config import get_settings
 from .config import Environment
-from .routers import report_router, chunk_router, logging_router, message_router, chat_router
+from .routers import report_router, chunk_router, logging_router, message_router, chat_router, metrics_router, usage_router, search_router
 from .websockets import chat_ws_router
 from .utils.logging import AppLogger
+from .utils.openai import AzureOpenAIClientRegistry
+from .utils.openai.response_cache import LLMResponseCache
+from .utils.openai.load_balancer import AzureOpenAILoadBalancer
+from .utils.openai.usage import LLMUsageLedger
+from .utils.prompt_registry import PromptRegistry
+from .utils.tracing import TracingClient
+from .utils.vector_retriever import AzureAISearchClientRegistry
+from .utils.tavily_client import TavilyClientPool
+from .utils.web_search_cache import WebSearchCache
+from .utils.exa_client import ExaClientPool
+from .utils.openai.embedding_cache import EmbeddingCache
 
 logger = AppLogger().get_logger()
 
@@ -17,15 +28,28 @@ logger = AppLogger().get_logger()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Run things before the server starts
+    await PromptRegistry().warm()
+    await LLMResponseCache().purge_expired()
+    await WebSearchCache().purge_expired()
+    await EmbeddingCache().purge_expired()
+    AzureOpenAILoadBalancer().start_health_checks()
+    LLMUsageLedger().start()
     
     # Important to yield after running things before the server starts
     yield
 
     # Run things before the server stops
+    await AzureOpenAILoadBalancer().stop_health_checks()
+    await LLMUsageLedger().stop()
+    await TracingClient().flush()
+    await AzureOpenAIClientRegistry().aclose()
+    await AzureAISearchClientRegistry().aclose()
+    await TavilyClientPool().aclose()
+    await ExaClientPool().aclose()
 
 
 # Create the FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Get the settings
 app_settings = get_settings()
@@ -63,6 +87,9 @@ app.include_router(report_router, prefix="/api")
 app.include_router(chunk_router, prefix="/api")
 app.include_router(message_router, prefix="/api")
 app.include_router(chat_router, prefix="/api")
+app.include_router(metrics_router, prefix="/api")
+app.include_router(usage_router, prefix="/api")
+app.include_router(search_router, prefix="/api")
 app.include_router(logging_router, prefix="")
 app.include_router(chat_ws_router, prefix="/ws")
 
@@ -1,7 +1,7 @@
 from typing import Optional
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.utils.openai.azureopenai_client import AzureOpenAIClient
-from app.utils.langfuse_client import LangFuseClient
+from app.utils.tracing import TracingClient
 
 class BaseService:
     """
@@ -25,8 +25,7 @@ class BaseService:
             if "metadata" not in langfuse_trace_args:
                 langfuse_trace_args["metadata"] = {}
         
-        self.langfuse_client = LangFuseClient()        
         self.langfuse_trace_args = langfuse_trace_args
-        self.langfuse_trace = self.langfuse_client.get_trace_from_args(args=self.langfuse_trace_args)
+        self.langfuse_trace = TracingClient().start_trace(args=self.langfuse_trace_args)
         
         self.azure_openai_client = AzureOpenAIClient(langfuse_trace=self.langfuse_trace)
\ No newline at end of file
@@ -14,6 +14,10 @@ from app.utils.logging import AppLogger, ElapsedTimeLogger
 from app.utils.string import StringUtil
 from app.utils.file import FileUtil
 from app.utils.vector_retriever import FaissVectorRetriever
+from app.utils.openai.usage import LLMUsageLedger, set_usage_context
+from app.enums.budget_enum import BudgetStatusEnum
+from app.exceptions.http_exception import BudgetExceededHTTPException
+from app.config import get_settings
 from app.enums.message_enum import MessageRoleEnum, MessageTypeEnum
 from .base import BaseService
 
@@ -43,6 +47,7 @@ class ChatService(BaseService):
         self.chunk_service = ChunkService(db_session=self.db_session)
         self.session_id = session_id
         self.type = type
+        set_usage_context(session_id=session_id, tenant_id=tenant.uuid if tenant else None)
         
         index_path = "./static/faiss-indexes" + self.__get_index_path__(session_id=session_id, type=type)
         # if os.path.exists(index_path):
@@ -53,19 +58,41 @@ class ChatService(BaseService):
         #     self.faiss_vector_retriever = None
         self.config = config
         
+        self.index_path = index_path
         if tenant:
-            self.qa_agent = QAAgent(
-                faiss_vector_store=self.faiss_vector_retriever if os.path.exists(index_path) else None,
-                tenant=self.tenant,
-                db_session=self.db_session,
-                langfuse_trace=self.langfuse_trace
-            )
+            self.qa_agent = self.__build_qa_agent__()
             # self.qa_agent.system_prompt = self.__get_agent_system_prompt__(type)
 
+    def __build_qa_agent__(self, model: Optional[str] = None) -> QAAgent:
+        return QAAgent(
+            faiss_vector_store=self.faiss_vector_retriever if os.path.exists(self.index_path) else None,
+            tenant=self.tenant,
+            db_session=self.db_session,
+            langfuse_trace=self.langfuse_trace,
+            model=model
+        )
+
+    async def apply_budget(self):
+        """
+        Check the tenant's LLM budget before answering, like ReportFlowService.apply_budget.
+        
+        Close to the limit, the agent and the other LLM calls use the fast model.
+        Past the limit, the chat is rejected.
+        """
+        if not self.tenant:
+            return
+        status = await LLMUsageLedger().check_budget(self.tenant.uuid)
+        if status == BudgetStatusEnum.EXCEEDED:
+            raise BudgetExceededHTTPException(msg=f"Tenant {self.tenant.uuid} has exceeded its monthly LLM budget")
+        if status == BudgetStatusEnum.ECONOMY:
+            logger.warning(f"Tenant {self.tenant.uuid} is close to its monthly LLM budget, using economy mode")
+            self.azure_openai_client.economy_mode = True
+            self.qa_agent = self.__build_qa_agent__(model=get_settings().FAST_LLM_MODEL)
+
     async def __get_agent_system_prompt__(self):
         if self.type == ChatTypeEnum.QA.value:
             return SystemMessage(
-                content=QAPrompts.qa_system_prompt(
+                content=await QAPrompts.qa_system_prompt(
                     organization_name=self.tenant.name,
                     organization_information=self.tenant.org_info
                 )
@@ -77,7 +104,7 @@ class ChatService(BaseService):
             else:
                 report = ""
             return SystemMessage(
-                content=QAPrompts.report_chat_system_prompt(
+                content=await QAPrompts.report_chat_system_prompt(
                     organization_name=self.tenant.name,
                     organization_information=self.tenant.org_info,
                     # report_target_audience=report.report_target_audience,
@@ -96,19 +123,6 @@ class ChatService(BaseService):
     def __get_file_path__(self, session_id: str, type: str):
         return f"/chat/{type}/{session_id}/"
     
-    async def __embed_uploaded_file__(self, file: UploadFile, type: ChatTypeEnum):
-        """
-        Embed a uploaded file.
-        
-        Parameters:
-            file (UploadFile): uploaded file
-        """
-        file_util = FileUtil()
-        logger.info(type)
-        path = await file_util.save_uploaded_file(file=file, file_path=self.__get_file_path__(self.session_id, self.type))
-        documents = await file_util.load_file_as_documents(file_path=path)
-        ids = await self.faiss_vector_retriever.add_documents(documents=documents, save_local=False)
-    
     async def embed_uploaded_files(self, files: List[UploadFile] = []):
         """
         Embed uploaded files.
@@ -117,10 +131,9 @@ class ChatService(BaseService):
             files (List[UploadFile]): uploaded files
         """
         with ElapsedTimeLogger(f"Embedding custom files"):
-            for file in files:
-                await self.__embed_uploaded_file__(file, type=self.type)
-                
-            self.faiss_vector_retriever.db.save_local(self.faiss_vector_retriever.file_path)
+            # files are parsed concurrently, and their chunks embedded in shared batches and indexed at once
+            documents = await FileUtil().load_uploaded_files_as_documents(files=files, file_path=self.__get_file_path__(self.session_id, self.type))
+            await self.faiss_vector_retriever.add_documents(documents=documents, save_local=True)
     
     async def qa_chat_streaming(self, content: str, files: List[str]) -> AsyncGenerator[QAAgentStreamingEvent, None]:
         """
@@ -173,6 +186,7 @@ class ChatService(BaseService):
                                 type=ChunkTypeEnum.WEB.value,
                                 session_id=self.session_id,
                                 query=obj['query'],
+                                vector_similarity_score=obj.get('score') or 0.0,
                                 source=obj['url'],
                                 content=obj['content'],
                                 captions_text=obj['content'],
@@ -1,7 +1,9 @@
 import json
+import time
 import asyncio
 import logging
-from typing import Optional, List, Dict
+from uuid import UUID
+from typing import Optional, List, Dict, Tuple, Any
 from fastapi import UploadFile
 from app.database.main import TenantModel
 from app.database.agent import ChunkService, ChunkModel, ReportModel, MessageModel, ReportService, MessageService
@@ -12,11 +14,18 @@ from app.utils.file import FileUtil
 from app.utils.tavily_client import TavilyClient, TavilySearchContextResponse
 from app.utils.vector_retriever import FaissVectorRetriever, Document
 from app.utils.exa_client import ExaClient, ExaGetContentResponse
+from app.utils.url_highlight_index import URLHighlightIndex
+from app.utils.retriever import AsyncRetriever
+from app.utils.metrics import MetricsRegistry
 from app.routers.report.schema import ChunkResponseModel, OutlineModel, ResearchResponseModel, InitiateResearchResponseModel 
 from app.enums.chunk_enum import ChunkTypeEnum
 from app.enums.message_enum import MessageRoleEnum, MessageTypeEnum
 from app.ai.prompts import ReportPrompts
+from app.ai.prompts.chunk_fragments import ChunkPromptFragments
 from app.config import get_settings
+from app.enums.budget_enum import BudgetStatusEnum
+from app.exceptions.http_exception import BudgetExceededHTTPException
+from app.utils.openai.usage import LLMUsageLedger, set_usage_context
 from .base import BaseService
 
 logger = AppLogger().get_logger()
@@ -25,7 +34,7 @@ class ReportFlowService(BaseService):
     """
     Service for report generation flow logics.
     """
-    def __init__(self, tenant: TenantModel, report: Optional[ReportModel] = None, **kwargs):
+    def __init__(self, tenant: TenantModel, report: Optional[ReportModel] = None, batch_mode: bool = False, **kwargs):
         """
         Initiate Report Flow Service.
         
@@ -35,6 +44,9 @@ class ReportFlowService(BaseService):
             
             report_id (UUID): report id.
             
+            batch_mode (bool): run scoring and section generation as offline batch jobs, off the real-time quota.
+                               For non-interactive report generation only. Default is False.
+            
         """
         super().__init__(**kwargs)
         
@@ -44,9 +56,15 @@ class ReportFlowService(BaseService):
         self.message_service = MessageService(**kwargs)
         self.report = report
         self.tenant = tenant
-        self.tavily_client = TavilyClient(langfuse_trace=self.langfuse_trace)
+        self.batch_mode = batch_mode
+        self.chunk_fragments = ChunkPromptFragments()
+        set_usage_context(tenant_id=tenant.uuid, report_id=report.uuid if report else None)
+        self.tavily_client = TavilyClient(langfuse_trace=self.langfuse_trace, tenant_id=self.tenant.uuid)
         self.exa_client = ExaClient(langfuse_trace=self.langfuse_trace)
+        self.url_highlight_indexes: Dict[Tuple[str, ...], URLHighlightIndex] = {}
         self.faiss_vector_retriever = None
+        # monotonic time the running research must finish by, see `initiate_research`
+        self.research_deadline_at: Optional[float] = None
         self.chunks = []
         if report:
             self.faiss_vector_retriever = FaissVectorRetriever(
@@ -54,6 +72,20 @@ class ReportFlowService(BaseService):
                 langfuse_trace=self.langfuse_trace
             )
     
+    async def apply_budget(self):
+        """
+        Check the tenant's LLM budget before starting a job.
+        
+        Close to the limit, the pipeline switches to economy mode (fast model, no hedging).
+        Past the limit, the job is rejected.
+        """
+        status = await LLMUsageLedger().check_budget(self.tenant.uuid)
+        if status == BudgetStatusEnum.EXCEEDED:
+            raise BudgetExceededHTTPException(msg=f"Tenant {self.tenant.uuid} has exceeded its monthly LLM budget")
+        if status == BudgetStatusEnum.ECONOMY:
+            logger.warning(f"Tenant {self.tenant.uuid} is close to its monthly LLM budget, using economy mode")
+            self.azure_openai_client.economy_mode = True
+    
     async def __get_web_search_queries__(self, count: int = 5, **kwargs):
         """
         Get internal search queries from user report generation params.
@@ -61,19 +93,20 @@ class ReportFlowService(BaseService):
         Parameters:
             count (int): 5
         """
-        result = await self.azure_openai_client.ainvoke(
+        result = await self.azure_openai_client.ainvoke_json(
             model=self.settings.FAST_LLM_MODEL,
             name="generate-web-search-queries",
+            hedge=True,
+            cache=True,
             timeout=45,
             response_format={"type": "json_object"},
             messages=[
                 {
                     "role": "user",
-                    "content":  ReportPrompts.get_web_search_queries(count=count, **kwargs)
+                    "content":  await ReportPrompts.get_web_search_queries(count=count, **kwargs)
                 }
             ]
         )
-        result = json.loads(result)
         logger.info(f"Get web search queries: {json.dumps(result['queries'])}")
         return result["queries"]
     
@@ -84,19 +117,20 @@ class ReportFlowService(BaseService):
         Parameters:
             count (int): 5
         """
-        result = await self.azure_openai_client.ainvoke(
+        result = await self.azure_openai_client.ainvoke_json(
             model=self.settings.FAST_LLM_MODEL,
             name="generate-web-search-queries",
+            hedge=True,
+            cache=True,
             timeout=45,
             response_format={"type": "json_object"},
             messages=[
                 {
                     "role": "user",
-                    "content":  ReportPrompts.get_web_search_queries_for_section(count=count, section_title=section["title"], section_description=section["description"], **kwargs)
+                    "content":  await ReportPrompts.get_web_search_queries_for_section(count=count, section_title=section["title"], section_description=section["description"], **kwargs)
                 }
             ]
         )
-        result = json.loads(result)
         logger.info(f"Get web search queries for section: {json.dumps(result['queries'])}")
         return result["queries"]
 
@@ -107,19 +141,20 @@ class ReportFlowService(BaseService):
         Parameters:
             count (int): 5
         """
-        result = await self.azure_openai_client.ainvoke(
+        result = await self.azure_openai_client.ainvoke_json(
             model=self.settings.FAST_LLM_MODEL,
             name="generate-rag-search-queries",
+            hedge=True,
+            cache=True,
             timeout=45,
             response_format={"type": "json_object"},
             messages=[
                 {
                     "role": "user",
-                    "content":  ReportPrompts.get_rag_queries(count=count, **kwargs)
+                    "content":  await ReportPrompts.get_rag_queries(count=count, **kwargs)
                 }
             ]
         )
-        result = json.loads(result)
         logger.info(f"Get rag search queries: {json.dumps(result['queries'])}")
         return result["queries"]
 
@@ -130,68 +165,102 @@ class ReportFlowService(BaseService):
         Parameters:
             count (int): 3
         """
-        result = await self.azure_openai_client.ainvoke(
+        result = await self.azure_openai_client.ainvoke_json(
             model=self.settings.FAST_LLM_MODEL,
             name="generate-section-rag-search-queries",
+            hedge=True,
+            cache=True,
             timeout=45,
             response_format={"type": "json_object"},
             messages=[
                 {
                     "role": "user",
-                    "content":  ReportPrompts.get_section_rag_queries(count=count, **kwargs)
+                    "content":  await ReportPrompts.get_section_rag_queries(count=count, **kwargs)
                 }
             ]
         )
-        result = json.loads(result)
         return result["queries"]
 
+    async def __retrieve__(self, retriever: AsyncRetriever, query: str, top: int = 5, **kwargs) -> List[Any]:
+        """
+        Run a query on a research backend. Limits, deadline and retries are applied per provider by the retriever;
+        a provider that still fails yields no results instead of failing the whole research.
+        """
+        try:
+            return await retriever.aretrieve(query=query, top=top, **kwargs)
+        except Exception as e:
+            logger.error(f"error in {retriever.provider} query: {e!r}")
+            return []
+    
+    async def __gather_queries__(self, coroutines: List) -> List[List[ChunkModel]]:
+        """
+        Run the per-query searches of a research pipeline concurrently.
+
+        During a research with a deadline, searches still running when only RESEARCH_SCORING_RESERVE seconds are
+        left are cancelled, so that the pipeline scores the results of the searches that finished.
+        """
+        tasks = [asyncio.create_task(coroutine) for coroutine in coroutines]
+        if not tasks:
+            return []
+
+        timeout = None
+        if self.research_deadline_at is not None:
+            timeout = max(0.0, self.research_deadline_at - time.monotonic() - self.settings.RESEARCH_SCORING_RESERVE)
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            raise
+        if pending:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.warning(f"Research deadline is near, cancelled {len(pending)} of {len(tasks)} queries")
+            MetricsRegistry().incr("research_query_timeouts", len(pending))
+        return [task.result() for task in tasks if task in done]
+
     async def __run_web_search_query__(self, query: str, top: int = 5) -> List[TavilySearchContextResponse]:
         with ElapsedTimeLogger(f"Running web search query: {query}"):
-            results = await self.tavily_client.get_search_context(query=query, search_depth='advanced', max_results=top)
-            return results
+            return await self.__retrieve__(self.tavily_client, query=query, top=top, search_depth='advanced')
     
     async def __run_rag_query__(self, query: str, service_name: str, index_name: str, top: int = 5) -> List[AzureAISearchResponse]:
         """
         Get the relevant results
         """
         with ElapsedTimeLogger(f"Running rag query: {query}"):
-            try:
-                retreiver = AzureAISearchVectorRetriever(
-                    service_name=service_name,
-                    index_name=index_name,
-                    langfuse_trace=self.langfuse_trace                    
-                )
-                results = await retreiver.run(query=query, top=top)
-                return results
-            except Exception as e:
-                logger.error(f"error in run_rag_query: {e}")
-                return []
+            retreiver = AzureAISearchVectorRetriever(
+                service_name=service_name,
+                index_name=index_name,
+                langfuse_trace=self.langfuse_trace                    
+            )
+            # rag queries are short generated queries, which can be served from a cheaper mode
+            return await self.__retrieve__(retreiver, query=query, top=top, mode=self.settings.AZURE_AI_SEARCH_GENERATED_QUERY_MODE)
     
     async def __run_url_search_query__(self, query: str, urls: List[str], top: int = 5) -> List[ExaGetContentResponse]:
         
         with ElapsedTimeLogger(f"Url search query: {query} on {urls}"):
-            results = await self.exa_client.get_contents(
-                ids=urls,
-                highlights={
-                    "query": query,
-                    "highlightsPerUrl": top, 
-                    "numSentences": 3
-                }
-            )
-            return results
+            if self.settings.URL_SEARCH_MODE == "local":
+                # the pages are fetched and embedded once per report, then every query is answered locally
+                key = tuple(sorted(set(urls)))
+                if key not in self.url_highlight_indexes:
+                    self.url_highlight_indexes[key] = URLHighlightIndex(urls=list(key), exa_client=self.exa_client)
+                try:
+                    return await self.url_highlight_indexes[key].search(query=query, top=top)
+                except Exception as e:
+                    logger.error(f"error in url highlight index query: {e!r}")
+                    return []
+            
+            return await self.__retrieve__(self.exa_client, query=query, top=top, urls=urls)
     
     async def __run_custom_file_query__(self, query: str, top: int = 5) -> List[Document]:
         """
         Get the relevant results from custom files
         """
         with ElapsedTimeLogger(f"Running custom file query: {query}"):
-            try:
-                # if self.faiss_vector_retriever.db:
-                results = await self.faiss_vector_retriever.asimilarity_search(query=query, k=top)
-                return results
-            except Exception as e:
-                logger.error(f"error in custom_file_query: {e}")
+            if not self.faiss_vector_retriever:
                 return []
+            return await self.__retrieve__(self.faiss_vector_retriever, query=query, top=top)
     
     async def __check_relevance__(self, chunk: str, **kwargs) -> bool:
         result = await self.azure_openai_client.ainvoke(
@@ -199,7 +268,7 @@ class ReportFlowService(BaseService):
             messages=[
                 {
                     "role": "user",
-                    "content":  ReportPrompts.check_chunk_relevance(chunk_content=chunk, **kwargs)
+                    "content":  await ReportPrompts.check_chunk_relevance(chunk_content=chunk, **kwargs)
                 }
             ]
         )
@@ -242,28 +311,24 @@ class ReportFlowService(BaseService):
                 }}    
             ]
         """
-        result = await self.azure_openai_client.ainvoke(
+        result = await self.azure_openai_client.ainvoke_json(
             model=self.settings.FAST_LLM_MODEL,
             name="score-chunks",
+            batch=self.batch_mode,
+            hedge=True,
             timeout=45,
             response_format={"type": "json_object"},
             messages=[
                 {
                     "role": "user",
-                    "content": ReportPrompts.order_chunks(
-                        chunks=json.dumps([
-                            {  
-                                "id": start_index + index + 1,
-                                "content": chunk.content
-                            }
-                            for index, chunk in enumerate(chunks)
-                        ]),
+                    "content": await ReportPrompts.order_chunks(
+                        chunks=self.chunk_fragments.assemble(chunks, ids=[start_index + index + 1 for index in range(len(chunks))]),
                         **kwargs
                     )
                 }
             ]
         )
-        return json.loads(result)["chunks"]
+        return result["chunks"]
     
     async def __score_section_chunks_by_llm__(self, chunks: List[ChunkModel], start_index: int = 0, **kwargs) -> List[Dict]:
         """
@@ -304,28 +369,24 @@ class ReportFlowService(BaseService):
                 }}
             ]
         """
-        result = await self.azure_openai_client.ainvoke(
+        result = await self.azure_openai_client.ainvoke_json(
             model=self.settings.FAST_LLM_MODEL,
-            name="score-section-chunks",  
+            name="score-section-chunks",
+            batch=self.batch_mode,
+            hedge=True,
             timeout=45,  
             response_format={"type": "json_object"},  
             messages=[  
                 {
                     "role": "user",  
-                    "content": ReportPrompts.order_section_chunks(
-                        chunks=json.dumps([  
-                            {  
-                                "id": start_index + index + 1,  
-                                "content": chunk.content  
-                            }  
-                            for index, chunk in enumerate(chunks)  
-                        ]),  
+                    "content": await ReportPrompts.order_section_chunks(
+                        chunks=self.chunk_fragments.assemble(chunks, ids=[start_index + index + 1 for index in range(len(chunks))]),
                         **kwargs  
                     )  
                 }  
             ]  
         )  
-        return json.loads(result)["chunks"]  
+        return result["chunks"]  
 
     async def __order_chunk_by_llm__(self, chunks: List[ChunkModel], **kwargs) -> List[Dict]:
         """
@@ -431,6 +492,7 @@ class ReportFlowService(BaseService):
                 type=ChunkTypeEnum.WEB.value,
                 report_id=self.report.uuid,
                 query=query,
+                vector_similarity_score=result.score or 0.0,
                 source=result.url,
                 content=result.content,
                 captions_text=result.content,
@@ -637,7 +699,7 @@ class ReportFlowService(BaseService):
         chunks = []
         tasks = [ self.run_web_search_query(query=query, top=final_config["top_each_query"]) for query in queries]
         
-        results = await asyncio.gather(*tasks)
+        results = await self.__gather_queries__(tasks)
         
         for result in results:
             chunks.extend(result)
@@ -694,7 +756,7 @@ class ReportFlowService(BaseService):
         chunks = []
         tasks = [ self.run_web_search_query(query=query, top=final_config["top_each_query"]) for query in queries]
         
-        results = await asyncio.gather(*tasks)
+        results = await self.__gather_queries__(tasks)
         
         for result in results:
             chunks.extend(result)
@@ -752,7 +814,7 @@ class ReportFlowService(BaseService):
             ) for query in queries
         ]
             
-        results = await asyncio.gather(*tasks)
+        results = await self.__gather_queries__(tasks)
         for result in results:
             chunks.extend(result)
         
@@ -808,7 +870,7 @@ class ReportFlowService(BaseService):
             ) for query in queries
         ]
             
-        results = await asyncio.gather(*tasks)
+        results = await self.__gather_queries__(tasks)
         for result in results:
             chunks.extend(result)
         
@@ -865,7 +927,7 @@ class ReportFlowService(BaseService):
             ) for query in queries
         ]
             
-        results = await asyncio.gather(*tasks)
+        results = await self.__gather_queries__(tasks)
         for result in results:
             chunks.extend(result)
         
@@ -874,19 +936,6 @@ class ReportFlowService(BaseService):
         
         return final_chunks
     
-    async def embed_uploaded_file(self, file: UploadFile):
-        """
-        Embed a uploaded file.
-        
-        Parameters:
-            file (UploadFile): uploaded file
-        """
-        file_util = FileUtil()
-        path = await file_util.save_uploaded_file(file=file, file_path=f"/reports/{str(self.report.uuid)}/")
-        documents = await file_util.load_file_as_documents(file_path=path)
-        logger.info(documents)
-        ids = await self.faiss_vector_retriever.add_documents(documents=documents, save_local=False)
-    
     async def embed_uploaded_files(self, files: List[UploadFile]):
         """
         Embed uploaded files.
@@ -895,10 +944,9 @@ class ReportFlowService(BaseService):
             files (List[UploadFile]): uploaded files
         """
         with ElapsedTimeLogger(f"Embedding custom files"):
-            for file in files:
-                await self.embed_uploaded_file(file)
-                
-            self.faiss_vector_retriever.db.save_local(self.faiss_vector_retriever.file_path)
+            # files are parsed concurrently, and their chunks embedded in shared batches and indexed at once
+            documents = await FileUtil().load_uploaded_files_as_documents(files=files, file_path=f"/reports/{str(self.report.uuid)}/")
+            await self.faiss_vector_retriever.add_documents(documents=documents, save_local=True)
                 
     async def chat_with_report(self, session_id: str) -> str:
         """
@@ -909,16 +957,7 @@ class ReportFlowService(BaseService):
             session_id (str): session_id to chat.
         """
         messages = await self.message_service.find_by_session_id(session_id)
-        chunks = []
-        for id in self.report.report_citations:
-            chunk = await self.chunk_service.find_chunk_by_id(id)
-            chunks.append(
-                {
-                    "content": chunk.content,
-                    "source": chunk.source,
-                    "id": str(chunk.uuid)
-                }
-            )
+        chunks = [await self.chunk_service.find_chunk_by_id(id) for id in self.report.report_citations]
             
         result = await self.azure_openai_client.ainvoke(
             name="chat-with-report",
@@ -926,9 +965,9 @@ class ReportFlowService(BaseService):
             messages=[
                 {
                     "role": "system",
-                    "content": ReportPrompts.chat_with_report_system_prompts(
+                    "content": await ReportPrompts.chat_with_report_system_prompts(
                         report_content=self.report.report_content,
-                        chunks=json.dumps(chunks),
+                        chunks=self.chunk_fragments.assemble(chunks, fields=("content", "source", "id")),
                         organization_name=self.tenant.name,
                         organization_information=self.tenant.org_info,
                         report_additional_information=self.report.report_additional_information,
@@ -953,36 +992,47 @@ class ReportFlowService(BaseService):
         
         return result
     
-    async def generate_report_from_chunks(self, chunks: List[ChunkModel], retrying = 0) -> ReportModel:
+    async def select_chunks(self, auto_select: bool = True, chunk_ids: List[UUID] = []) -> List[ChunkModel]:
+        """
+        Chunks to generate the report from.
+        
+        Parameters:
+        
+            auto_select (bool): If True, the web search chunks and internal search chunks of the report are used.
+                                If False, the chunks of chunk_ids are used. Default is True.
+            
+            chunk_ids (List[UUID]): chunks to use when auto_select is False. Default is [].
+        """
+        if auto_select:
+            internal_chunks = await self.chunk_service.find_chunks_by_report_id_and_type(report_id=self.report.uuid, type=ChunkTypeEnum.INTERNAL.value)
+            web_chunks = await self.chunk_service.find_chunks_by_report_id_and_type(report_id=self.report.uuid, type=ChunkTypeEnum.WEB.value)
+            return web_chunks + internal_chunks
+        return [await self.chunk_service.find_chunk_by_id(id=id) for id in chunk_ids]
+    
+    async def generate_report_from_chunks(self, chunks: List[ChunkModel]) -> ReportModel:
         """
         Generate report from chunks.
-        It will retry up to 5 times until it returns vaild report.
+        Malformed JSON is repaired locally, and the generation is retried with backoff up to LLM_RETRY_MAX_ATTEMPTS times.
         
         Parameters:
         
             chunks (List[ChunkModel]): chunks to use
             
-            retrying (int): number of retried counts(not using outside)
-            
         """
+        logger.info("Inside generate report service")
         try:
-            logger.info("Inside generate report service")
-            result = await self.azure_openai_client.ainvoke(
+            result = await self.azure_openai_client.ainvoke_json(
                 name="generate-report",
+                cache=True,
+                batch=self.batch_mode,
                 response_format={"type": "json_object"},
                 temperature=0,
                 timeout=45,
                 messages=[
                     {
                         "role": "user",
-                        "content":  ReportPrompts.generate_report_prompts(
-                            chunks=[
-                                {
-                                    "id": str(chunk.uuid),
-                                    "content": chunk.content
-                                }
-                                for chunk in chunks
-                            ],
+                        "content":  await ReportPrompts.generate_report_prompts(
+                            chunks=self.chunk_fragments.assemble(chunks),
                             organization_name=self.tenant.name,
                             organization_information=self.tenant.org_info,
                             report_additional_information=self.report.report_additional_information,
@@ -992,35 +1042,44 @@ class ReportFlowService(BaseService):
                     }
                 ]
             )
-            
-            result = json.loads(result)
-                 
-            final_results = StringUtil.extract_chunks_and_content(result['content'])
-            
-            await self.report.update(
-                self.db_session,
-                chunk_ids=[ str(chunk.uuid) for chunk in chunks ],
-                report_content=result['content'],
-                report_citations=[ id for id in final_results['citations']]
-            )
-            return self.report
         except Exception as e:
-            logger.error(f"tried {retrying + 1}, but failed: {e}")
-            
-            if retrying < 5:
-                logger.info(f"Trying again")
-                await self.generate_report_from_chunks(chunks, retrying + 1)
-            else:
-                return self.report
+            logger.error(f"failed to generate report: {e}")
+            return self.report
+        
+        final_results = StringUtil.extract_chunks_and_content(result['content'])
+        
+        await self.report.update(
+            self.db_session,
+            chunk_ids=[ str(chunk.uuid) for chunk in chunks ],
+            report_content=result['content'],
+            report_citations=[ id for id in final_results['citations']]
+        )
+        return self.report
     
-    async def initiate_research(self, report_conf: dict = {}, files: List[UploadFile] = [], urls: List[str] = [], config: dict = {}) -> InitiateResearchResponseModel:
+    async def initiate_research(
+        self,
+        report_conf: dict = {},
+        files: List[UploadFile] = [],
+        urls: List[str] = [],
+        config: dict = {},
+        deadline: Optional[float] = None
+    ) -> InitiateResearchResponseModel:
         """
         Initiate internal research and web research.
         It creates a new Report.
         
+        The internal, web, file and url pipelines run concurrently until the research deadline. Each pipeline
+        cancels its searches still running RESEARCH_SCORING_RESERVE seconds before the deadline and scores the
+        results of the finished ones. Pipelines still running at the deadline are cancelled, and the chunks of the
+        finished ones are returned. Pipelines that timed out or failed are listed in `research_chunks.timed_out`
+        and `research_chunks.failed`.
+        
         Parameters:
         
             config (dict): report generation related configuration object.
+            
+            deadline (Optional[float]): research deadline in seconds, counted from the start of the pipelines.
+                                        Default is config['deadline'] or RESEARCH_DEADLINE.
 
             report_conf (dict): report generation params.
             
@@ -1033,7 +1092,11 @@ class ReportFlowService(BaseService):
                 }
         """
         
-        self.report = await self.report_service.add_report(ReportModel(**report_conf))  
+        config = {**config}
+        deadline = deadline or config.pop('deadline', None) or self.settings.RESEARCH_DEADLINE
+        
+        self.report = await self.report_service.add_report(ReportModel(**report_conf))
+        set_usage_context(report_id=self.report.uuid)  
         
         # Initialize required components  
         urls = StringUtil.extract_urls(self.report.report_additional_information)  
@@ -1041,7 +1104,8 @@ class ReportFlowService(BaseService):
             file_path=str(self.report.uuid),
             langfuse_trace=self.langfuse_trace
         )
-        self.langfuse_trace.update(metadata={"reportID": str(self.report.uuid)})  
+        if self.langfuse_trace:
+            self.langfuse_trace.update(metadata={"reportID": str(self.report.uuid)})  
         
         # Embed uploaded files if provided  
         if files:  
@@ -1071,36 +1135,58 @@ class ReportFlowService(BaseService):
         }  
         
         # Create tasks dynamically from the available types  
-        tasks = []  
-        task_index_map = {}  
-        current_index = 0  
-        
+        # the pipelines stop their searches early enough to score what they found before the deadline
+        self.research_deadline_at = time.monotonic() + deadline
+        tasks = {}  
         for key, method_params in task_methods.items():  
             if method_params:  
                 method, params = method_params  
-                tasks.append(method(**params))  
-                task_index_map[key] = current_index  
-                current_index += 1  
+                tasks[key] = asyncio.create_task(method(**params))  
         
-        logger.info("Running tasks")  
-        results = await asyncio.gather(*tasks)  
+        logger.info(f"Running tasks with a deadline of {deadline}s")  
+        try:
+            _, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        except asyncio.CancelledError:
+            # the request was cancelled, do not leave the pipelines running
+            for task in tasks.values():
+                task.cancel()
+            raise
+        finally:
+            self.research_deadline_at = None
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        
+        results = {}
+        timed_out = []
+        failed = []
+        for key, task in tasks.items():
+            if task in pending:
+                timed_out.append(key)
+            elif task.exception():
+                logger.error(f"error in {key} research: {task.exception()!r}")
+                failed.append(key)
+            else:
+                results[key] = task.result()
+        if timed_out:
+            logger.warning(f"Research deadline of {deadline}s passed, cancelled {timed_out}")
+            MetricsRegistry().incr("research_timeouts", len(timed_out))
         
         # Save the chunks from results  
-        for result_set in results:  
+        for result_set in results.values():  
             for chunk in result_set:  
                 await self.chunk_service.add_chunk(chunk)  
         
         # Build the response  
         response_chunks = ResearchResponseModel(  
-            internal=[ChunkResponseModel(**result.model_dump()) for result in results[task_index_map['internal']]],  
-            web=[ChunkResponseModel(**result.model_dump()) for result in results[task_index_map['web']]]  
+            **{
+                key: [ChunkResponseModel(**result.model_dump()) for result in result_set]
+                for key, result_set in results.items()
+            },
+            timed_out=timed_out,
+            failed=failed
         )  
         
-        if 'file' in task_index_map:  
-            response_chunks.file = [ChunkResponseModel(**result.model_dump()) for result in results[task_index_map['file']]]  
-        if 'url' in task_index_map:  
-            response_chunks.url = [ChunkResponseModel(**result.model_dump()) for result in results[task_index_map['url']]]  
-        
         response = InitiateResearchResponseModel(  
             research_chunks=response_chunks,  
             report_id=self.report.uuid  
@@ -1119,23 +1205,34 @@ class ReportFlowService(BaseService):
         Returns:
             sections (List): array of sections generated by openai
         """
+        return [section async for section in self.stream_template(section_count=section_count, **kwargs)]
+    
+    async def stream_template(self, section_count: int = 4, **kwargs):
+        """
+        Stream the outline sections generated by openai, each one as soon as the model has finished it.
         
-        result = await self.azure_openai_client.ainvoke(
+        Parameters:
+            section_count (int): number of sections to generate. default to 4.
+
+        Returns:
+            sections (AsyncGenerator): sections generated by openai
+        """
+        async for section in self.azure_openai_client.astream_json(
+            key="outlines",
             model=self.settings.FAST_LLM_MODEL,
             name="generate-template-queries",
+            cache=True,
             timeout=45,
             response_format={"type": "json_object"},
             messages=[
                 {
                     "role": "user",
-                    "content":  ReportPrompts.get_template_queries(count=section_count, **kwargs)
+                    "content":  await ReportPrompts.get_template_queries(count=section_count, **kwargs)
                 }
             ]
-        )
-        result = json.loads(result)
-        for section in result['outlines']:
+        ):
             section['research'] = True
-        return result['outlines']
+            yield section
     
     async def generate_section_chunks(self, section: dict) -> List[ChunkModel]:
         """
@@ -1208,23 +1305,18 @@ class ReportFlowService(BaseService):
         section_content = ""
         if section['research'] == True:
             chunks = await self.generate_section_chunks(section)
-            section_content = await self.azure_openai_client.ainvoke(
+            result = await self.azure_openai_client.ainvoke_json(
                 model=self.settings.FAST_LLM_MODEL,
                 name="generate-section-content",
+                batch=self.batch_mode,
                 temperature=0,
                 timeout=45,
                 response_format={"type": "json_object"},
                 messages=[
                     {
                         "role": "user",
-                        "content":  ReportPrompts.generate_section_content_prompts(
-                            chunks=[
-                                {
-                                    "id": str(chunk.uuid),
-                                    "content": chunk.content
-                                }
-                                for chunk in chunks
-                            ],
+                        "content":  await ReportPrompts.generate_section_content_prompts(
+                            chunks=self.chunk_fragments.assemble(chunks),
                             organization_name=self.tenant.name,
                             organization_information=self.tenant.org_info,
                             report_additional_information=self.report.report_additional_information,
@@ -1236,6 +1328,7 @@ class ReportFlowService(BaseService):
                     }
                 ]
             )
+            section_content = result['content']
         return section_content
 
     async def generate_report_v2(self, report_conf : dict, files: List[UploadFile]):
@@ -1276,10 +1369,30 @@ class ReportFlowService(BaseService):
             report (str): final report plain text
         """
         self.files = files
+        self.report = await self.report_service.add_report(ReportModel(**report_conf))
+        set_usage_context(report_id=self.report.uuid)
+        
+        # Embed uploaded files if provided
+        if files:
+            await self.embed_uploaded_files(files=files)
+
+        # Start researching each generated section as soon as it is streamed, instead of waiting for the whole outline
         if not report_conf['outline']:
-            outline = await self.generate_template(**report_conf)
+            outline = []
+            tasks = []
+            try:
+                async for section in self.stream_template(**report_conf):
+                    outline.append(section)
+                    tasks.append(asyncio.create_task(self.generate_section(section)))
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
         else:
             outline = json.loads(report_conf['outline'])
+            tasks = [
+                self.generate_section(section) for section in outline
+            ]
         
         template = {
             "objective": report_conf["report_objective"],
@@ -1288,29 +1401,21 @@ class ReportFlowService(BaseService):
             "outline": outline
         }
         
-        self.report = await self.report_service.add_report(ReportModel(**report_conf))
-        
-        # Embed uploaded files if provided
-        if files:
-            await self.embed_uploaded_files(files=files)
-
-        tasks = [
-            self.generate_section(section) for section in template['outline']
-        ]
         sections = await asyncio.gather(*tasks)
 
         for chunk in self.chunks:
             chunk = await self.chunk_service.add_chunk(chunk)
 
         for index, section in enumerate(sections):
-            template['outline'][index]['content'] = "" if section == "" else json.loads(section)['content']
+            template['outline'][index]['content'] = section
         
         if not report_conf['outline']:
             template['outline'].insert(0, {"title": "Introduction", "description":"", "content":"", "research":False})
             template['outline'].append({"title": "Conclusion", "description":"", "content":"", "research":False})
 
-        return await self.azure_openai_client.ainvoke(
+        return await self.azure_openai_client.ainvoke_json(
             name="review-sections",
+            batch=self.batch_mode,
             model=self.settings.FAST_LLM_MODEL,
             temperature=0,
             timeout=45,
@@ -1318,7 +1423,7 @@ class ReportFlowService(BaseService):
             messages=[
                 {
                     "role": "user",
-                    "content":  ReportPrompts.review_sections(
+                    "content":  await ReportPrompts.review_sections(
                         organization_name=self.tenant.name,
                         organization_information=self.tenant.org_info,
                         report_additional_information=self.report.report_additional_information,
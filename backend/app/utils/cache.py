@@ -0,0 +1,188 @@
+import time
+import asyncio
+from threading import Lock
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+from dataclasses import dataclass
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    stored_at: float
+    expires_at: float
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache with per-entry TTL.
+
+    Attributes:
+
+        max_size (int): maximum number of entries. Least recently used entries are evicted first.
+
+        ttl (float): default time to live in seconds.
+
+    Example:
+        >>> cache = TTLCache(max_size=1024, ttl=300)
+        >>> cache.set("key", {"value": 1})
+        >>> cache.get("key")
+        {'value': 1}
+    """
+    def __init__(self, max_size: int = 1024, ttl: float = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = Lock()
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+
+    def get_entry(self, key: Hashable, allow_expired: bool = False) -> Optional[CacheEntry]:
+        """
+        Get the cache entry for the key.
+
+        Parameters:
+
+            key (Hashable): cache key.
+
+            allow_expired (bool): return expired entries instead of dropping them. Used for stale-while-revalidate.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expired and not allow_expired:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return entry.value if entry else default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = CacheEntry(
+                value=value,
+                stored_at=now,
+                expires_at=now + (self.ttl if ttl is None else ttl)
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """
+        Remove entries. If predicate is given, only keys matching it are removed.
+
+        Returns:
+
+            int: number of removed entries.
+        """
+        with self._lock:
+            if predicate is None:
+                count = len(self._entries)
+                self._entries.clear()
+                return count
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SingleFlight:
+    """
+    Runs one call per key for all concurrent callers in the event loop.
+
+    The first caller of a key (the leader) runs the call, later callers wait for its result. An exception of the
+    call is raised to every caller. If the leader is cancelled (e.g. by a timeout or a research deadline), the
+    waiters are not cancelled with it: one of them takes over and runs the call again.
+
+    Example:
+        >>> flight = SingleFlight()
+        >>> vector = await flight.do("query", lambda: embeddings.aembed_query("query"))
+        >>> texts = await flight.do_many(urls, lambda missing: fetch_texts(missing))
+    """
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `call` once for all concurrent callers of the key.
+        """
+        async def call_many(keys: List[Hashable]) -> Dict[Hashable, Any]:
+            return {key: await call()}
+
+        return (await self.do_many([key], call_many))[key]
+
+    async def do_many(self, keys: List[Hashable], call: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]) -> Dict[Hashable, Any]:
+        """
+        Run `call` once with the keys that are not in flight yet, and wait for the others.
+
+        Parameters:
+
+            keys (List[Hashable]): keys to resolve.
+
+            call (Callable): called with the keys this caller leads, returns a value per key (missing keys are None).
+
+        Returns:
+
+            Dict[Hashable, Any]: value per key.
+        """
+        keys = list(dict.fromkeys(keys))
+        waiting = {key: self._inflight[key] for key in keys if key in self._inflight}
+        leading = [key for key in keys if key not in waiting]
+        results = {}
+
+        if leading:
+            loop = asyncio.get_running_loop()
+            futures = {key: loop.create_future() for key in leading}
+            self._inflight.update(futures)
+            try:
+                values = await call(leading)
+            except Exception as e:
+                for future in futures.values():
+                    future.set_exception(e)
+                    # retrieve the exception so that it is not reported as never retrieved when nobody waits on it
+                    future.exception()
+                raise
+            except BaseException:
+                # the leader was cancelled, waiters take over
+                for future in futures.values():
+                    future.cancel()
+                raise
+            else:
+                for key, future in futures.items():
+                    future.set_result(values.get(key))
+                    results[key] = values.get(key)
+            finally:
+                for key, future in futures.items():
+                    if self._inflight.get(key) is future:
+                        del self._inflight[key]
+
+        for key, future in waiting.items():
+            try:
+                results[key] = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    # this caller was cancelled
+                    raise
+                results.update(await self.do_many([key], call))
+        return results
@@ -1,10 +1,16 @@
+import json
+import asyncio
 import aiohttp
-from typing import List, Optional
+from typing import List, Optional, Dict
 from datetime import datetime
 from pydantic import BaseModel
-from app.config import get_settings
+from app.config import Settings, get_settings
+from app.utils.cache import TTLCache, SingleFlight
+from app.utils.metrics import MetricsRegistry
+from app.utils.singleton import SingletonMeta
 from app.utils.logging import AppLogger
-from app.utils.langfuse_client import StatefulTraceClient
+from app.utils.tracing import TraceHandle
+from app.utils.retriever import ProviderGuardRegistry
 
 logger = AppLogger().get_logger()
 
@@ -12,21 +18,112 @@ class ExaGetContentResponse(BaseModel):
     url: str
     highlight: str
 
+
+class ExaClientPool(metaclass=SingletonMeta):
+    """
+    Process-wide state of the Exa client: one long-lived aiohttp session with a bounded connection pool and
+    timeouts, and the coalescing of contents requests.
+
+    - Identical contents requests (same URLs and options) that run concurrently share one call, and their
+      responses are kept for EXA_CONTENTS_CACHE_TTL seconds.
+
+    - Page texts are cached per URL. Concurrent text requests for overlapping URL sets fetch each URL only once.
+    """
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or get_settings()
+        self.metrics = MetricsRegistry()
+        self.contents_cache = TTLCache(max_size=self.settings.EXA_CONTENTS_CACHE_SIZE, ttl=self.settings.EXA_CONTENTS_CACHE_TTL)
+        self.text_cache = TTLCache(max_size=self.settings.EXA_CONTENTS_CACHE_SIZE, ttl=self.settings.EXA_CONTENTS_CACHE_TTL)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight = SingleFlight()
+        self._inflight_texts = SingleFlight()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        # aiohttp sessions are bound to the event loop they were created in
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session_loop = loop
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.settings.EXA_MAX_CONNECTIONS, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.settings.EXA_TIMEOUT),
+                headers={
+                    "accept": "application/json",
+                    "content-type": "application/json",
+                    "x-api-key": self.settings.EXA_API_KEY
+                }
+            )
+        return self._session
+
+    async def post(self, path: str, payload: dict) -> dict:
+        async with self.session.post(f"{self.settings.EXA_API_URL}{path}", json=payload) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def get_contents(self, payload: dict) -> dict:
+        key = json.dumps(payload, sort_keys=True, default=str)
+        response = self.contents_cache.get(key)
+        if response is not None:
+            self.metrics.incr("exa_cache_hits")
+            return response
+
+        async def call():
+            response = await self.post("/contents", payload)
+            self.contents_cache.set(key, response)
+            return response
+
+        if key in self._inflight:
+            self.metrics.incr("exa_coalesced")
+        return await self._inflight.do(key, call)
+
+    async def get_texts(self, urls: List[str]) -> Dict[str, str]:
+        urls = list(dict.fromkeys(urls))
+        texts = {}
+        missing = []
+        for url in urls:
+            text = self.text_cache.get(url)
+            if text is not None:
+                texts[url] = text
+            else:
+                if url in self._inflight_texts:
+                    self.metrics.incr("exa_coalesced")
+                missing.append(url)
+
+        async def call(urls: List[str]) -> Dict[str, str]:
+            response = await self.post("/contents", {"ids": urls, "text": True})
+            fetched = {result["id"]: result.get("text") or "" for result in response.get("results", [])}
+            for url, text in fetched.items():
+                if text:
+                    self.text_cache.set(url, text)
+            return {url: fetched.get(url, "") for url in urls}
+
+        if missing:
+            texts.update(await self._inflight_texts.do_many(missing, call))
+        return texts
+
+    async def aclose(self):
+        """
+        Close the session. Called on server shutdown.
+        """
+        if self._session and not self._session.closed:
+            await self._session.close()
+            logger.info("Closed Exa session")
+        self._session = None
+
+
 class ExaClient:
     """
     ** This client didn't use Exa python sdk because it does not support async. **
     """
+    provider = "exa"
+
     def __init__(
         self, 
-        langfuse_trace: Optional[StatefulTraceClient] = None
+        langfuse_trace: Optional[TraceHandle] = None
     ):
         self.settings = get_settings()
-        self.api_url = "https://api.exa.ai/contents"
-        self.api_headers = {  
-            "accept": "application/json",  
-            "content-type": "application/json",  
-            "x-api-key": self.settings.EXA_API_KEY
-        }
+        self.pool = ExaClientPool()
         self.langfuse_trace = langfuse_trace
     
     async def get_contents(
@@ -43,25 +140,86 @@ class ExaClient:
                 },
                 start_time=datetime.now()
             )
-        async with aiohttp.ClientSession() as session:  
-            async with session.post(self.api_url, json={'text': False, **kwargs}, headers=self.api_headers) as response:  
-                response_data = await response.json()
-                if langfuse_span:
-                    langfuse_span.update(
-                        output=response_data,
-                        end_time=datetime.now()
-                    )
-                results = response_data['results']
-                exa_response = []
-                for result in results:
-                    exa_response.extend(
-                        [
-                            ExaGetContentResponse(
-                                url=result['id'],
-                                highlight=highlight
-                            )
-                            for highlight in result['highlights']
-                        ]
+        
+        if "ids" in kwargs:
+            # the same URL set in any order is one request
+            kwargs["ids"] = sorted(set(kwargs["ids"]))
+        response_data = await self.pool.get_contents({'text': False, **kwargs})
+        
+        exa_response = []
+        for result in response_data['results']:
+            exa_response.extend(
+                [
+                    ExaGetContentResponse(
+                        url=result['id'],
+                        highlight=highlight
                     )
-                
-                return exa_response
\ No newline at end of file
+                    for highlight in result['highlights']
+                ]
+            )
+        
+        if langfuse_span:
+            langfuse_span.update(
+                output=exa_response,
+                end_time=datetime.now()
+            )
+        
+        return exa_response
+    
+    async def aretrieve(self, query: str, top: int = 5, urls: Optional[List[str]] = None, num_sentences: int = 3, **kwargs) -> List[ExaGetContentResponse]:
+        """
+        AsyncRetriever interface: highlights of the URLs for the query, under the Exa provider guard.
+        
+        Parameters:
+        
+            query (str): highlight query.
+            
+            top (int): highlights per URL. Default is 5.
+            
+            urls (Optional[List[str]]): URLs to search through.
+            
+            num_sentences (int): sentences per highlight. Default is 3.
+        """
+        return await ProviderGuardRegistry().get(self.provider).run(
+            lambda: self.get_contents(
+                ids=urls or [],
+                highlights={
+                    "query": query,
+                    "highlightsPerUrl": top,
+                    "numSentences": num_sentences
+                },
+                **kwargs
+            ),
+            name="contents"
+        )
+    
+    async def get_texts(self, urls: List[str]) -> Dict[str, str]:
+        """
+        Get the page text of each URL, fetched once per URL and cached.
+        
+        Parameters:
+        
+            urls (List[str]): page URLs.
+            
+        Returns:
+        
+            Dict[str, str]: URL to page text. The text is empty when Exa could not fetch the page.
+        """
+        langfuse_span = None
+        
+        if self.langfuse_trace:
+            langfuse_span = self.langfuse_trace.span(
+                name="exa-get-texts",
+                input={"urls": urls},
+                start_time=datetime.now()
+            )
+        
+        texts = await self.pool.get_texts(urls)
+        
+        if langfuse_span:
+            langfuse_span.update(
+                output={url: len(text) for url, text in texts.items()},
+                end_time=datetime.now()
+            )
+        
+        return texts
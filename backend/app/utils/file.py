@@ -1,8 +1,10 @@
 import os
 import uuid
+import asyncio
 from typing import List
 from fastapi import UploadFile
 from langchain_community.document_loaders import PyPDFLoader, TextLoader, UnstructuredWordDocumentLoader, UnstructuredPowerPointLoader
+from app.config import get_settings
 from .string import StringUtil
 
 class FileUtil:
@@ -62,4 +64,28 @@ class FileUtil:
         with open(file_path + file_name, "wb") as f:
             contents = await file.read()  
             f.write(contents)
-        return file_path + file_name
\ No newline at end of file
+        return file_path + file_name
+
+    async def load_uploaded_files_as_documents(self, files: List[UploadFile], file_path="") -> List:
+        """
+        Save and parse uploaded files concurrently, at most FILE_PARSE_CONCURRENCY at a time.
+
+        Parameters:
+
+            files (List[UploadFile]): uploaded files.
+
+            file_path (str): folder to save the files to, under the path prefix.
+
+        Returns:
+
+            List: documents of all files, in the order of the files.
+        """
+        semaphore = asyncio.Semaphore(get_settings().FILE_PARSE_CONCURRENCY)
+
+        async def load(file: UploadFile) -> List:
+            async with semaphore:
+                path = await self.save_uploaded_file(file=file, file_path=file_path)
+                return await self.load_file_as_documents(file_path=path)
+
+        results = await asyncio.gather(*[load(file) for file in files])
+        return [document for documents in results for document in documents]
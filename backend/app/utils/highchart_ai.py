@@ -42,7 +42,7 @@ class HighChartAI:
             messages=[
                 {
                     "role": "system",
-                    "content": HighChartPrompts.highchart_generation_prompt()
+                    "content": await HighChartPrompts.highchart_generation_prompt()
                 },
                 {
                     "role": "user",
@@ -29,14 +29,7 @@ class ExaSearchTool(BaseTool):
     async def _arun(
         self, urls: List[str], query: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None
     ) -> str:
-        results = await self.exa_client.get_contents(
-                ids=urls,
-                highlights={
-                    "query": query,
-                    "highlightsPerUrl": 3, 
-                    "numSentences": 3
-                }
-            )
+        results = await self.exa_client.aretrieve(query=query, top=3, urls=urls)
         
         return [
             {
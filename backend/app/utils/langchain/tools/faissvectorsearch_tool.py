@@ -28,7 +28,7 @@ class FaissVectorSearchTool(BaseTool):
     async def _arun(
         self, query: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None
     ) -> str:
-        results = await self.retriever.asimilarity_search(query=query, k=self.cfg['top'])
+        results = await self.retriever.aretrieve(query=query, top=self.cfg['top'])
         
         return [
             {
@@ -16,6 +16,7 @@ class TavilySearchTool(BaseTool):
     name = "tavily_search_tool"
     description = "useful to search through web"
     args_schema: Type[BaseModel] = TavilySearchInput
+    tenant_id: Optional[str] = None
     cfg: dict = {
         'top': 1
     }
@@ -28,8 +29,13 @@ class TavilySearchTool(BaseTool):
     async def _arun(
         self, query: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None
     ) -> str:
-        tavily_client = TavilyClient()
-        results = await tavily_client.get_search_context(query=query, search_depth='advanced', max_results=self.cfg['top'])
+        # interactive path, so stale cached results are served while they are refreshed
+        results = await TavilyClient(tenant_id=self.tenant_id).aretrieve(
+            query=query,
+            top=self.cfg['top'],
+            search_depth='advanced',
+            stale_while_revalidate=True
+        )
         
         return [
             {
@@ -78,26 +78,17 @@ class LangFuseClient:
     
     def get_trace_from_args(self, args: Optional[Dict]):
         """
-        Get trace object from the given args.
-        If args contains "id", this function will fetch trace by that id and ignore other fields.
+        Get trace object from the given args, through the sampled, non-blocking TracingClient.
+        If args contains "id", the trace with that id is continued (without fetching it) and other fields are ignored.
         Otherwise, this function will create trace with the given args.
         
         Parameters:
 
             args (Optional[Dict]): config arguments for the trace.
         """
-        if args == None:
-            return None
-        
-        if "id" in args:
-            langfuse_trace = self.client.fetch_trace(
-                args["id"]
-            )
-        else:
-            langfuse_trace = self.client.trace(
-                **args
-            )
-        return langfuse_trace
+        # imported here to avoid a circular import
+        from app.utils.tracing import TracingClient
+        return TracingClient().start_trace(args=args)
 
     def get_prompt(self, **kwargs):
         if "label" not in kwargs:
@@ -0,0 +1,61 @@
+from threading import Lock
+from collections import defaultdict
+from typing import Dict
+from .singleton import SingletonMeta
+
+
+class MetricsRegistry(metaclass=SingletonMeta):
+    """
+    Process-wide in-memory metrics: counters, gauges and timers.
+
+    Labels are folded into the metric key, e.g. `llm_cache_hits{tier=memory}`. The metric name and value are
+    positional-only, so any label name can be used, including `name`.
+
+    Example:
+        >>> metrics = MetricsRegistry()
+        >>> metrics.incr("llm_cache_hits", tier="memory")
+        >>> metrics.observe("llm_latency_seconds", 1.2, name="score-chunks")
+        >>> metrics.snapshot()
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._timers: Dict[str, Dict[str, float]] = {}
+
+    def __key__(self, name: str, labels: dict) -> str:
+        if not labels:
+            return name
+        return name + "{" + ",".join(f"{k}={v}" for k, v in sorted(labels.items())) + "}"
+
+    def incr(self, name: str, value: float = 1, /, **labels):
+        key = self.__key__(name, labels)
+        with self._lock:
+            self._counters[key] += value
+
+    def set_gauge(self, name: str, value: float, /, **labels):
+        key = self.__key__(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, seconds: float, /, **labels):
+        key = self.__key__(name, labels)
+        with self._lock:
+            timer = self._timers.setdefault(key, {"count": 0, "total": 0.0, "max": 0.0})
+            timer["count"] += 1
+            timer["total"] += seconds
+            timer["max"] = max(timer["max"], seconds)
+
+    def get_counter(self, name: str, /, **labels) -> float:
+        return self._counters.get(self.__key__(name, labels), 0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timers": {
+                    key: {**timer, "avg": timer["total"] / timer["count"] if timer["count"] else 0.0}
+                    for key, timer in self._timers.items()
+                },
+            }
@@ -1 +1,2 @@
-from .azureopenai_client import AzureOpenAIClient
\ No newline at end of file
+from .azureopenai_client import AzureOpenAIClient
+from .client_registry import AzureOpenAIClientRegistry
\ No newline at end of file
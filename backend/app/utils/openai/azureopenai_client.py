@@ -1,9 +1,24 @@
+import json
+import time
+import json_repair
+import asyncio
+import openai
 from typing import Optional
 from datetime import datetime
-from openai import AsyncAzureOpenAI
 from app.config import Settings, get_settings
 from app.utils.logging import AppLogger, ElapsedTimeLogger
-from app.utils.langfuse_client import StatefulTraceClient
+from app.utils.tracing import TraceHandle
+from .client_registry import AzureOpenAIClientRegistry
+from .response_cache import LLMResponseCache
+from .rate_limiter import LLMRateLimiterRegistry, estimate_tokens, parse_retry_after
+from .load_balancer import AzureOpenAILoadBalancer
+from .hedging import LatencyTracker
+from .json_stream import JsonArrayStreamParser
+from .usage import LLMUsageLedger
+from .batch import LLMBatchExecutor
+from .retry import RetryPolicy
+from app.exceptions.llm_exceptions import LLMResponseParseError
+from openai.types.chat import ChatCompletion
 
 
 logger = AppLogger().get_logger()
@@ -13,33 +28,54 @@ class AzureOpenAIClient:
     """
     AzureOpenAI Async Client
     
+    Clients are pooled process-wide by AzureOpenAIClientRegistry, so creating this object is cheap.
+    
     Arguments:
     
         settings (Settings): configuration variables. By default, it loads configuration variables from environment variables.
         
-        langfuse_trace (Optional[StatefulTraceClient]): LangFuse trace.
+        langfuse_trace (Optional[TraceHandle]): LangFuse trace.
     """
     def __init__(
         self,
-        langfuse_trace: Optional[StatefulTraceClient] = None,
+        langfuse_trace: Optional[TraceHandle] = None,
         settings: Settings = get_settings()
     ):
         self.settings = settings
-        self.client = AsyncAzureOpenAI(
-            azure_endpoint=self.settings.AZURE_OPENAI_ENDPOINT,
-            api_key=self.settings.AZURE_OPENAI_API_KEY,
-            api_version=self.settings.AZURE_OPENAI_API_VERSION,
-        )
+        self.registry = AzureOpenAIClientRegistry()
+        self.response_cache = LLMResponseCache()
+        self.rate_limiters = LLMRateLimiterRegistry()
+        self.latency_tracker = LatencyTracker()
+        self.load_balancer = AzureOpenAILoadBalancer()
+        self.usage_ledger = LLMUsageLedger()
+        # set when the tenant is close to its budget: smart model calls are served by the fast model, without hedging
+        self.economy_mode = False
         
         self.langfuse_trace = langfuse_trace
 
-    async def ainvoke(self, name: Optional[str] = None, **kwargs):
+    async def ainvoke(self, name: Optional[str] = None, cache: bool = False, hedge: bool = False, batch: bool = False, **kwargs):
         """
         name (str): used for logging and langfuse trace.
+        
+        cache (bool): opt in to the response cache for this call. Default is False.
+                      Identical (model, messages, response_format, temperature) requests are served from cache
+                      while LLM_CACHE_ENABLED is on.
+        
+        hedge (bool): opt in to request hedging. If the call takes longer than LLM_HEDGE_PERCENTILE of the observed
+                      latency for this name, a duplicate request is sent and the first response wins. Default is False.
+        
+        batch (bool): send the request through the offline batch executor instead of the real-time quota.
+                      Only for non-interactive jobs, the call returns when the whole batch has finished. Default is False.
         """
         with ElapsedTimeLogger("Azure openai invoking" + f": {name}" if name else ""):
-            if "model" not in kwargs:
-                kwargs["model"] = self.settings.SMART_LLM_MODEL
+            self.__apply_economy_mode__(kwargs)
+
+            cache_key = self.__cache_key__(kwargs) if cache else None
+            if cache_key:
+                cached = await self.response_cache.get(cache_key, name=name)
+                if cached is not None:
+                    logger.info(f"Azure openai cache hit: {name}")
+                    return cached
 
             start_time = datetime.now()
             
@@ -51,7 +87,12 @@ class AzureOpenAIClient:
                     start_time=start_time
                 )
                 
-            response = await self.client.chat.completions.create(**kwargs)
+            if batch:
+                response = await self.__create_batch_completion__(name=name, **kwargs)
+            elif hedge and self.settings.LLM_HEDGE_ENABLED and not self.economy_mode:
+                response = await self.__create_hedged_completion__(name=name, **kwargs)
+            else:
+                response = await self.__create_completion__(name=name, **kwargs)
             end_time = datetime.now()
             
             if self.langfuse_trace:
@@ -61,16 +102,303 @@ class AzureOpenAIClient:
                     end_time=end_time,
                 )
             
-            return response.choices[0].message.content
+            content = response.choices[0].message.content
+            if cache_key and self.__is_cacheable__(content, kwargs.get("response_format")):
+                await self.response_cache.set(cache_key, content, model=kwargs["model"], name=name)
+            
+            return content
+
+    async def ainvoke_json(self, name: Optional[str] = None, retry_policy: Optional[RetryPolicy] = None, **kwargs) -> dict:
+        """
+        Invoke a json_object completion and parse it.
+        
+        Malformed JSON (typically trailing garbage or a truncated tail) is repaired locally first; the call is only
+        re-invoked when the completion cannot be repaired. Timeouts, throttling and server errors are retried
+        with backoff by the retry policy.
+        
+        Parameters:
+        
+            name (str): used for logging and langfuse trace.
+            
+            retry_policy (Optional[RetryPolicy]): retry policy. Default is RetryPolicy().
+            
+            kwargs: ainvoke arguments. response_format defaults to json_object.
+        
+        Returns:
+        
+            dict: parsed completion.
+        """
+        kwargs.setdefault("response_format", {"type": "json_object"})
+        
+        async def invoke():
+            return self.parse_json(await self.ainvoke(name=name, **kwargs), name=name)
+        
+        return await (retry_policy or RetryPolicy()).run(invoke, name=name)
+
+    def parse_json(self, content: Optional[str], name: Optional[str] = None) -> dict:
+        """
+        Parse a json_object completion, repairing it locally if needed.
+        
+        Raises:
+        
+            LLMResponseParseError: if the completion is not a JSON object even after repair.
+        """
+        try:
+            return json.loads(content)
+        except (TypeError, ValueError):
+            pass
+        
+        repaired = json_repair.loads(content or "")
+        if not isinstance(repaired, dict) or not repaired:
+            raise LLMResponseParseError(name=name or "", content=content or "")
+        logger.warning(f"Azure openai repaired malformed json: {name}")
+        return repaired
+
+    async def __create_completion__(self, name: Optional[str] = None, stream: bool = False, **kwargs):
+        """
+        Send one chat completion request through the load balancer and the deployment's rate limiter.
+        
+        Endpoints are tried in the order given by AzureOpenAILoadBalancer. On throttling, timeouts, connection
+        errors and 5xx the request spills over to the next endpoint; other errors are raised immediately.
+        
+        When stream is True, the opened stream is returned together with the rate limiter slot,
+        which the caller must close once the stream is consumed.
+        """
+        model = kwargs.pop("model")
+        estimated_tokens = estimate_tokens(kwargs.get("messages"), kwargs.get("max_tokens"))
+        candidates = self.load_balancer.candidates(model)
+        if not candidates:
+            raise ValueError(f"No Azure openai endpoint serves model {model}")
+        last_error = None
+        
+        for index, endpoint in enumerate(candidates):
+            client = self.registry.get_client(
+                model=model,
+                endpoint=endpoint.endpoint,
+                api_key=endpoint.api_key,
+                api_version=endpoint.api_version
+            )
+            if index < len(candidates) - 1:
+                # spill over right away instead of waiting in the SDK's own retries
+                client = client.with_options(max_retries=0)
+            
+            rate_limiter = self.rate_limiters.get(endpoint.deployment_for(model), endpoint=endpoint.host)
+            slot = rate_limiter.slot(estimated_tokens)
+            await slot.__aenter__()
+            try:
+                start = time.monotonic()
+                response = await client.chat.completions.create(model=endpoint.deployment_for(model), stream=stream, **kwargs)
+                latency = time.monotonic() - start
+            except openai.RateLimitError as e:
+                await slot.__aexit__(type(e), e, e.__traceback__)
+                self.load_balancer.record_throttle(endpoint, model, parse_retry_after(e.response.headers))
+                last_error = e
+                continue
+            except (openai.APIConnectionError, openai.InternalServerError) as e:
+                await slot.__aexit__(type(e), e, e.__traceback__)
+                self.load_balancer.record_failure(endpoint, model)
+                last_error = e
+                continue
+            except BaseException as e:
+                await slot.__aexit__(type(e), e, e.__traceback__)
+                raise
+            
+            self.load_balancer.record_success(endpoint, model, latency)
+            if stream:
+                return response, slot
+            
+            await slot.__aexit__(None, None, None)
+            self.latency_tracker.record(name, latency)
+            rate_limiter.record_usage(estimated_tokens, response.usage.total_tokens if response.usage else None)
+            if response.usage:
+                self.usage_ledger.record(
+                    model=model,
+                    kind="chat",
+                    prompt_tokens=response.usage.prompt_tokens,
+                    completion_tokens=response.usage.completion_tokens,
+                    latency=latency,
+                    name=name
+                )
+            return response
+        
+        raise last_error
 
-    async def astream(self, **kwargs):
+    async def __create_batch_completion__(self, name: Optional[str] = None, **kwargs) -> ChatCompletion:
+        """
+        Run the request as part of a batch job, falling back to the real-time path if it fails.
+        """
+        try:
+            response = ChatCompletion.model_validate(await LLMBatchExecutor().submit(**kwargs))
+        except Exception as e:
+            if not self.settings.LLM_BATCH_FALLBACK_REALTIME:
+                raise
+            logger.warning(f"Azure openai batch request failed, falling back to real-time: {name}: {e}")
+            return await self.__create_completion__(name=name, **kwargs)
+        
+        if response.usage:
+            self.usage_ledger.record(
+                model=self.settings.LLM_BATCH_DEPLOYMENTS.get(kwargs["model"], kwargs["model"]),
+                kind="batch",
+                prompt_tokens=response.usage.prompt_tokens,
+                completion_tokens=response.usage.completion_tokens,
+                name=name
+            )
+        return response
+
+    async def __create_hedged_completion__(self, name: Optional[str] = None, **kwargs):
+        """
+        Send the request, and if it has not finished after the hedge delay, send a duplicate.
+        The first successful response wins and the other request is cancelled.
+        """
+        primary = asyncio.create_task(self.__create_completion__(name=name, **kwargs))
+        tasks = {primary: "primary"}
+        # every wait is inside the try, so a cancelled caller never leaves a request (and its rate limit slot) behind
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.latency_tracker.hedge_delay(name))
+            if done:
+                return primary.result()
+
+            logger.info(f"Azure openai hedging: {name}")
+            self.latency_tracker.record_hedge(name)
+            hedged = asyncio.create_task(self.__create_completion__(name=name, **kwargs))
+            tasks[hedged] = "hedge"
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        self.latency_tracker.record_hedge(name, winner=tasks[task])
+                        return task.result()
+            # both requests failed, raise the first error that is not a cancellation
+            for task in tasks:
+                if not task.cancelled():
+                    raise task.exception()
+            return primary.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def __apply_economy_mode__(self, kwargs: dict):
         if "model" not in kwargs:
             kwargs["model"] = self.settings.SMART_LLM_MODEL
+        if self.economy_mode and kwargs["model"] == self.settings.SMART_LLM_MODEL:
+            kwargs["model"] = self.settings.FAST_LLM_MODEL
 
-        stream = await self.client.chat.completions.create(**kwargs, stream=True)
+    def __cache_key__(self, kwargs: dict) -> Optional[str]:
+        """
+        Response cache key of the request, or None while LLM_CACHE_ENABLED is off.
+        """
+        if not self.settings.LLM_CACHE_ENABLED:
+            return None
+        return LLMResponseCache.make_key(
+            model=kwargs["model"],
+            messages=kwargs.get("messages", []),
+            response_format=kwargs.get("response_format"),
+            temperature=kwargs.get("temperature")
+        )
 
-        async for chunk in stream:
-            if chunk.choices and len(chunk.choices) > 0:
-                content = chunk.choices[0].delta.content
-                if content:
-                    yield content
+    def __is_cacheable__(self, content: Optional[str], response_format: Optional[dict]) -> bool:
+        """
+        Never cache empty completions or json_object completions that do not parse.
+        """
+        if not content:
+            return False
+        if response_format and response_format.get("type") == "json_object":
+            try:
+                json.loads(content)
+            except ValueError:
+                return False
+        return True
+
+    async def astream(self, name: Optional[str] = None, **kwargs):
+        """
+        name (str): used for the usage ledger.
+        """
+        self.__apply_economy_mode__(kwargs)
+
+        start = time.monotonic()
+        stream, slot = await self.__create_completion__(name=name, stream=True, **kwargs)
+        error = None
+        characters = 0
+        try:
+            async for chunk in stream:
+                if chunk.choices and len(chunk.choices) > 0:
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        characters += len(content)
+                        yield content
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            await slot.__aexit__(type(error) if error else None, error, error.__traceback__ if error else None)
+            # streamed responses carry no usage, so tokens are estimated
+            self.usage_ledger.record(
+                model=kwargs["model"],
+                kind="chat",
+                prompt_tokens=estimate_tokens(kwargs.get("messages"), completion_tokens=0),
+                completion_tokens=characters // 4,
+                latency=time.monotonic() - start,
+                name=name,
+                estimated=True
+            )
+
+    async def astream_json(self, key: Optional[str] = None, name: Optional[str] = None, cache: bool = False, **kwargs):
+        """
+        Stream a json_object completion and yield the elements of one of its arrays as soon as each closes.
+        
+        Parameters:
+        
+            key (Optional[str]): top-level key of the array to stream, e.g. "outlines". If None, the whole
+                                 completion is expected to be an array.
+            
+            name (str): used for logging and langfuse trace.
+            
+            cache (bool): opt in to the response cache, like `ainvoke`. A cached completion is not streamed again,
+                          its elements are yielded at once. Default is False.
+        
+        Returns:
+        
+            AsyncGenerator: parsed array elements, in order.
+        """
+        with ElapsedTimeLogger("Azure openai streaming" + f": {name}" if name else ""):
+            self.__apply_economy_mode__(kwargs)
+            
+            cache_key = self.__cache_key__(kwargs) if cache else None
+            if cache_key:
+                cached = await self.response_cache.get(cache_key, name=name)
+                if cached is not None:
+                    logger.info(f"Azure openai cache hit: {name}")
+                    result = self.parse_json(cached, name=name)
+                    for element in (result.get(key, []) if key else result):
+                        yield element
+                    return
+            
+            if self.langfuse_trace:
+                generation = self.langfuse_trace.generation(
+                    name=name,
+                    model=kwargs["model"],
+                    input=kwargs['messages'],
+                    start_time=datetime.now()
+                )
+            
+            parser = JsonArrayStreamParser(key=key)
+            start = time.monotonic()
+            async for content in self.astream(name=name, **kwargs):
+                for element in parser.feed(content):
+                    yield element
+            self.latency_tracker.record(name, time.monotonic() - start)
+            
+            if self.langfuse_trace:
+                generation.update(output=parser.buffer, end_time=datetime.now())
+            
+            if cache_key and self.__is_cacheable__(parser.buffer, kwargs.get("response_format")):
+                await self.response_cache.set(cache_key, parser.buffer, model=kwargs["model"], name=name)
+            
+            if parser.emitted == 0 and not parser.done:
+                # the array was not where we expected it, fall back to parsing the whole completion
+                logger.warning(f"Azure openai streamed json has no array {key}: {name}")
+                result = self.parse_json(parser.buffer, name=name)
+                for element in (result.get(key, []) if key else result):
+                    yield element
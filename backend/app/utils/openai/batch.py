@@ -0,0 +1,217 @@
+import io
+import json
+import uuid
+import asyncio
+from pathlib import Path
+from typing import Optional, List, Dict, Callable
+from app.config import get_settings
+from app.utils.metrics import MetricsRegistry
+from app.utils.singleton import SingletonMeta
+from app.utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
+
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchResult:
+    """
+    Outcome of one request of a batch.
+
+    Attributes:
+
+        response (Optional[dict]): chat completion body, when the request succeeded.
+
+        error (Optional[str]): error message, when it failed.
+    """
+    def __init__(self, response: Optional[dict] = None, error: Optional[str] = None):
+        self.response = response
+        self.error = error
+
+
+def parse_batch_output(lines: List[str]) -> Dict[str, BatchResult]:
+    """
+    Map custom_id to result from the lines of a batch output (or error) file.
+    """
+    results = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        response = item.get("response") or {}
+        if response.get("status_code") == 200:
+            results[item["custom_id"]] = BatchResult(response=response["body"])
+        else:
+            error = item.get("error") or response.get("body", {}).get("error") or response
+            results[item["custom_id"]] = BatchResult(error=json.dumps(error))
+    return results
+
+
+class AzureBatchBackend:
+    """
+    Azure OpenAI Batch API: requests are uploaded as a JSONL file and run on the batch quota of a
+    global batch deployment, separate from the real-time TPM quota.
+    """
+    def __init__(self):
+        self.settings = get_settings()
+
+    def __client__(self):
+        # imported here to avoid a circular import with the client registry
+        from .client_registry import AzureOpenAIClientRegistry
+        return AzureOpenAIClientRegistry().get_client()
+
+    async def submit(self, lines: List[dict]) -> str:
+        client = self.__client__()
+        content = "\n".join(json.dumps(line, ensure_ascii=False) for line in lines).encode("utf-8")
+        input_file = await client.files.create(file=("batch.jsonl", io.BytesIO(content)), purpose="batch")
+        batch = await client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/chat/completions",
+            completion_window=self.settings.LLM_BATCH_COMPLETION_WINDOW
+        )
+        return batch.id
+
+    async def poll(self, batch_id: str) -> Optional[Dict[str, BatchResult]]:
+        """
+        Return the results once the batch reached a terminal status, otherwise None.
+        """
+        client = self.__client__()
+        batch = await client.batches.retrieve(batch_id)
+        if batch.status not in TERMINAL_STATUSES:
+            return None
+        if batch.status != "completed":
+            logger.warning(f"Azure openai batch {batch_id} ended with status {batch.status}")
+
+        results = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = await client.files.content(file_id)
+                results.update(parse_batch_output(content.text.splitlines()))
+        return results
+
+
+class LocalBatchBackend:
+    """
+    File-based stand-in for the Batch API, to run and test the batch flow offline.
+
+    Each batch is a folder under LLM_BATCH_LOCAL_DIR holding `input.jsonl`. The batch completes when an
+    `output.jsonl` in the Batch API output format appears next to it. If a responder is given, it is called with
+    each request body and its return value (the chat completion body) is written to `output.jsonl` right away.
+    """
+    def __init__(self, directory: Optional[str] = None, responder: Optional[Callable[[dict], dict]] = None):
+        self.directory = Path(directory or get_settings().LLM_BATCH_LOCAL_DIR)
+        self.responder = responder
+
+    async def submit(self, lines: List[dict]) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        outputs = None
+        if self.responder:
+            outputs = [
+                {
+                    "custom_id": line["custom_id"],
+                    "response": {"status_code": 200, "body": self.responder(line["body"])}
+                }
+                for line in lines
+            ]
+        # file I/O runs in a thread, so a large batch does not block the event loop
+        await asyncio.to_thread(self.__write__, self.directory / batch_id, lines, outputs)
+        return batch_id
+
+    def __write__(self, batch_path: Path, lines: List[dict], outputs: Optional[List[dict]]):
+        batch_path.mkdir(parents=True, exist_ok=True)
+        (batch_path / "input.jsonl").write_text("\n".join(json.dumps(line, ensure_ascii=False) for line in lines))
+        if outputs is not None:
+            (batch_path / "output.jsonl").write_text("\n".join(json.dumps(output, ensure_ascii=False) for output in outputs))
+
+    def __read__(self, batch_id: str) -> Optional[List[str]]:
+        output_path = self.directory / batch_id / "output.jsonl"
+        if not output_path.exists():
+            return None
+        return output_path.read_text().splitlines()
+
+    async def poll(self, batch_id: str) -> Optional[Dict[str, BatchResult]]:
+        lines = await asyncio.to_thread(self.__read__, batch_id)
+        if lines is None:
+            return None
+        return parse_batch_output(lines)
+
+
+class LLMBatchExecutor(metaclass=SingletonMeta):
+    """
+    Collects non-interactive chat completion requests into batch jobs and maps the results back to the callers.
+
+    Requests are flushed as one batch when LLM_BATCH_MAX_REQUESTS are pending or LLM_BATCH_FLUSH_INTERVAL seconds
+    after the first one, whichever comes first. Each batch is polled every LLM_BATCH_POLL_INTERVAL seconds.
+
+    The backend is the Azure Batch API, or LocalBatchBackend when LLM_BATCH_BACKEND is "local".
+    """
+    def __init__(self, backend=None):
+        self.settings = get_settings()
+        self.metrics = MetricsRegistry()
+        self.backend = backend or (LocalBatchBackend() if self.settings.LLM_BATCH_BACKEND == "local" else AzureBatchBackend())
+        self._pending: List[tuple] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def submit(self, **kwargs) -> dict:
+        """
+        Queue a chat completion request and wait for its batch to finish.
+
+        Parameters:
+
+            kwargs: chat completion arguments (model, messages, response_format, ...).
+
+        Returns:
+
+            dict: chat completion body.
+        """
+        kwargs["model"] = self.settings.LLM_BATCH_DEPLOYMENTS.get(kwargs["model"], kwargs["model"])
+        # timeouts of the real-time path do not apply to a batch
+        kwargs.pop("timeout", None)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(({"custom_id": uuid.uuid4().hex, "method": "POST", "url": "/chat/completions", "body": kwargs}, future))
+
+        if len(self._pending) >= self.settings.LLM_BATCH_MAX_REQUESTS:
+            self.__flush__()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.settings.LLM_BATCH_FLUSH_INTERVAL, self.__flush__)
+        return await future
+
+    def __flush__(self):
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if pending:
+            task = asyncio.create_task(self.__run_batch__(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def __run_batch__(self, pending: List[tuple]):
+        futures = {line["custom_id"]: future for line, future in pending}
+        try:
+            batch_id = await self.backend.submit([line for line, _ in pending])
+            logger.info(f"Submitted llm batch {batch_id} with {len(pending)} requests")
+            self.metrics.incr("llm_batch_requests", len(pending))
+
+            results = None
+            while results is None:
+                await asyncio.sleep(self.settings.LLM_BATCH_POLL_INTERVAL)
+                results = await self.backend.poll(batch_id)
+            logger.info(f"Finished llm batch {batch_id}")
+
+            for custom_id, future in futures.items():
+                if future.done():
+                    continue
+                result = results.get(custom_id)
+                if result and result.response:
+                    future.set_result(result.response)
+                else:
+                    self.metrics.incr("llm_batch_failures")
+                    future.set_exception(RuntimeError(f"llm batch {batch_id} request failed: {result.error if result else 'missing result'}"))
+        except Exception as e:
+            logger.error(f"error in llm batch: {e}")
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
@@ -0,0 +1,199 @@
+import httpx
+from threading import Lock
+from typing import Optional, Dict, Tuple
+from openai import AsyncAzureOpenAI
+from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
+from app.config import Settings, get_settings
+from app.utils.singleton import SingletonMeta
+from app.utils.logging import AppLogger
+from .rate_limiter import LLMRateLimiterRegistry
+from .embeddings import LedgerAzureOpenAIEmbeddings
+from .load_balancer import AzureOpenAILoadBalancer, AzureOpenAIEndpoint
+from .usage import LLMUsageCallbackHandler
+
+logger = AppLogger().get_logger()
+
+
+class AzureOpenAIClientRegistry(metaclass=SingletonMeta):
+    """
+    Process-wide registry of pooled Azure OpenAI clients.
+
+    All clients share one httpx connection pool, so TLS handshakes are paid once per
+    connection and keep-alive connections are reused across requests, services and agents.
+
+    Per-deployment overrides (timeout, max_retries) are read from `AZURE_OPENAI_DEPLOYMENT_SETTINGS`.
+
+    Example:
+        >>> registry = AzureOpenAIClientRegistry()
+        >>> client = registry.get_client(model="gpt-35-turbo")
+        >>> model = registry.get_chat_model(name="qa-agent", callbacks=[])
+    """
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or get_settings()
+        self._lock = Lock()
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._clients: Dict[Tuple, AsyncAzureOpenAI] = {}
+        # default embeddings per endpoint name, built once like the clients
+        self._embeddings: Dict[str, LedgerAzureOpenAIEmbeddings] = {}
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """
+        Shared httpx client with a bounded keep-alive connection pool.
+        """
+        with self._lock:
+            if self._http_client is None or self._http_client.is_closed:
+                self._http_client = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.settings.AZURE_OPENAI_MAX_CONNECTIONS,
+                        max_keepalive_connections=self.settings.AZURE_OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=self.settings.AZURE_OPENAI_KEEPALIVE_EXPIRY,
+                    ),
+                    timeout=httpx.Timeout(
+                        self.settings.AZURE_OPENAI_TIMEOUT,
+                        connect=self.settings.AZURE_OPENAI_CONNECT_TIMEOUT
+                    ),
+                    event_hooks={"response": [LLMRateLimiterRegistry().observe_response]},
+                )
+                # clients bound to a closed pool must be rebuilt
+                self._clients = {}
+                self._embeddings = {}
+            return self._http_client
+
+    def get_deployment_settings(self, model: Optional[str] = None) -> dict:
+        """
+        Get connection settings for the deployment, falling back to the global defaults.
+
+        Parameters:
+
+            model (Optional[str]): deployment name.
+        """
+        deployment_settings = {
+            "timeout": self.settings.AZURE_OPENAI_TIMEOUT,
+            "max_retries": self.settings.AZURE_OPENAI_MAX_RETRIES,
+        }
+        if model:
+            deployment_settings.update(self.settings.AZURE_OPENAI_DEPLOYMENT_SETTINGS.get(model, {}))
+        return deployment_settings
+
+    def get_client(
+        self,
+        model: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        api_key: Optional[str] = None,
+        api_version: Optional[str] = None,
+    ) -> AsyncAzureOpenAI:
+        """
+        Get a pooled AsyncAzureOpenAI client for the given endpoint and deployment.
+
+        Parameters:
+
+            model (Optional[str]): deployment name, used to apply per-deployment settings.
+
+            endpoint (Optional[str]): Azure OpenAI endpoint. Default is AZURE_OPENAI_ENDPOINT.
+
+            api_key (Optional[str]): api key. Default is AZURE_OPENAI_API_KEY.
+
+            api_version (Optional[str]): api version. Default is AZURE_OPENAI_API_VERSION.
+        """
+        endpoint = endpoint or self.settings.AZURE_OPENAI_ENDPOINT
+        api_key = api_key or self.settings.AZURE_OPENAI_API_KEY
+        api_version = api_version or self.settings.AZURE_OPENAI_API_VERSION
+        http_client = self.http_client
+
+        key = (endpoint, api_key, api_version, model)
+        with self._lock:
+            if key not in self._clients:
+                deployment_settings = self.get_deployment_settings(model)
+                self._clients[key] = AsyncAzureOpenAI(
+                    azure_endpoint=endpoint,
+                    api_key=api_key,
+                    api_version=api_version,
+                    http_client=http_client,
+                    timeout=deployment_settings["timeout"],
+                    max_retries=deployment_settings["max_retries"],
+                )
+            return self._clients[key]
+
+    def get_endpoint(self, model: str) -> AzureOpenAIEndpoint:
+        """
+        Endpoint picked by AzureOpenAILoadBalancer for a langchain model, so ejected and throttled endpoints are
+        avoided. LangChain calls are not spilled over within a request, only new models move to another endpoint.
+        """
+        candidates = AzureOpenAILoadBalancer().candidates(model)
+        if not candidates:
+            raise ValueError(f"No Azure openai endpoint serves model {model}")
+        return candidates[0]
+
+    def get_chat_model(self, model: Optional[str] = None, **kwargs) -> AzureChatOpenAI:
+        """
+        Build a langchain AzureChatOpenAI on the endpoint picked by the load balancer, reusing the shared connection pool.
+        Its calls are recorded into the LLMUsageLedger by an LLMUsageCallbackHandler.
+
+        Parameters:
+
+            model (Optional[str]): deployment name. Default is SMART_LLM_MODEL.
+
+            kwargs: extra AzureChatOpenAI arguments such as name and callbacks.
+        """
+        model = model or self.settings.SMART_LLM_MODEL
+        deployment_settings = self.get_deployment_settings(model)
+        endpoint = self.get_endpoint(model)
+        callbacks = list(kwargs.pop("callbacks", None) or []) + [LLMUsageCallbackHandler(model=model, name=kwargs.get("name"))]
+        return AzureChatOpenAI(
+            model=model,
+            azure_endpoint=endpoint.endpoint,
+            azure_deployment=endpoint.deployments.get(model, self.settings.AZURE_OPENAI_DEPLOYMENT_NAME),
+            openai_api_version=endpoint.api_version,
+            api_key=endpoint.api_key,
+            http_async_client=self.http_client,
+            timeout=deployment_settings["timeout"],
+            max_retries=deployment_settings["max_retries"],
+            callbacks=callbacks,
+            **kwargs
+        )
+
+    def get_embeddings(self, **kwargs) -> AzureOpenAIEmbeddings:
+        """
+        Get a langchain AzureOpenAIEmbeddings on the endpoint picked by the load balancer, reusing the shared
+        connection pool and recording usage.
+
+        Without kwargs, one instance per endpoint is built and reused, so per-query callers do not rebuild
+        the embeddings and their SDK clients.
+        """
+        model = self.settings.AZURE_EMBEDDING_MODEL
+        endpoint = self.get_endpoint(model)
+        http_client = self.http_client
+        if kwargs:
+            return self.__build_embeddings__(endpoint, http_client, **kwargs)
+        with self._lock:
+            if endpoint.name not in self._embeddings:
+                self._embeddings[endpoint.name] = self.__build_embeddings__(endpoint, http_client)
+            return self._embeddings[endpoint.name]
+
+    def __build_embeddings__(self, endpoint: AzureOpenAIEndpoint, http_client: httpx.AsyncClient, **kwargs) -> LedgerAzureOpenAIEmbeddings:
+        model = self.settings.AZURE_EMBEDDING_MODEL
+        deployment_settings = self.get_deployment_settings(model)
+        return LedgerAzureOpenAIEmbeddings(
+            azure_deployment=endpoint.deployment_for(model),
+            azure_endpoint=endpoint.endpoint,
+            openai_api_version=endpoint.api_version,
+            api_key=endpoint.api_key,
+            http_async_client=http_client,
+            timeout=deployment_settings["timeout"],
+            max_retries=deployment_settings["max_retries"],
+            **kwargs
+        )
+
+    async def aclose(self):
+        """
+        Close the shared connection pool. Called on server shutdown.
+        """
+        with self._lock:
+            http_client = self._http_client
+            self._http_client = None
+            self._clients = {}
+            self._embeddings = {}
+        if http_client and not http_client.is_closed:
+            await http_client.aclose()
+            logger.info("Closed Azure OpenAI connection pool")
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+from array import array
+from datetime import datetime, timedelta
+from typing import List, Dict, Set, Callable, Awaitable
+from app.config import get_settings
+from app.database.config import agent_db_session_scope
+from app.database.agent.embedding_cache.service import EmbeddingCacheService
+from app.utils.cache import TTLCache, SingleFlight
+from app.utils.metrics import MetricsRegistry
+from app.utils.singleton import SingletonMeta
+from app.utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
+
+
+def encode_vector(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def decode_vector(blob: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+class EmbeddingCache(metaclass=SingletonMeta):
+    """
+    Two-tier cache of embeddings keyed by (embedding model, sha256 of the text).
+
+    1. In-process LRU (EMBEDDING_CACHE_MEMORY_SIZE entries).
+
+    2. Optional Postgres table (`embedding_cache`) of float32 blobs, shared by all workers. Entries are evicted
+       when unused for EMBEDDING_CACHE_TTL seconds; hits refresh their last use in the background.
+
+    Concurrent misses of the same text (e.g. the same search query from parallel sub-queries) share one
+    embedding call through `coalesce`.
+
+    Example:
+        >>> cached = await EmbeddingCache().get_many(model="text-embedding-3-small", texts=texts)
+        >>> await EmbeddingCache().set_many(model="text-embedding-3-small", vectors={text: vector})
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self.memory = TTLCache(max_size=self.settings.EMBEDDING_CACHE_MEMORY_SIZE, ttl=self.settings.EMBEDDING_CACHE_TTL)
+        self.metrics = MetricsRegistry()
+        self.hits = {"memory": 0, "postgres": 0}
+        self.misses = 0
+        self._background_tasks: Set[asyncio.Task] = set()
+        self._inflight = SingleFlight()
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings.EMBEDDING_CACHE_ENABLED
+
+    @classmethod
+    def make_key(cls, model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+    async def get_many(self, model: str, texts: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up the embeddings of the texts, memory first, then Postgres.
+
+        Returns:
+
+            Dict[str, List[float]]: text to vector, for the texts found.
+        """
+        keys = {text: self.make_key(model, text) for text in set(texts)}
+        found = {}
+        for text, key in keys.items():
+            vector = self.memory.get(key)
+            if vector is not None:
+                found[text] = vector
+        self.__record__("memory", len(found))
+
+        missing = {key: text for text, key in keys.items() if text not in found}
+        if missing and self.settings.EMBEDDING_CACHE_POSTGRES_ENABLED:
+            try:
+                async with agent_db_session_scope() as db_session:
+                    entries = await EmbeddingCacheService(db_session=db_session).find_by_keys(list(missing))
+                for entry in entries:
+                    vector = decode_vector(entry.vector)
+                    self.memory.set(entry.cache_key, vector)
+                    found[missing[entry.cache_key]] = vector
+                self.__record__("postgres", len(entries))
+                self.__background__(self.__touch__([entry.cache_key for entry in entries]))
+            except Exception as e:
+                logger.error(f"error in embedding cache lookup: {e}")
+
+        self.misses += len(keys) - len(found)
+        self.metrics.incr("embedding_cache_misses", len(keys) - len(found))
+        return found
+
+    def __record__(self, tier: str, count: int):
+        if count:
+            self.hits[tier] += count
+            self.metrics.incr("embedding_cache_hits", count, tier=tier)
+
+    async def set_many(self, model: str, vectors: Dict[str, List[float]]):
+        """
+        Store embeddings. The Postgres write runs in the background so it never adds latency.
+        """
+        rows = []
+        for text, vector in vectors.items():
+            key = self.make_key(model, text)
+            self.memory.set(key, vector)
+            rows.append({"cache_key": key, "model": model, "dimensions": len(vector), "vector": encode_vector(vector)})
+
+        if rows and self.settings.EMBEDDING_CACHE_POSTGRES_ENABLED:
+            self.__background__(self.__persist__(rows))
+
+    async def coalesce(self, model: str, texts: List[str], embed: Callable[[List[str]], Awaitable[Dict[str, List[float]]]]) -> Dict[str, List[float]]:
+        """
+        Embed the texts with `embed` and store them, sharing the call with concurrent callers of the same texts.
+
+        Parameters:
+
+            model (str): embedding model.
+
+            texts (List[str]): texts missing from the cache.
+
+            embed (Callable): called with the texts no other caller is embedding, returns text to vector.
+
+        Returns:
+
+            Dict[str, List[float]]: text to vector.
+        """
+        async def call(keys: List[tuple]) -> Dict[tuple, List[float]]:
+            vectors = await embed([text for _, text in keys])
+            await self.set_many(model, vectors)
+            return {(model, text): vector for text, vector in vectors.items()}
+
+        vectors = await self._inflight.do_many([(model, text) for text in texts], call)
+        return {text: vectors[(model, text)] for text in texts}
+
+    def __background__(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def __persist__(self, rows: List[dict]):
+        try:
+            async with agent_db_session_scope() as db_session:
+                await EmbeddingCacheService(db_session=db_session).add_embeddings(rows)
+        except Exception as e:
+            logger.error(f"error in embedding cache persist: {e}")
+
+    async def __touch__(self, keys: List[str]):
+        try:
+            async with agent_db_session_scope() as db_session:
+                await EmbeddingCacheService(db_session=db_session).touch(keys)
+        except Exception as e:
+            logger.error(f"error in embedding cache touch: {e}")
+
+    async def purge_expired(self):
+        """
+        Delete entries unused for EMBEDDING_CACHE_TTL seconds from the shared table.
+        """
+        if not self.enabled or not self.settings.EMBEDDING_CACHE_POSTGRES_ENABLED:
+            return
+        try:
+            async with agent_db_session_scope() as db_session:
+                count = await EmbeddingCacheService(db_session=db_session).delete_unused_since(
+                    datetime.now() - timedelta(seconds=self.settings.EMBEDDING_CACHE_TTL)
+                )
+            logger.info(f"Purged {count} unused embedding cache entries")
+        except Exception as e:
+            logger.error(f"error in embedding cache purge: {e}")
+
+    def stats(self) -> dict:
+        total = sum(self.hits.values()) + self.misses
+        return {
+            "size": len(self.memory),
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_ratio": sum(self.hits.values()) / total if total else 0.0,
+        }
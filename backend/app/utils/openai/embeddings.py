@@ -0,0 +1,70 @@
+import time
+from typing import List, Dict, Optional
+from langchain_openai import AzureOpenAIEmbeddings
+from .usage import LLMUsageLedger
+from .embedding_cache import EmbeddingCache
+
+
+class LedgerAzureOpenAIEmbeddings(AzureOpenAIEmbeddings):
+    """
+    AzureOpenAIEmbeddings that records every embedding call into the usage ledger, and serves repeated texts
+    from the EmbeddingCache.
+
+    LangChain does not expose the response usage, so tokens are estimated (~4 characters per token).
+    embed_query and aembed_query go through the document methods, so they are recorded and cached too.
+    Only the async methods (used by FaissVectorRetriever.add_documents, FAISS.asimilarity_search and the vector
+    search modes) use the Postgres tier of the cache and share concurrent calls for the same texts; the sync
+    methods use the in-process tier only.
+    """
+    cache: bool = True
+
+    def __record__(self, texts: List[str], latency: float):
+        LLMUsageLedger().record(
+            model=self.__model__(),
+            kind="embedding",
+            prompt_tokens=sum(len(text) for text in texts) // 4,
+            latency=latency,
+            name="embeddings",
+            estimated=True
+        )
+
+    def __model__(self) -> str:
+        return self.deployment or self.model
+
+    def embed_documents(self, texts: List[str], chunk_size: Optional[int] = 0) -> List[List[float]]:
+        cache = EmbeddingCache()
+        cached = {}
+        if self.cache and cache.enabled:
+            for text in set(texts):
+                vector = cache.memory.get(cache.make_key(self.__model__(), text))
+                if vector is not None:
+                    cached[text] = vector
+        missing = list(dict.fromkeys(text for text in texts if text not in cached))
+
+        if missing:
+            start = time.monotonic()
+            embeddings = super().embed_documents(missing, chunk_size=chunk_size)
+            self.__record__(missing, time.monotonic() - start)
+            for text, vector in zip(missing, embeddings):
+                cached[text] = vector
+                if self.cache and cache.enabled:
+                    cache.memory.set(cache.make_key(self.__model__(), text), vector)
+        return [cached[text] for text in texts]
+
+    async def aembed_documents(self, texts: List[str], chunk_size: Optional[int] = 0) -> List[List[float]]:
+        cache = EmbeddingCache()
+        cached = await cache.get_many(self.__model__(), texts) if self.cache and cache.enabled else {}
+        missing = list(dict.fromkeys(text for text in texts if text not in cached))
+
+        async def embed(texts: List[str]) -> Dict[str, List[float]]:
+            start = time.monotonic()
+            embeddings = await super(LedgerAzureOpenAIEmbeddings, self).aembed_documents(texts, chunk_size=chunk_size)
+            self.__record__(texts, time.monotonic() - start)
+            return dict(zip(texts, embeddings))
+
+        if missing:
+            if self.cache and cache.enabled:
+                cached.update(await cache.coalesce(self.__model__(), missing, embed))
+            else:
+                cached.update(await embed(missing))
+        return [cached[text] for text in texts]
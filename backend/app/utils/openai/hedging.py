@@ -0,0 +1,66 @@
+from threading import Lock
+from collections import deque, defaultdict
+from typing import Dict, Deque, Optional
+from app.config import get_settings
+from app.utils.singleton import SingletonMeta
+
+
+class LatencyTracker(metaclass=SingletonMeta):
+    """
+    Rolling latency samples per LLM call name, used to decide when to fire a hedged request.
+
+    Attributes:
+
+        window (int): number of recent samples kept per name.
+    """
+    def __init__(self, window: int = 200):
+        self.settings = get_settings()
+        self.window = window
+        self._lock = Lock()
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.window))
+        self._hedges: Dict[str, Dict[str, int]] = defaultdict(lambda: {"fired": 0, "primary_wins": 0, "hedge_wins": 0})
+
+    def record(self, name: Optional[str], seconds: float):
+        with self._lock:
+            self._samples[name or ""].append(seconds)
+
+    def percentile(self, name: Optional[str], percentile: float) -> Optional[float]:
+        """
+        Observed latency percentile (0 < percentile < 1) for the call name, or None without enough samples.
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(name or "", ()))
+        if len(samples) < self.settings.LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(percentile * len(samples)))]
+
+    def hedge_delay(self, name: Optional[str]) -> float:
+        """
+        Seconds to wait for the primary request before firing the hedge.
+        """
+        delay = self.percentile(name, self.settings.LLM_HEDGE_PERCENTILE)
+        if delay is None:
+            delay = self.settings.LLM_HEDGE_DEFAULT_DELAY
+        return max(self.settings.LLM_HEDGE_MIN_DELAY, delay)
+
+    def record_hedge(self, name: Optional[str], winner: Optional[str] = None):
+        """
+        Record a fired hedge and, once known, which request won ("primary" or "hedge").
+        """
+        with self._lock:
+            stats = self._hedges[name or ""]
+            if winner is None:
+                stats["fired"] += 1
+            else:
+                stats[f"{winner}_wins"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {
+                    **stats,
+                    "hedge_win_rate": stats["hedge_wins"] / stats["fired"] if stats["fired"] else 0.0,
+                    "samples": len(self._samples.get(name, ())),
+                }
+                for name, stats in self._hedges.items()
+            }
@@ -0,0 +1,122 @@
+import json
+from typing import Optional, List, Any
+from app.utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
+
+WHITESPACE = " \t\r\n"
+
+# returned by a parser step that completes no element; None is a valid element (JSON null)
+NOTHING = object()
+
+
+class JsonArrayStreamParser:
+    """
+    Incremental parser that extracts the elements of one array from a JSON document as it streams in.
+
+    Each element is returned as soon as its closing bracket (or the following comma, for scalars) arrives,
+    so callers can start working on it before the rest of the document has been generated.
+
+    Attributes:
+
+        key (Optional[str]): top-level key of the array, e.g. "outlines" for {"outlines": [...]}.
+                             If None, the document itself is expected to be an array.
+
+    Example:
+        >>> parser = JsonArrayStreamParser(key="chunks")
+        >>> parser.feed('{"chunks": [{"id": 1, "sc')
+        []
+        >>> parser.feed('ore": 97}, {"id": 2')
+        [{'id': 1, 'score': 97}]
+    """
+    def __init__(self, key: Optional[str] = None):
+        self.key = key
+        self.buffer = ""
+        self.position = 0
+        self.done = False
+        self.emitted = 0
+
+        # each entry is [bracket, last key, expecting key] for the containers we are inside
+        self._stack: List[list] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._array_depth: Optional[int] = None
+        self._element_start: Optional[int] = None
+
+    def feed(self, text: str) -> List[Any]:
+        """
+        Consume the next piece of the document and return the elements completed by it.
+        """
+        self.buffer += text
+        elements = []
+        while self.position < len(self.buffer) and not self.done:
+            element = self.__step__(self.buffer[self.position])
+            self.position += 1
+            if element is not NOTHING:
+                elements.append(element)
+        return elements
+
+    def __step__(self, char: str):
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                top = self._stack[-1] if self._stack else None
+                if top and top[0] == "{" and top[2]:
+                    top[1] = json.loads(self.buffer[self._string_start:self.position + 1])
+            return NOTHING
+
+        in_array = self._array_depth is not None and len(self._stack) == self._array_depth
+        if in_array and self._element_start is None and char not in WHITESPACE + ",]":
+            self._element_start = self.position
+
+        if char == '"':
+            self._in_string = True
+            self._string_start = self.position
+        elif char in "{[":
+            self._stack.append([char, None, char == "{"])
+            if char == "[" and self._array_depth is None and self.__is_target__():
+                self._array_depth = len(self._stack)
+                self._element_start = None
+        elif char in "}]":
+            self._stack.pop()
+            if self._array_depth is not None:
+                if len(self._stack) == self._array_depth - 1:
+                    # the target array itself closed; a trailing scalar element ends here
+                    element = self.__emit__(self.position) if self._element_start is not None else NOTHING
+                    self.done = True
+                    return element
+                if len(self._stack) == self._array_depth and self._element_start is not None:
+                    return self.__emit__(self.position + 1)
+        elif char == ",":
+            if self._stack and self._stack[-1][0] == "{":
+                self._stack[-1][2] = True
+            if in_array and self._element_start is not None:
+                return self.__emit__(self.position)
+        elif char == ":":
+            if self._stack and self._stack[-1][0] == "{":
+                self._stack[-1][2] = False
+        return NOTHING
+
+    def __is_target__(self) -> bool:
+        """
+        Whether the array that just opened is the one to extract.
+        """
+        if self.key is None:
+            return len(self._stack) == 1
+        return len(self._stack) == 2 and self._stack[0][0] == "{" and self._stack[0][1] == self.key
+
+    def __emit__(self, end: int):
+        text = self.buffer[self._element_start:end]
+        self._element_start = None
+        try:
+            element = json.loads(text)
+        except ValueError as e:
+            logger.error(f"error in parsing streamed json element: {e}")
+            return NOTHING
+        self.emitted += 1
+        return element
@@ -0,0 +1,229 @@
+import math
+import time
+import random
+import asyncio
+from threading import Lock
+from urllib.parse import urlparse
+from typing import Optional, Dict, List, Tuple
+from pydantic import BaseModel
+from app.config import get_settings
+from app.utils.metrics import MetricsRegistry
+from app.utils.singleton import SingletonMeta
+from app.utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
+
+
+class AzureOpenAIEndpoint(BaseModel):
+    """
+    One Azure OpenAI resource (usually one region).
+
+    Attributes:
+
+        name (str): short name used in logs and metrics, e.g. "eastus".
+
+        endpoint (str): resource endpoint.
+
+        api_key (str): resource api key.
+
+        api_version (str): api version.
+
+        deployments (Dict[str, str]): model name -> deployment name on this resource. If empty, every model is
+                                      served by a deployment of the same name.
+
+        weight (float): static routing weight. Default is 1.0.
+    """
+    name: str
+    endpoint: str
+    api_key: str
+    api_version: str
+    deployments: Dict[str, str] = {}
+    weight: float = 1.0
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.endpoint).hostname or self.endpoint
+
+    def deployment_for(self, model: str) -> Optional[str]:
+        if not self.deployments:
+            return model
+        return self.deployments.get(model)
+
+
+class EndpointHealth:
+    """
+    Passive health state of an endpoint and deployment pair.
+    """
+    def __init__(self):
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.consecutive_failures = 0
+        self.throttled_until = 0.0
+
+    def record_success(self, latency: float, alpha: float):
+        self.latency_ewma = latency if self.latency_ewma is None else (1 - alpha) * self.latency_ewma + alpha * latency
+        self.error_ewma = (1 - alpha) * self.error_ewma
+        self.consecutive_failures = 0
+
+    def record_failure(self, alpha: float):
+        self.error_ewma = (1 - alpha) * self.error_ewma + alpha
+        self.consecutive_failures += 1
+
+
+class AzureOpenAILoadBalancer(metaclass=SingletonMeta):
+    """
+    Latency- and error-weighted routing across several Azure OpenAI endpoints.
+
+    - Endpoints are configured by AZURE_OPENAI_ENDPOINTS. Without it, the single AZURE_OPENAI_ENDPOINT is used.
+
+    - An endpoint is ejected after LLM_ENDPOINT_EJECT_AFTER_FAILURES consecutive failures. It is probed every
+      LLM_ENDPOINT_EJECT_SECONDS and only routed to again once a health check (models list) succeeds.
+
+    - A deployment that answers 429 (out of TPM) is skipped until its Retry-After expires, so requests
+      spill over to the next endpoint.
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self.metrics = MetricsRegistry()
+        self._lock = Lock()
+        self._health: Dict[Tuple[str, str], EndpointHealth] = {}
+        # ejected endpoint name -> time of its next health check
+        self._ejected: Dict[str, float] = {}
+        self._health_check_task: Optional[asyncio.Task] = None
+
+        if self.settings.AZURE_OPENAI_ENDPOINTS:
+            self.endpoints = [AzureOpenAIEndpoint(**endpoint) for endpoint in self.settings.AZURE_OPENAI_ENDPOINTS]
+        else:
+            self.endpoints = [
+                AzureOpenAIEndpoint(
+                    name="default",
+                    endpoint=self.settings.AZURE_OPENAI_ENDPOINT,
+                    api_key=self.settings.AZURE_OPENAI_API_KEY,
+                    api_version=self.settings.AZURE_OPENAI_API_VERSION
+                )
+            ]
+
+    def __health__(self, endpoint: AzureOpenAIEndpoint, model: str) -> EndpointHealth:
+        key = (endpoint.name, model)
+        if key not in self._health:
+            self._health[key] = EndpointHealth()
+        return self._health[key]
+
+    def __score__(self, endpoint: AzureOpenAIEndpoint, model: str) -> float:
+        health = self.__health__(endpoint, model)
+        latency = health.latency_ewma if health.latency_ewma is not None else 1.0
+        return endpoint.weight / (latency + 0.1) * (1 - health.error_ewma) ** 2
+
+    def __available_at__(self, endpoint: AzureOpenAIEndpoint, model: str) -> float:
+        if endpoint.name in self._ejected:
+            # unavailable until a health check succeeds, whenever that is
+            return math.inf
+        return self.__health__(endpoint, model).throttled_until
+
+    def candidates(self, model: str) -> List[AzureOpenAIEndpoint]:
+        """
+        Endpoints to try for the model, in order.
+
+        The first healthy endpoint is picked at random in proportion to its score, the other healthy endpoints
+        follow by score, and unavailable endpoints come last (soonest available first) as a final fallback.
+        """
+        now = time.monotonic()
+        with self._lock:
+            serving = [endpoint for endpoint in self.endpoints if endpoint.deployment_for(model)]
+            healthy = [endpoint for endpoint in serving if self.__available_at__(endpoint, model) <= now]
+            unavailable = sorted(
+                [endpoint for endpoint in serving if endpoint not in healthy],
+                key=lambda endpoint: self.__available_at__(endpoint, model)
+            )
+            if len(healthy) <= 1:
+                return healthy + unavailable
+
+            scores = {endpoint.name: self.__score__(endpoint, model) for endpoint in healthy}
+            first = random.choices(healthy, weights=[scores[endpoint.name] for endpoint in healthy])[0]
+            rest = sorted([endpoint for endpoint in healthy if endpoint is not first], key=lambda endpoint: scores[endpoint.name], reverse=True)
+            return [first] + rest + unavailable
+
+    def record_success(self, endpoint: AzureOpenAIEndpoint, model: str, latency: float):
+        with self._lock:
+            self.__health__(endpoint, model).record_success(latency, self.settings.LLM_ENDPOINT_EWMA_ALPHA)
+        self.metrics.observe("llm_endpoint_latency_seconds", latency, endpoint=endpoint.name, model=model)
+
+    def record_failure(self, endpoint: AzureOpenAIEndpoint, model: str):
+        with self._lock:
+            health = self.__health__(endpoint, model)
+            health.record_failure(self.settings.LLM_ENDPOINT_EWMA_ALPHA)
+            if health.consecutive_failures >= self.settings.LLM_ENDPOINT_EJECT_AFTER_FAILURES:
+                self._ejected[endpoint.name] = time.monotonic() + self.settings.LLM_ENDPOINT_EJECT_SECONDS
+                health.consecutive_failures = 0
+                logger.warning(f"Ejected Azure openai endpoint {endpoint.name}")
+                self.metrics.incr("llm_endpoint_ejections", endpoint=endpoint.name)
+        self.metrics.incr("llm_endpoint_failures", endpoint=endpoint.name, model=model)
+
+    def record_throttle(self, endpoint: AzureOpenAIEndpoint, model: str, retry_after: float):
+        with self._lock:
+            health = self.__health__(endpoint, model)
+            health.throttled_until = max(health.throttled_until, time.monotonic() + retry_after)
+        self.metrics.incr("llm_endpoint_spillovers", endpoint=endpoint.name, model=model)
+
+    async def __check_endpoint__(self, endpoint: AzureOpenAIEndpoint):
+        # imported here to avoid a circular import with the client registry
+        from .client_registry import AzureOpenAIClientRegistry
+
+        client = AzureOpenAIClientRegistry().get_client(
+            endpoint=endpoint.endpoint,
+            api_key=endpoint.api_key,
+            api_version=endpoint.api_version
+        ).with_options(max_retries=0, timeout=self.settings.LLM_ENDPOINT_HEALTH_CHECK_TIMEOUT)
+        try:
+            await client.models.list()
+            # the only place an ejected endpoint is re-admitted
+            with self._lock:
+                self._ejected.pop(endpoint.name, None)
+            logger.info(f"Re-admitted Azure openai endpoint {endpoint.name}")
+        except Exception as e:
+            logger.warning(f"Health check failed for Azure openai endpoint {endpoint.name}: {e}")
+            with self._lock:
+                self._ejected[endpoint.name] = time.monotonic() + self.settings.LLM_ENDPOINT_EJECT_SECONDS
+
+    async def __health_check_loop__(self):
+        while True:
+            await asyncio.sleep(self.settings.LLM_ENDPOINT_HEALTH_CHECK_INTERVAL)
+            now = time.monotonic()
+            with self._lock:
+                due = [endpoint for endpoint in self.endpoints if self._ejected.get(endpoint.name, math.inf) <= now]
+            if due:
+                await asyncio.gather(*[self.__check_endpoint__(endpoint) for endpoint in due])
+
+    def start_health_checks(self):
+        """
+        Start the background health check loop for ejected endpoints. Called from the FastAPI lifespan hook.
+        """
+        if len(self.endpoints) > 1 and self._health_check_task is None:
+            self._health_check_task = asyncio.create_task(self.__health_check_loop__())
+
+    async def stop_health_checks(self):
+        if self._health_check_task:
+            self._health_check_task.cancel()
+            try:
+                await self._health_check_task
+            except asyncio.CancelledError:
+                pass
+            self._health_check_task = None
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                endpoint.name: {
+                    "ejected": endpoint.name in self._ejected,
+                    "deployments": {
+                        model: {
+                            "latency_ewma": health.latency_ewma,
+                            "error_ewma": health.error_ewma,
+                            "throttled": health.throttled_until > now,
+                        }
+                        for (name, model), health in self._health.items() if name == endpoint.name
+                    }
+                }
+                for endpoint in self.endpoints
+            }
@@ -0,0 +1,284 @@
+import re
+import time
+import asyncio
+import httpx
+from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+from threading import Lock
+from typing import Optional, Dict, List
+from app.config import get_settings
+from app.database.config import agent_db_session_scope
+from app.database.agent.llm_rate_limit.service import LLMRateLimitService
+from app.utils.metrics import MetricsRegistry
+from app.utils.singleton import SingletonMeta
+from app.utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
+
+DEPLOYMENT_PATH_PATTERN = re.compile(r"/openai/deployments/([^/]+)/")
+
+
+def estimate_tokens(messages: List[dict], max_tokens: Optional[int] = None, completion_tokens: int = 512) -> int:
+    """
+    Cheap token estimate for quota accounting (~4 characters per token).
+    Exact counts are reconciled from the response usage after the call.
+    """
+    characters = 0
+    for message in messages or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            characters += len(content)
+        elif isinstance(content, list):
+            characters += sum(len(part.get("text", "")) for part in content if isinstance(part, dict))
+    return characters // 4 + (max_tokens or completion_tokens)
+
+
+def parse_retry_after(headers: httpx.Headers, default: float = 1.0) -> float:
+    """
+    Read the retry delay in seconds from Azure's `retry-after-ms` or the standard `retry-after` header.
+    """
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return default
+
+
+class TokenBucket:
+    """
+    Token bucket continuously refilled at `rate_per_minute`.
+    Waiters are served in FIFO order.
+    """
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def __refill__(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1):
+        # a single request larger than the bucket must still get through eventually
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self.__refill__()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, amount: float):
+        """
+        Give back (positive) or take (negative) tokens once the real usage is known.
+        """
+        self.__refill__()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency controller.
+
+    The in-flight limit grows by ~1 per round trip of successful requests and is multiplied by
+    `decrease_factor` on throttling. Retry-After pauses every new request until it expires.
+    """
+    def __init__(self, initial: int, min_limit: int, max_limit: int, decrease_factor: float = 0.5):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            while True:
+                wait = self.blocked_until - time.monotonic()
+                if wait > 0:
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self.in_flight < max(1, int(self.limit)):
+                    self.in_flight += 1
+                    return
+                await self._condition.wait()
+
+    async def release(self, success: bool = True):
+        async with self._condition:
+            self.in_flight -= 1
+            if success:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+    def on_throttle(self, retry_after: float):
+        now = time.monotonic()
+        # a burst of 429s from the same wave counts as one congestion signal
+        if now - self._last_decrease > 1.0:
+            self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+            self._last_decrease = now
+        self.blocked_until = max(self.blocked_until, now + retry_after)
+
+
+class PostgresRateLimitStore:
+    """
+    Fixed one-minute windows shared by all workers through the `llm_rate_limits` table.
+    """
+    async def wait_time(self, deployment: str, tokens: int, rpm: Optional[int], tpm: Optional[int]) -> float:
+        """
+        Reserve a request in the current window and return how long to wait before sending it.
+        A request that has to wait is not counted: its reservation is released, and made again on the next try.
+        """
+        now = datetime.now()
+        window_start = now.replace(second=0, microsecond=0)
+        async with agent_db_session_scope() as db_session:
+            service = LLMRateLimitService(db_session=db_session)
+            row = await service.reserve(
+                deployment=deployment,
+                window_start=window_start,
+                requests=1,
+                tokens=tokens
+            )
+            wait = 0.0
+            if row.blocked_until and row.blocked_until > now:
+                wait = (row.blocked_until - now).total_seconds()
+            elif (rpm and row.requests > rpm) or (tpm and row.tokens > tpm):
+                wait = (window_start + timedelta(minutes=1) - now).total_seconds()
+            if wait > 0:
+                await service.release(deployment=deployment, window_start=window_start, requests=1, tokens=tokens)
+        return wait
+
+    async def block(self, deployment: str, retry_after: float):
+        async with agent_db_session_scope() as db_session:
+            await LLMRateLimitService(db_session=db_session).block(
+                deployment=deployment,
+                until=datetime.now() + timedelta(seconds=retry_after)
+            )
+
+
+class DeploymentRateLimiter:
+    """
+    Rate limiter of one deployment: RPM and estimated TPM token buckets plus an AIMD concurrency limit.
+
+    Without a shared store the configured quota is divided by LLM_RATE_LIMIT_WORKERS so that
+    all workers together stay within the deployment's quota.
+
+    Limits are looked up in LLM_RATE_LIMITS by "<endpoint host>/<deployment>" first, then by deployment name.
+    """
+    def __init__(self, deployment: str, endpoint: Optional[str] = None, store: Optional[PostgresRateLimitStore] = None):
+        self.settings = get_settings()
+        self.deployment = f"{endpoint}/{deployment}" if endpoint else deployment
+        self.store = store
+        self.metrics = MetricsRegistry()
+
+        limits = self.settings.LLM_RATE_LIMITS.get(self.deployment) or self.settings.LLM_RATE_LIMITS.get(deployment, {})
+        self.rpm: Optional[int] = limits.get("rpm")
+        self.tpm: Optional[int] = limits.get("tpm")
+
+        workers = 1 if store else max(1, self.settings.LLM_RATE_LIMIT_WORKERS)
+        self.request_bucket = TokenBucket(self.rpm / workers) if self.rpm and not store else None
+        self.token_bucket = TokenBucket(self.tpm / workers) if self.tpm and not store else None
+        self.concurrency = AdaptiveConcurrencyLimiter(
+            initial=limits.get("initial_concurrency", self.settings.LLM_INITIAL_CONCURRENCY),
+            min_limit=limits.get("min_concurrency", self.settings.LLM_MIN_CONCURRENCY),
+            max_limit=limits.get("max_concurrency", self.settings.LLM_MAX_CONCURRENCY)
+        )
+
+    async def __wait_for_shared_quota__(self, estimated_tokens: int):
+        while True:
+            try:
+                wait = await self.store.wait_time(self.deployment, estimated_tokens, self.rpm, self.tpm)
+            except Exception as e:
+                logger.error(f"error in shared rate limit store: {e}")
+                return
+            if wait <= 0:
+                return
+            self.metrics.incr("llm_rate_limit_waits", deployment=self.deployment)
+            await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        """
+        Wait for quota and a concurrency slot, then hold the slot for the duration of the call.
+        """
+        start = time.monotonic()
+        if self.store:
+            await self.__wait_for_shared_quota__(estimated_tokens)
+        if self.request_bucket:
+            await self.request_bucket.acquire(1)
+        if self.token_bucket:
+            await self.token_bucket.acquire(estimated_tokens)
+        await self.concurrency.acquire()
+        self.metrics.observe("llm_rate_limit_wait_seconds", time.monotonic() - start, deployment=self.deployment)
+        self.metrics.set_gauge("llm_concurrency_limit", self.concurrency.limit, deployment=self.deployment)
+
+        success = False
+        try:
+            yield
+            success = True
+        finally:
+            await self.concurrency.release(success=success)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        if self.token_bucket and actual_tokens is not None:
+            self.token_bucket.adjust(estimated_tokens - actual_tokens)
+
+    async def on_throttle(self, retry_after: float):
+        logger.warning(f"Azure openai deployment {self.deployment} throttled, retry after {retry_after}s")
+        self.metrics.incr("llm_throttled", deployment=self.deployment)
+        self.concurrency.on_throttle(retry_after)
+        self.metrics.set_gauge("llm_concurrency_limit", self.concurrency.limit, deployment=self.deployment)
+        if self.store:
+            try:
+                await self.store.block(self.deployment, retry_after)
+            except Exception as e:
+                logger.error(f"error in shared rate limit store: {e}")
+
+
+class LLMRateLimiterRegistry(metaclass=SingletonMeta):
+    """
+    Process-wide registry of per-deployment rate limiters.
+
+    `observe_response` is installed as an httpx response hook on the shared Azure OpenAI
+    connection pool, so every 429 (including the SDK's internal retries) feeds the AIMD controller.
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self._lock = Lock()
+        self._limiters: Dict[tuple, DeploymentRateLimiter] = {}
+        self.store = PostgresRateLimitStore() if self.settings.LLM_RATE_LIMIT_SHARED_STORE else None
+
+    def get(self, deployment: str, endpoint: Optional[str] = None) -> DeploymentRateLimiter:
+        """
+        Get the limiter of a deployment.
+
+        Parameters:
+
+            deployment (str): deployment name.
+
+            endpoint (Optional[str]): endpoint host. Each endpoint has its own quota.
+        """
+        key = (endpoint, deployment)
+        with self._lock:
+            if key not in self._limiters:
+                self._limiters[key] = DeploymentRateLimiter(deployment=deployment, endpoint=endpoint, store=self.store)
+            return self._limiters[key]
+
+    async def observe_response(self, response: httpx.Response):
+        if response.status_code != 429:
+            return
+        match = DEPLOYMENT_PATH_PATTERN.search(response.request.url.path)
+        if not match:
+            return
+        await self.get(match.group(1), endpoint=response.request.url.host).on_throttle(parse_retry_after(response.headers))
@@ -0,0 +1,131 @@
+import json
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional, Set
+from app.config import get_settings
+from app.database.config import agent_db_session_scope
+from app.database.agent.llm_cache.service import LLMCacheService
+from app.utils.cache import TTLCache
+from app.utils.metrics import MetricsRegistry
+from app.utils.singleton import SingletonMeta
+from app.utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
+
+
+class LLMResponseCache(metaclass=SingletonMeta):
+    """
+    Two-tier cache for LLM completions.
+
+    1. In-process LRU with TTL (per worker).
+
+    2. Optional Postgres table (`llm_response_cache`) shared by all gunicorn workers.
+
+    Keys are the sha256 of the canonical (model, messages, response_format, temperature) request.
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self.memory = TTLCache(
+            max_size=self.settings.LLM_CACHE_MAX_SIZE,
+            ttl=self.settings.LLM_CACHE_TTL
+        )
+        self.metrics = MetricsRegistry()
+        self.hits = {"memory": 0, "postgres": 0}
+        self.misses = 0
+        self._background_tasks: Set[asyncio.Task] = set()
+
+    @classmethod
+    def make_key(cls, model: str, messages: list, response_format: Optional[dict] = None, temperature: Optional[float] = None) -> str:
+        """
+        Canonical hash of the request fields that determine the completion.
+        """
+        payload = json.dumps(
+            {
+                "model": model,
+                "messages": messages,
+                "response_format": response_format,
+                "temperature": temperature
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str, name: Optional[str] = None) -> Optional[str]:
+        """
+        Look up a cached completion, memory first, then Postgres.
+        """
+        value = self.memory.get(key)
+        if value is not None:
+            self.__record_hit__(tier="memory", name=name)
+            return value
+
+        if self.settings.LLM_CACHE_POSTGRES_ENABLED:
+            try:
+                async with agent_db_session_scope() as db_session:
+                    entry = await LLMCacheService(db_session=db_session).find_by_key(key)
+                if entry:
+                    self.memory.set(key, entry.response)
+                    self.__record_hit__(tier="postgres", name=name)
+                    return entry.response
+            except Exception as e:
+                logger.error(f"error in llm cache lookup: {e}")
+
+        self.misses += 1
+        self.metrics.incr("llm_cache_misses", name=name)
+        return None
+
+    def __record_hit__(self, tier: str, name: Optional[str] = None):
+        self.hits[tier] += 1
+        self.metrics.incr("llm_cache_hits", tier=tier, name=name)
+
+    async def set(self, key: str, value: str, model: str, name: Optional[str] = None):
+        """
+        Store a completion. The Postgres write runs in the background so it never adds latency.
+        """
+        if value is None:
+            return
+        self.memory.set(key, value)
+
+        if self.settings.LLM_CACHE_POSTGRES_ENABLED:
+            task = asyncio.create_task(self.__persist__(key=key, value=value, model=model, name=name))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+    async def __persist__(self, key: str, value: str, model: str, name: Optional[str] = None):
+        try:
+            async with agent_db_session_scope() as db_session:
+                await LLMCacheService(db_session=db_session).upsert(
+                    cache_key=key,
+                    model=model,
+                    name=name,
+                    response=value,
+                    expires_at=datetime.now() + timedelta(seconds=self.settings.LLM_CACHE_POSTGRES_TTL)
+                )
+        except Exception as e:
+            logger.error(f"error in llm cache persist: {e}")
+
+    async def purge_expired(self):
+        """
+        Delete expired rows from the shared table.
+        """
+        if not self.settings.LLM_CACHE_POSTGRES_ENABLED:
+            return
+        try:
+            async with agent_db_session_scope() as db_session:
+                count = await LLMCacheService(db_session=db_session).delete_expired()
+            logger.info(f"Purged {count} expired llm cache entries")
+        except Exception as e:
+            logger.error(f"error in llm cache purge: {e}")
+
+    def stats(self) -> dict:
+        total = sum(self.hits.values()) + self.misses
+        return {
+            "size": len(self.memory),
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_ratio": sum(self.hits.values()) / total if total else 0.0,
+        }
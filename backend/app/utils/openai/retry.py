@@ -0,0 +1,90 @@
+import json
+import random
+import asyncio
+import openai
+from typing import Optional, Callable, Awaitable, Any
+from app.config import get_settings
+from app.exceptions.llm_exceptions import LLMResponseParseError
+from app.utils.metrics import MetricsRegistry
+from app.utils.logging import AppLogger
+from .rate_limiter import parse_retry_after
+
+logger = AppLogger().get_logger()
+
+RETRYABLE_ERROR_TYPES = ("timeout", "rate_limit", "server", "parse")
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Classify an LLM call error: "timeout", "rate_limit", "server", "parse" or "fatal" (not worth retrying,
+    e.g. bad request, content filter or authentication errors).
+    """
+    if isinstance(error, (openai.APITimeoutError, asyncio.TimeoutError)):
+        return "timeout"
+    if isinstance(error, openai.RateLimitError):
+        return "rate_limit"
+    if isinstance(error, (openai.InternalServerError, openai.APIConnectionError)):
+        return "server"
+    if isinstance(error, (LLMResponseParseError, json.JSONDecodeError)):
+        return "parse"
+    return "fatal"
+
+
+class RetryPolicy:
+    """
+    Bounded retry with exponential backoff and full jitter.
+
+    The SDK already retries each HTTP request; this policy wraps a whole LLM call (request and response
+    parsing), so it also covers completions that come back unparseable. Do not wrap calls that already run under
+    a policy, such as AzureOpenAIClient.ainvoke_json: the attempts would multiply.
+
+    Attributes:
+
+        max_attempts (int): attempts including the first one. Default is LLM_RETRY_MAX_ATTEMPTS.
+
+        base_delay (float): backoff base in seconds. Default is LLM_RETRY_BASE_DELAY.
+
+        max_delay (float): backoff cap in seconds. Default is LLM_RETRY_MAX_DELAY.
+
+    Example:
+        >>> policy = RetryPolicy(max_attempts=3)
+        >>> async def invoke():
+        ...     return client.parse_json(await client.ainvoke(...))
+        >>> result = await policy.run(invoke, name="generate-report")
+        >>> result = await client.ainvoke_json(..., retry_policy=policy)
+    """
+    def __init__(self, max_attempts: Optional[int] = None, base_delay: Optional[float] = None, max_delay: Optional[float] = None):
+        settings = get_settings()
+        self.max_attempts = max_attempts or settings.LLM_RETRY_MAX_ATTEMPTS
+        self.base_delay = base_delay if base_delay is not None else settings.LLM_RETRY_BASE_DELAY
+        self.max_delay = max_delay if max_delay is not None else settings.LLM_RETRY_MAX_DELAY
+        self.metrics = MetricsRegistry()
+
+    def delay(self, attempt: int, error: BaseException) -> float:
+        """
+        Seconds to wait before the next attempt.
+        """
+        error_type = classify_error(error)
+        if error_type == "parse":
+            # a bad completion is not a sign of overload, re-invoke right away
+            return 0.0
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if error_type == "rate_limit":
+            delay = max(delay, parse_retry_after(error.response.headers))
+        return delay
+
+    async def run(self, call: Callable[[], Awaitable[Any]], name: Optional[str] = None) -> Any:
+        """
+        Run the call, retrying retryable errors up to max_attempts.
+        """
+        for attempt in range(self.max_attempts):
+            try:
+                return await call()
+            except Exception as e:
+                error_type = classify_error(e)
+                if error_type not in RETRYABLE_ERROR_TYPES or attempt == self.max_attempts - 1:
+                    raise
+                delay = self.delay(attempt, e)
+                logger.warning(f"{name} failed ({error_type}), attempt {attempt + 1}/{self.max_attempts}, retrying in {delay:.1f}s: {e}")
+                self.metrics.incr("llm_retries", name=name, error=error_type)
+                await asyncio.sleep(delay)
@@ -0,0 +1,261 @@
+import time
+import asyncio
+from uuid import UUID
+from datetime import datetime
+from threading import Lock
+from contextvars import ContextVar
+from typing import Optional, List, Dict, Any, Tuple
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from app.config import get_settings
+from app.database.config import agent_db_session_scope
+from app.database.agent.llm_usage.service import LLMUsageService
+from app.enums.budget_enum import BudgetStatusEnum
+from app.utils.cache import TTLCache
+from app.utils.metrics import MetricsRegistry
+from app.utils.singleton import SingletonMeta
+from app.utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
+
+# attribution of LLM calls made by the current request (and the tasks it spawns)
+_usage_context: ContextVar[Dict] = ContextVar("llm_usage_context", default={})
+
+
+def set_usage_context(**kwargs):
+    """
+    Attribute the following LLM and embedding calls of this request to tenant_id, report_id and/or session_id.
+    Values not given are kept.
+    """
+    _usage_context.set({**_usage_context.get(), **{key: value for key, value in kwargs.items() if value is not None}})
+
+
+def get_usage_context() -> Dict:
+    return _usage_context.get()
+
+
+class LLMUsageLedger(metaclass=SingletonMeta):
+    """
+    Records the tokens, latency and cost of every LLM and embedding call into the `llm_usage` table,
+    and enforces per-tenant monthly budgets from LLM_TENANT_BUDGETS.
+
+    Rows are buffered in memory and written in batches by a background task, so recording never blocks a call.
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self.metrics = MetricsRegistry()
+        self._lock = Lock()
+        self._buffer: List[dict] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._spend = TTLCache(max_size=1024, ttl=self.settings.LLM_BUDGET_CACHE_TTL)
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """
+        Estimated cost in USD from LLM_MODEL_PRICES (prices per 1K tokens).
+        """
+        prices = self.settings.LLM_MODEL_PRICES.get(model, {})
+        return (prompt_tokens * prices.get("prompt", 0.0) + completion_tokens * prices.get("completion", 0.0)) / 1000
+
+    def record(
+        self,
+        model: str,
+        kind: str,
+        prompt_tokens: int,
+        completion_tokens: int = 0,
+        latency: float = 0.0,
+        name: Optional[str] = None,
+        estimated: bool = False
+    ):
+        """
+        Add a call to the ledger, attributed with the current usage context.
+
+        Parameters:
+
+            model (str): deployment name.
+
+            kind (str): "chat" or "embedding".
+
+            prompt_tokens (int): prompt tokens.
+
+            completion_tokens (int): completion tokens.
+
+            latency (float): call latency in seconds.
+
+            name (Optional[str]): call name.
+
+            estimated (bool): whether the token counts are estimated.
+        """
+        if not self.settings.LLM_USAGE_LEDGER_ENABLED:
+            return
+        context = get_usage_context()
+        cost = self.cost(model, prompt_tokens, completion_tokens)
+        usage = {
+            "tenant_id": context.get("tenant_id"),
+            "report_id": context.get("report_id"),
+            "session_id": context.get("session_id"),
+            "name": name,
+            "model": model,
+            "kind": kind,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "estimated": estimated,
+            "latency": latency,
+            "cost": cost,
+            "created_at": datetime.now(),
+        }
+        with self._lock:
+            self._buffer.append(usage)
+            # keep the cached spend current between refreshes
+            if usage["tenant_id"]:
+                entry = self._spend.get_entry(str(usage["tenant_id"]))
+                if entry:
+                    entry.value += cost
+        self.metrics.incr("llm_tokens", prompt_tokens + completion_tokens, model=model, kind=kind)
+
+    async def flush(self):
+        with self._lock:
+            usages, self._buffer = self._buffer, []
+        if not usages:
+            return
+        try:
+            async with agent_db_session_scope() as db_session:
+                await LLMUsageService(db_session=db_session).add_usages(usages)
+        except Exception as e:
+            logger.error(f"error in llm usage flush: {e}")
+            # keep the rows for the next attempt, bounded so a dead database cannot exhaust memory
+            with self._lock:
+                self._buffer = (usages + self._buffer)[-self.settings.LLM_USAGE_MAX_BUFFER:]
+
+    async def __flush_loop__(self):
+        while True:
+            await asyncio.sleep(self.settings.LLM_USAGE_FLUSH_INTERVAL)
+            await self.flush()
+
+    def start(self):
+        """
+        Start the background flush loop. Called from the FastAPI lifespan hook.
+        """
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self.__flush_loop__())
+
+    async def stop(self):
+        """
+        Stop the flush loop and write the remaining rows.
+        """
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    def get_budget(self, tenant_id: UUID) -> Optional[dict]:
+        """
+        Monthly budget of the tenant, e.g. {"monthly_limit": 100.0, "economy_ratio": 0.8}, or None if unlimited.
+        """
+        budget = self.settings.LLM_TENANT_BUDGETS.get(str(tenant_id))
+        if budget is None and self.settings.LLM_DEFAULT_MONTHLY_BUDGET is not None:
+            budget = {"monthly_limit": self.settings.LLM_DEFAULT_MONTHLY_BUDGET}
+        return budget
+
+    async def get_monthly_spend(self, tenant_id: UUID) -> float:
+        """
+        Cost billed to the tenant in the current calendar month, cached for LLM_BUDGET_CACHE_TTL seconds.
+        """
+        spend = self._spend.get(str(tenant_id))
+        if spend is None:
+            month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            async with agent_db_session_scope() as db_session:
+                spend = await LLMUsageService(db_session=db_session).total_cost(tenant_id=tenant_id, since=month_start)
+            with self._lock:
+                spend += sum(usage["cost"] for usage in self._buffer if usage["tenant_id"] == tenant_id)
+            self._spend.set(str(tenant_id), spend)
+        return spend
+
+    async def check_budget(self, tenant_id: Optional[UUID]) -> BudgetStatusEnum:
+        """
+        Budget status of the tenant.
+
+        Returns:
+
+            BudgetStatusEnum: OK, ECONOMY once spend passes economy_ratio of the limit, EXCEEDED past the limit.
+        """
+        budget = self.get_budget(tenant_id) if tenant_id else None
+        if not budget or not budget.get("monthly_limit"):
+            return BudgetStatusEnum.OK
+        try:
+            spend = await self.get_monthly_spend(tenant_id)
+        except Exception as e:
+            logger.error(f"error in llm budget check: {e}")
+            return BudgetStatusEnum.OK
+
+        if spend >= budget["monthly_limit"]:
+            return BudgetStatusEnum.EXCEEDED
+        if spend >= budget["monthly_limit"] * budget.get("economy_ratio", self.settings.LLM_BUDGET_ECONOMY_RATIO):
+            return BudgetStatusEnum.ECONOMY
+        return BudgetStatusEnum.OK
+
+
+class LLMUsageCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback that records the chat model calls of agents into the LLMUsageLedger, attributed with the
+    usage context of the request like AzureOpenAIClient calls.
+
+    Tokens come from the response usage. Streamed calls, which report no usage, are estimated from the message
+    lengths (~4 characters per token) like embeddings.
+
+    Attributes:
+
+        model (str): model name, used for pricing.
+
+        name (Optional[str]): call name, e.g. the agent name.
+    """
+    # run in the caller's task, so the usage context of the request applies
+    run_inline = True
+
+    def __init__(self, model: str, name: Optional[str] = None):
+        self.model = model
+        self.name = name
+        self._runs: Dict[UUID, Tuple[float, int]] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, **kwargs):
+        characters = sum(len(str(message.content)) for batch in messages for message in batch)
+        self._runs[run_id] = (time.monotonic(), characters)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs):
+        start, prompt_characters = self._runs.pop(run_id, (time.monotonic(), 0))
+        prompt_tokens, completion_tokens = self.__usage__(response)
+        estimated = prompt_tokens is None
+        if estimated:
+            prompt_tokens = prompt_characters // 4
+            completion_tokens = sum(len(generation.text) for generations in response.generations for generation in generations) // 4
+        LLMUsageLedger().record(
+            model=self.model,
+            kind="chat",
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency=time.monotonic() - start,
+            name=self.name,
+            estimated=estimated
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._runs.pop(run_id, None)
+
+    @classmethod
+    def __usage__(cls, response: LLMResult) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Prompt and completion tokens reported by the response, or (None, None).
+        """
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    return usage["input_tokens"], usage["output_tokens"]
+        token_usage = (response.llm_output or {}).get("token_usage")
+        if token_usage:
+            return token_usage.get("prompt_tokens", 0), token_usage.get("completion_tokens", 0)
+        return None, None
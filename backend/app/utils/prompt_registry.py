@@ -0,0 +1,171 @@
+import asyncio
+import threading
+from pathlib import Path
+from threading import Lock
+from typing import Optional, List, Set, Tuple
+from app.config import get_settings
+from app.exceptions.langfuse_exceptions import PromptNotExit
+from app.utils.cache import TTLCache
+from app.utils.metrics import MetricsRegistry
+from app.utils.singleton import SingletonMeta
+from app.utils.tracing import TracingClient
+from app.utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
+
+# prompts used by ReportPrompts, QAPrompts and HighChartPrompts, warmed on startup
+PROMPT_NAMES = [
+    "chat-with-report",
+    "generate-report",
+    "generate-section-content",
+    "order-chunks",
+    "section-order-chunks",
+    "check-chunk-relevance",
+    "get-web-search-queries",
+    "get-web-search-queries-for-section",
+    "get-rag-queries",
+    "get-section-rag-queries",
+    "get-template-queries",
+    "review-sections",
+    "chat-agent-prompt",
+    "qa-agent-prompt",
+    "report-agent-prompt",
+    "generate-chart",
+]
+
+
+class PromptRegistry(metaclass=SingletonMeta):
+    """
+    Process-wide cache of Langfuse prompt templates.
+
+    - Prompts are warmed in the FastAPI lifespan hook and kept for PROMPT_CACHE_TTL seconds.
+
+    - An expired prompt is still served while it is re-fetched in a background thread (stale-while-revalidate),
+      so prompt fetches never sit on the request path once the registry is warm.
+
+    - Each prompt is versioned by label: LANGFUSE_PROMPT_LABELS overrides LANGFUSE_PROMPT_LABEL per prompt name.
+
+    - Every fetched prompt is written to PROMPT_FALLBACK_DIR, and that copy is used when Langfuse is unreachable.
+
+    Example:
+        >>> await PromptRegistry().aget_prompt_str(name="generate-report")
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self.metrics = MetricsRegistry()
+        self.cache = TTLCache(max_size=256, ttl=self.settings.PROMPT_CACHE_TTL)
+        self.fallback_dir = Path(self.settings.PROMPT_FALLBACK_DIR)
+        self._lock = Lock()
+        self._refreshing: Set[Tuple[str, str]] = set()
+
+    @property
+    def client(self):
+        # the process-wide Langfuse client, created on first use
+        return TracingClient().client
+
+    def get_label(self, name: str) -> str:
+        return self.settings.LANGFUSE_PROMPT_LABELS.get(name, self.settings.LANGFUSE_PROMPT_LABEL)
+
+    async def aget_prompt_str(self, name: str, label: Optional[str] = None) -> str:
+        """
+        Get the prompt template text.
+
+        Parameters:
+
+            name (str): prompt name in Langfuse.
+
+            label (Optional[str]): prompt label. Default is the configured label of the prompt.
+
+        Returns:
+
+            str: prompt template.
+        """
+        label = label or self.get_label(name)
+        key = (name, label)
+        entry = self.cache.get_entry(key, allow_expired=True)
+        if entry is not None:
+            if entry.expired:
+                self.metrics.incr("prompt_cache_stale", name=name)
+                self.__refresh_in_background__(name, label)
+            else:
+                self.metrics.incr("prompt_cache_hits", name=name)
+            return entry.value
+
+        # cold miss, only before the registry is warm or for prompts outside PROMPT_NAMES;
+        # the Langfuse client is blocking, so the fetch runs in a worker thread like warm and refreshes
+        self.metrics.incr("prompt_cache_misses", name=name)
+        prompt = await asyncio.to_thread(self.__fetch__, name, label)
+        if prompt is None:
+            raise PromptNotExit(name=name)
+        return prompt
+
+    def __fetch__(self, name: str, label: str) -> Optional[str]:
+        """
+        Fetch the prompt from Langfuse into the cache, falling back to the local copy.
+        """
+        try:
+            # the registry does its own caching, so bypass the SDK cache
+            prompt = self.client.get_prompt(name=name, label=label, cache_ttl_seconds=0).prompt
+        except Exception as e:
+            logger.warning(f"Failed to fetch prompt {name}@{label} from Langfuse, using local copy: {e}")
+            prompt = self.__read_fallback__(name, label)
+            if prompt is not None:
+                self.metrics.incr("prompt_fallbacks", name=name)
+                # keep serving the local copy, but try Langfuse again on the next refresh
+                self.cache.set((name, label), prompt, ttl=self.settings.PROMPT_RETRY_INTERVAL)
+            return prompt
+
+        self.cache.set((name, label), prompt)
+        self.__write_fallback__(name, label, prompt)
+        return prompt
+
+    def __refresh_in_background__(self, name: str, label: str):
+        key = (name, label)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self.__fetch__(name, label)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def __fallback_path__(self, name: str, label: str) -> Path:
+        return self.fallback_dir / f"{name}.{label}.txt"
+
+    def __read_fallback__(self, name: str, label: str) -> Optional[str]:
+        path = self.__fallback_path__(name, label)
+        if path.exists():
+            return path.read_text(encoding="utf-8")
+        return None
+
+    def __write_fallback__(self, name: str, label: str, prompt: str):
+        try:
+            self.fallback_dir.mkdir(parents=True, exist_ok=True)
+            self.__fallback_path__(name, label).write_text(prompt, encoding="utf-8")
+        except OSError as e:
+            logger.error(f"error in writing prompt fallback {name}@{label}: {e}")
+
+    async def warm(self, names: Optional[List[str]] = None):
+        """
+        Fetch all known prompts concurrently. Called from the FastAPI lifespan hook.
+        """
+        names = names or PROMPT_NAMES
+        results = await asyncio.gather(
+            *[asyncio.to_thread(self.__fetch__, name, self.get_label(name)) for name in names]
+        )
+        missing = [name for name, prompt in zip(names, results) if prompt is None]
+        if missing:
+            logger.error(f"Prompts not available from Langfuse or local copy: {missing}")
+        logger.info(f"Warmed {len(names) - len(missing)} prompts")
+
+    def invalidate(self, name: Optional[str] = None) -> int:
+        """
+        Drop cached prompts (all, or one name), e.g. after publishing a new prompt version.
+        """
+        return self.cache.clear(predicate=(lambda key: key[0] == name) if name else None)
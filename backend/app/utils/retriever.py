@@ -0,0 +1,160 @@
+import time
+import random
+import asyncio
+import httpx
+import aiohttp
+from threading import Lock
+from typing import Protocol, Optional, List, Dict, Any, Callable, Awaitable, runtime_checkable
+from azure.core.exceptions import HttpResponseError, ServiceRequestError, ServiceResponseError
+from app.config import get_settings
+from app.utils.metrics import MetricsRegistry
+from app.utils.singleton import SingletonMeta
+from app.utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
+
+
+@runtime_checkable
+class AsyncRetriever(Protocol):
+    """
+    Common interface of the research backends (Tavily, Azure AI Search, Exa and FAISS).
+
+    `aretrieve` runs the backend call under the provider's ProviderGuard, so every caller (ReportFlowService and
+    the LangChain tools) shares the same concurrency limit, deadline, retry policy and metrics per provider.
+    """
+    provider: str
+
+    async def aretrieve(self, query: str, top: int = 5, **kwargs) -> List[Any]:
+        ...
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Timeouts, connection errors, throttling and server errors are worth retrying; anything else is not.
+    """
+    if isinstance(error, (asyncio.TimeoutError, httpx.TransportError, aiohttp.ClientConnectionError, ServiceRequestError, ServiceResponseError)):
+        return True
+    status = None
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+    elif isinstance(error, aiohttp.ClientResponseError):
+        status = error.status
+    elif isinstance(error, HttpResponseError):
+        status = error.status_code
+    return status is not None and (status == 429 or status >= 500)
+
+
+class ProviderGuard:
+    """
+    Concurrency limit, deadline, bounded retry and metrics of one retrieval provider.
+
+    Attributes:
+
+        provider (str): provider name, e.g. "tavily".
+
+        concurrency (int): maximum concurrent calls of this worker to the provider.
+
+        timeout (float): deadline in seconds of each attempt, including the wait for a free slot.
+
+        max_attempts (int): attempts including the first one.
+
+        base_delay (float): backoff base in seconds.
+    """
+    def __init__(self, provider: str, concurrency: int, timeout: float, max_attempts: int, base_delay: float):
+        self.provider = provider
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.metrics = MetricsRegistry()
+        self.inflight = 0
+        self.counts = {"calls": 0, "failures": 0, "timeouts": 0, "retries": 0}
+
+    async def __attempt__(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        async with self.semaphore:
+            self.inflight += 1
+            self.metrics.set_gauge("retriever_inflight", self.inflight, provider=self.provider)
+            try:
+                return await call()
+            finally:
+                self.inflight -= 1
+                self.metrics.set_gauge("retriever_inflight", self.inflight, provider=self.provider)
+
+    async def run(self, call: Callable[[], Awaitable[Any]], name: Optional[str] = None) -> Any:
+        """
+        Run the provider call within the limits of the provider.
+
+        Parameters:
+
+            call (Callable[[], Awaitable[Any]]): the provider call.
+
+            name (Optional[str]): operation name for logs and metrics.
+
+        Returns:
+
+            Any: result of the call. Errors of the last attempt are raised.
+        """
+        self.counts["calls"] += 1
+        start = time.monotonic()
+        try:
+            for attempt in range(self.max_attempts):
+                try:
+                    return await asyncio.wait_for(self.__attempt__(call), timeout=self.timeout)
+                except Exception as e:
+                    if isinstance(e, asyncio.TimeoutError):
+                        self.counts["timeouts"] += 1
+                        self.metrics.incr("retriever_timeouts", provider=self.provider)
+                    if not is_retryable(e) or attempt == self.max_attempts - 1:
+                        self.counts["failures"] += 1
+                        self.metrics.incr("retriever_failures", provider=self.provider)
+                        raise
+                    delay = random.uniform(0, self.base_delay * 2 ** attempt)
+                    logger.warning(f"{self.provider} {name or 'call'} failed, attempt {attempt + 1}/{self.max_attempts}, retrying in {delay:.1f}s: {e!r}")
+                    self.counts["retries"] += 1
+                    self.metrics.incr("retriever_retries", provider=self.provider)
+                    await asyncio.sleep(delay)
+        finally:
+            self.metrics.observe("retriever_latency_seconds", time.monotonic() - start, provider=self.provider)
+
+    def stats(self) -> dict:
+        return {
+            **self.counts,
+            "inflight": self.inflight,
+            "concurrency": self.concurrency,
+            "timeout": self.timeout,
+        }
+
+
+class ProviderGuardRegistry(metaclass=SingletonMeta):
+    """
+    Process-wide ProviderGuard per provider.
+
+    Limits default to RETRIEVER_CONCURRENCY, RETRIEVER_TIMEOUT, RETRIEVER_MAX_ATTEMPTS and RETRIEVER_RETRY_BASE_DELAY,
+    with per-provider overrides in RETRIEVER_PROVIDER_SETTINGS.
+
+    Example:
+        >>> guard = ProviderGuardRegistry().get("tavily")
+        >>> results = await guard.run(lambda: client.search(query="..."), name="search")
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self._lock = Lock()
+        self._guards: Dict[str, ProviderGuard] = {}
+
+    def get(self, provider: str) -> ProviderGuard:
+        with self._lock:
+            if provider not in self._guards:
+                overrides = self.settings.RETRIEVER_PROVIDER_SETTINGS.get(provider, {})
+                self._guards[provider] = ProviderGuard(
+                    provider=provider,
+                    concurrency=overrides.get("concurrency", self.settings.RETRIEVER_CONCURRENCY),
+                    timeout=overrides.get("timeout", self.settings.RETRIEVER_TIMEOUT),
+                    max_attempts=overrides.get("max_attempts", self.settings.RETRIEVER_MAX_ATTEMPTS),
+                    base_delay=overrides.get("base_delay", self.settings.RETRIEVER_RETRY_BASE_DELAY),
+                )
+            return self._guards[provider]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {provider: guard.stats() for provider, guard in self._guards.items()}
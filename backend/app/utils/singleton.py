@@ -1,4 +1,4 @@
-from threading import Lock
+from threading import RLock
 
 
 class SingletonMeta(type):
@@ -8,7 +8,8 @@ class SingletonMeta(type):
 
     _instances = {}
 
-    _lock: Lock = Lock()
+    # re-entrant so a singleton's __init__ can itself create other singletons
+    _lock: RLock = RLock()
 
     def __call__(cls, *args, **kwargs):
         with cls._lock:
@@ -1,48 +1,169 @@
-import json
+import httpx
 from datetime import datetime
+from threading import Lock
 from typing import Optional, List
 from pydantic import BaseModel
-from tavily.async_tavily import AsyncTavilyClient
-from app.config import get_settings
-from app.utils.langfuse_client import StatefulTraceClient
+from app.config import Settings, get_settings
+from app.utils.metrics import MetricsRegistry
+from app.utils.singleton import SingletonMeta
+from app.utils.tracing import TraceHandle
+from app.utils.web_search_cache import WebSearchCache
+from app.utils.retriever import ProviderGuardRegistry
+from app.utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
 
 class TavilySearchContextResponse(BaseModel):
     url: str
     content: str
+    score: Optional[float] = None
+
+
+class TavilyClientPool(metaclass=SingletonMeta):
+    """
+    Process-wide pooled connection to the Tavily API.
+
+    One httpx client with keep-alive connections is shared by every TavilyClient. Concurrency is bounded by
+    the "tavily" ProviderGuard of TavilyClient.
+    """
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or get_settings()
+        self._lock = Lock()
+        self._http_client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        with self._lock:
+            if self._http_client is None or self._http_client.is_closed:
+                self._http_client = httpx.AsyncClient(
+                    base_url=self.settings.TAVILY_API_URL,
+                    limits=httpx.Limits(
+                        max_connections=self.settings.TAVILY_MAX_CONNECTIONS,
+                        max_keepalive_connections=self.settings.TAVILY_MAX_CONNECTIONS,
+                    ),
+                    timeout=httpx.Timeout(self.settings.TAVILY_TIMEOUT),
+                )
+            return self._http_client
+
+    async def post(self, path: str, payload: dict) -> dict:
+        response = await self.http_client.post(path, json={"api_key": self.settings.TAVILY_API_KEY, **payload})
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self):
+        """
+        Close the shared connection pool. Called on server shutdown.
+        """
+        with self._lock:
+            http_client = self._http_client
+            self._http_client = None
+        if http_client and not http_client.is_closed:
+            await http_client.aclose()
+            logger.info("Closed Tavily connection pool")
+
 
 class TavilyClient:
+    provider = "tavily"
     
     def __init__(
         self,
-        langfuse_trace: Optional[StatefulTraceClient] = None
+        langfuse_trace: Optional[TraceHandle] = None,
+        tenant_id: Optional[str] = None
     ):
         self.settings = get_settings()
-        self.client = AsyncTavilyClient(api_key=self.settings.TAVILY_API_KEY)
+        self.pool = TavilyClientPool()
+        self.cache = WebSearchCache()
+        self.metrics = MetricsRegistry()
         self.langfuse_trace = langfuse_trace
+        self.tenant_id = tenant_id
+    
+    async def search(
+        self,
+        query: str,
+        search_depth: str = "basic",
+        max_results: int = 5,
+        cache: bool = True,
+        stale_while_revalidate: bool = False,
+        **kwargs
+    ) -> List[TavilySearchContextResponse]:
+        """
+        Search the web through the Tavily search endpoint, with the results cached in WebSearchCache.
+        
+        Parameters:
+        
+            query (str): search query.
+            
+            search_depth (str): "basic" or "advanced". Default is "basic".
+            
+            max_results (int): number of results. Default is 5.
+            
+            cache (bool): use the web search cache. Default is True.
+            
+            stale_while_revalidate (bool): serve stale cached results right away and refresh them in the background.
+            For interactive paths. Default is False.
+            
+        Returns:
         
-    async def get_search_context(self, **kwargs) -> List[TavilySearchContextResponse]:
+            List[TavilySearchContextResponse]: results with Tavily's relevance score, best first.
+            The total content is kept within TAVILY_MAX_CONTEXT_TOKENS (~4 characters per token).
+        """
         langfuse_span = None
         
         if self.langfuse_trace:
             langfuse_span = self.langfuse_trace.span(
                 name="tavily-search-context",
-                input=kwargs,
+                input={"query": query, "search_depth": search_depth, "max_results": max_results, **kwargs},
                 start_time=datetime.now()
             )
-            
-        results = await self.client.get_search_context(**kwargs)
-        results = json.loads(json.loads(results))
+        
+        # every request to Tavily, including background refreshes of stale results, runs under the provider guard
+        fetch = lambda: ProviderGuardRegistry().get(self.provider).run(
+            lambda: self.__fetch__(query=query, search_depth=search_depth, max_results=max_results, **kwargs),
+            name="search"
+        )
+        if cache:
+            results, cache_status = await self.cache.get_or_fetch(
+                fetch,
+                query=query,
+                search_depth=search_depth,
+                max_results=max_results,
+                tenant_id=self.tenant_id,
+                stale_while_revalidate=stale_while_revalidate,
+                **kwargs
+            )
+        else:
+            results, cache_status = await fetch(), "disabled"
+        results = [TavilySearchContextResponse(**result) for result in results]
         
         if langfuse_span:
             langfuse_span.update(
                 output=results,
+                metadata={"cache": cache_status},
                 end_time=datetime.now()
             )
         
-        return [
-            TavilySearchContextResponse(
-                url=json.loads(result)['url'] if json.loads(result)['url'] else "",
-                content=json.loads(result)['content']
-            )
-            for result in results
-        ]
\ No newline at end of file
+        return results
+    
+    async def __fetch__(self, query: str, search_depth: str, max_results: int, **kwargs) -> List[dict]:
+        start = datetime.now()
+        response = await self.pool.post(
+            "/search",
+            {"query": query, "search_depth": search_depth, "max_results": max_results, **kwargs}
+        )
+        self.metrics.observe("tavily_latency_seconds", (datetime.now() - start).total_seconds(), search_depth=search_depth)
+        
+        results = []
+        remaining = self.settings.TAVILY_MAX_CONTEXT_TOKENS * 4
+        for result in response.get("results", []):
+            content = result.get("content") or ""
+            if len(content) > remaining:
+                break
+            remaining -= len(content)
+            results.append({"url": result.get("url") or "", "content": content, "score": result.get("score")})
+        return results
+    
+    async def aretrieve(self, query: str, top: int = 5, search_depth: str = "advanced", **kwargs) -> List[TavilySearchContextResponse]:
+        """
+        AsyncRetriever interface: `search`, whose requests to Tavily run under the Tavily provider guard.
+        """
+        return await self.search(query=query, search_depth=search_depth, max_results=top, **kwargs)
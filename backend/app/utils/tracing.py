@@ -0,0 +1,276 @@
+import time
+import uuid
+import queue
+import random
+import asyncio
+import threading
+from threading import Lock
+from typing import Optional, Dict, Any, Callable
+from pydantic import BaseModel
+from app.config import get_settings
+from app.utils.metrics import MetricsRegistry
+from app.utils.singleton import SingletonMeta
+from app.utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
+
+# only these fields carry user payloads; usage, timestamps, model, name etc. are passed through untouched
+PAYLOAD_FIELDS = ("input", "output", "metadata")
+
+
+class ObservationHandle:
+    """
+    Handle of a span or generation. Updates are queued, so they never block the caller.
+    """
+    def __init__(self, tracer: "TracingClient", id: str, trace_id: str, kind: str):
+        self.tracer = tracer
+        self.id = id
+        self.trace_id = trace_id
+        self.kind = kind
+
+    def update(self, **kwargs):
+        self.tracer.submit(lambda **fields: self.tracer.observation_client(self.kind, self.id, self.trace_id).update(**fields), kwargs)
+
+    def end(self, **kwargs):
+        self.tracer.submit(lambda **fields: self.tracer.observation_client(self.kind, self.id, self.trace_id).end(**fields), kwargs)
+
+    def span(self, **kwargs) -> "ObservationHandle":
+        return self.tracer.create_observation("span", self.trace_id, parent=lambda: self.tracer.observation_client(self.kind, self.id, self.trace_id), **kwargs)
+
+    def generation(self, **kwargs) -> "ObservationHandle":
+        return self.tracer.create_observation("generation", self.trace_id, parent=lambda: self.tracer.observation_client(self.kind, self.id, self.trace_id), **kwargs)
+
+
+class TraceHandle:
+    """
+    Drop-in replacement of langfuse StatefulTraceClient for the calls this app makes
+    (span, generation, event, update, get_langchain_handler), backed by the TracingClient queue.
+    """
+    def __init__(self, tracer: "TracingClient", id: str):
+        self.tracer = tracer
+        self.id = id
+
+    def __trace_client__(self):
+        return self.tracer.trace_client(self.id)
+
+    def update(self, **kwargs):
+        self.tracer.submit(lambda **fields: self.__trace_client__().update(**fields), kwargs)
+
+    def span(self, **kwargs) -> ObservationHandle:
+        return self.tracer.create_observation("span", self.id, parent=self.__trace_client__, **kwargs)
+
+    def generation(self, **kwargs) -> ObservationHandle:
+        return self.tracer.create_observation("generation", self.id, parent=self.__trace_client__, **kwargs)
+
+    def event(self, **kwargs):
+        self.tracer.submit(lambda **fields: self.__trace_client__().event(**fields), kwargs)
+
+    def get_langchain_handler(self, update_parent: bool = False):
+        """
+        Langchain callback handler bound to this trace, or None when tracing is disabled.
+
+        A handle only exists for a sampled trace, so the handler follows the trace's sampling decision.
+        Its events go through the SDK's own bounded queue and are truncated there (see TracingClient.mask).
+        """
+        return self.tracer.langchain_handler(self.id, update_parent=update_parent)
+
+
+class TracingClient(metaclass=SingletonMeta):
+    """
+    Non-blocking, sampled Langfuse tracing.
+
+    - One Langfuse client per process instead of one per service.
+
+    - Traces are sampled per trace name (LANGFUSE_SAMPLE_RATES, default LANGFUSE_SAMPLE_RATE). Unsampled traces
+      return None, so every `if self.langfuse_trace:` guard skips the tracing work entirely.
+
+    - Trace, span and generation calls truncate their payloads (LANGFUSE_MAX_STRING_LENGTH, LANGFUSE_MAX_LIST_ITEMS,
+      LANGFUSE_MAX_DEPTH) and enqueue them into a bounded queue; a worker thread hands them to the SDK.
+      When the queue is full, the event is dropped and counted.
+
+    - Langchain handlers are only handed out for sampled traces, and their payloads are truncated by the SDK's mask.
+
+    - Continuing a trace by id never fetches it from Langfuse.
+
+    Overhead (time spent on the caller, time spent in the worker, dropped events) is reported by `stats()`.
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self.metrics = MetricsRegistry()
+        self._lock = Lock()
+        self._client = None
+        self._queue: queue.Queue = queue.Queue(maxsize=self.settings.LANGFUSE_QUEUE_SIZE)
+        self._worker: Optional[threading.Thread] = None
+        self._counters = {"sampled": 0, "unsampled": 0, "enqueued": 0, "dropped": 0, "failed": 0}
+        self._caller_seconds = 0.0
+        self._worker_seconds = 0.0
+
+    @property
+    def client(self):
+        from langfuse import Langfuse
+        with self._lock:
+            if self._client is None:
+                self._client = Langfuse(
+                    secret_key=self.settings.LANGFUSE_SECRET_KEY,
+                    public_key=self.settings.LANGFUSE_PUBLIC_KEY,
+                    host=self.settings.LANGFUSE_HOST,
+                    mask=self.mask,
+                )
+            return self._client
+
+    def trace_client(self, trace_id: str):
+        from langfuse.client import StatefulTraceClient, StateType
+        return StatefulTraceClient(self.client.client, trace_id, StateType.TRACE, trace_id, self.client.task_manager)
+
+    def observation_client(self, kind: str, id: str, trace_id: str):
+        from langfuse.client import StatefulSpanClient, StatefulGenerationClient, StateType
+        client_class = StatefulGenerationClient if kind == "generation" else StatefulSpanClient
+        return client_class(self.client.client, id, StateType.OBSERVATION, trace_id, self.client.task_manager)
+
+    def langchain_handler(self, trace_id: str, update_parent: bool = False):
+        if not self.settings.LANGFUSE_TRACING_ENABLED:
+            return None
+        from langfuse.callback import CallbackHandler
+        return CallbackHandler(stateful_client=self.trace_client(trace_id), update_stateful_client=update_parent)
+
+    def mask(self, data: Any) -> Any:
+        """
+        Truncate the input and output of every event in the SDK's ingestion thread, for the events of langchain
+        handlers, which do not go through `submit`. Events that did are already truncated and left as they are.
+        """
+        return self.truncate(data)
+
+    def __sample__(self, name: Optional[str]) -> bool:
+        rate = self.settings.LANGFUSE_SAMPLE_RATES.get(name or "", self.settings.LANGFUSE_SAMPLE_RATE)
+        return rate >= 1.0 or random.random() < rate
+
+    def start_trace(self, args: Optional[Dict]) -> Optional[TraceHandle]:
+        """
+        Start (or continue) a trace.
+        If args contains "id", the trace with that id is continued and other fields are ignored.
+        Otherwise, a trace is created with the given args if it is sampled.
+
+        Parameters:
+
+            args (Optional[Dict]): config arguments for the trace.
+
+        Returns:
+
+            Optional[TraceHandle]: trace handle, or None if tracing is disabled or the trace is not sampled.
+        """
+        if args is None or not self.settings.LANGFUSE_TRACING_ENABLED:
+            return None
+
+        if "id" in args:
+            # the caller's trace was already sampled
+            return TraceHandle(self, str(args["id"]))
+
+        if not self.__sample__(args.get("name")):
+            self._counters["unsampled"] += 1
+            return None
+        self._counters["sampled"] += 1
+
+        trace_id = str(uuid.uuid4())
+        self.submit(lambda **fields: self.client.trace(id=trace_id, **fields), args)
+        return TraceHandle(self, trace_id)
+
+    def create_observation(self, kind: str, trace_id: str, parent: Callable, **kwargs) -> ObservationHandle:
+        id = kwargs.pop("id", None) or str(uuid.uuid4())
+        self.submit(lambda **fields: getattr(parent(), kind)(id=id, **fields), kwargs)
+        return ObservationHandle(self, id, trace_id, kind)
+
+    def submit(self, task: Callable, fields: Optional[Dict] = None):
+        """
+        Queue a tracing call for the worker thread, dropping it if the queue is full.
+
+        The fields are truncated here, on the caller, so the queue only holds bounded copies of the payloads
+        and the worker never reads objects the caller may still be mutating.
+        """
+        start = time.perf_counter()
+        self.__ensure_worker__()
+        try:
+            if self._queue.full():
+                # skip the truncation of an event that would be dropped anyway
+                raise queue.Full
+            fields = self.truncate_fields(fields or {})
+            self._queue.put_nowait(lambda: task(**fields))
+            self._counters["enqueued"] += 1
+        except queue.Full:
+            self._counters["dropped"] += 1
+            self.metrics.incr("tracing_dropped")
+        self._caller_seconds += time.perf_counter() - start
+
+    def __ensure_worker__(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self.__work__, name="tracing-worker", daemon=True)
+                    self._worker.start()
+
+    def __work__(self):
+        while True:
+            task = self._queue.get()
+            start = time.perf_counter()
+            try:
+                task()
+            except Exception as e:
+                self._counters["failed"] += 1
+                logger.error(f"error in tracing: {e}")
+            finally:
+                self._worker_seconds += time.perf_counter() - start
+                self._queue.task_done()
+
+    def truncate_fields(self, kwargs: Dict) -> Dict:
+        return {key: self.truncate(value) if key in PAYLOAD_FIELDS else value for key, value in kwargs.items()}
+
+    def truncate(self, value: Any, depth: int = 0) -> Any:
+        """
+        Bounded copy of a payload: long strings are cut, long lists shortened and deep structures elided.
+        """
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        if depth >= self.settings.LANGFUSE_MAX_DEPTH:
+            return "[truncated]"
+        if isinstance(value, str):
+            limit = self.settings.LANGFUSE_MAX_STRING_LENGTH
+            if len(value) <= limit:
+                return value
+            # the marker counts towards the limit, so truncating twice changes nothing
+            keep = max(limit - len(f"... [{len(value)} chars truncated]"), 0)
+            return value[:keep] + f"... [{len(value) - keep} chars truncated]"
+        if isinstance(value, BaseModel):
+            return self.truncate(value.model_dump(), depth)
+        if isinstance(value, dict):
+            return {str(key): self.truncate(item, depth + 1) for key, item in value.items()}
+        if isinstance(value, (list, tuple, set)):
+            items = list(value)
+            limit = self.settings.LANGFUSE_MAX_LIST_ITEMS
+            if len(items) <= limit:
+                return [self.truncate(item, depth + 1) for item in items]
+            # the marker takes the place of the last item, so truncating twice changes nothing
+            truncated = [self.truncate(item, depth + 1) for item in items[:max(limit - 1, 0)]]
+            truncated.append(f"[{len(items) - len(truncated)} items truncated]")
+            return truncated
+        if hasattr(value, "page_content"):
+            # langchain Document
+            return self.truncate({"page_content": value.page_content, "metadata": getattr(value, "metadata", {})}, depth)
+        return self.truncate(str(value), depth)
+
+    async def flush(self):
+        """
+        Wait for the queue to drain and flush the SDK. Called on server shutdown.
+        """
+        if self._worker is None:
+            return
+        await asyncio.to_thread(self._queue.join)
+        if self._client is not None:
+            await asyncio.to_thread(self._client.flush)
+
+    def stats(self) -> dict:
+        return {
+            **self._counters,
+            "queue_size": self._queue.qsize(),
+            "caller_seconds": self._caller_seconds,
+            "worker_seconds": self._worker_seconds,
+            "caller_us_per_event": self._caller_seconds / self._counters["enqueued"] * 1e6 if self._counters["enqueued"] else 0.0,
+        }
@@ -0,0 +1,105 @@
+import re
+import asyncio
+import numpy as np
+from typing import List, Dict
+from app.config import get_settings
+from app.utils.exa_client import ExaClient, ExaGetContentResponse
+from app.utils.openai.client_registry import AzureOpenAIClientRegistry
+from app.utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
+
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"\'(\[])|\n{2,}')
+
+
+class URLHighlightIndex:
+    """
+    In-memory sentence window index of user specified URLs, to answer highlight queries locally.
+
+    Each page is fetched once (ExaClient.get_texts), split into sentences and grouped into windows of
+    URL_HIGHLIGHT_WINDOW_SENTENCES consecutive sentences. Windows are embedded once, and every query is answered
+    by cosine similarity against them, returning the top windows per URL like Exa's `highlightsPerUrl`.
+
+    Example:
+        >>> index = URLHighlightIndex(urls=["https://example.com/esg"], exa_client=ExaClient())
+        >>> await index.build()
+        >>> await index.search(query="carbon targets", top=3)
+        [ExaGetContentResponse(url='https://example.com/esg', highlight='...')]
+    """
+    def __init__(self, urls: List[str], exa_client: ExaClient):
+        self.settings = get_settings()
+        self.urls = urls
+        self.exa_client = exa_client
+        # one embeddings instance, so the windows and the queries are embedded by the same deployment
+        self.embeddings = AzureOpenAIClientRegistry().get_embeddings()
+        self.windows: List[ExaGetContentResponse] = []
+        self.vectors = None
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def split_sentences(cls, text: str) -> List[str]:
+        sentences = [" ".join(sentence.split()) for sentence in SENTENCE_SPLIT_PATTERN.split(text)]
+        return [sentence for sentence in sentences if len(sentence) > 1]
+
+    def __windows__(self, url: str, text: str) -> List[ExaGetContentResponse]:
+        sentences = self.split_sentences(text)
+        size = self.settings.URL_HIGHLIGHT_WINDOW_SENTENCES
+        step = max(1, size - self.settings.URL_HIGHLIGHT_WINDOW_OVERLAP)
+        windows = [
+            ExaGetContentResponse(url=url, highlight=" ".join(sentences[start:start + size]))
+            for start in range(0, max(1, len(sentences) - size + step), step)
+            if sentences[start:start + size]
+        ]
+        return windows[:self.settings.URL_HIGHLIGHT_MAX_WINDOWS_PER_URL]
+
+    async def build(self):
+        """
+        Fetch the pages and embed their sentence windows. Runs once; concurrent callers wait for the first build.
+        """
+        async with self._lock:
+            if self.vectors is not None:
+                return
+            texts = await self.exa_client.get_texts(self.urls)
+            windows = [window for url, text in texts.items() if text for window in self.__windows__(url, text)]
+
+            if windows:
+                embeddings = await self.embeddings.aembed_documents(
+                    [window.highlight for window in windows]
+                )
+                vectors = np.asarray(embeddings, dtype=np.float32)
+                vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+            else:
+                vectors = np.zeros((0, 0), dtype=np.float32)
+
+            self.windows = windows
+            self.vectors = vectors
+            logger.info(f"Built url highlight index with {len(windows)} windows from {len(texts)} urls")
+
+    async def search(self, query: str, top: int = 5) -> List[ExaGetContentResponse]:
+        """
+        Get the most relevant windows to the query.
+
+        Parameters:
+
+            query (str): search query.
+
+            top (int): number of windows per URL. Default is 5.
+
+        Returns:
+
+            List[ExaGetContentResponse]: windows grouped by URL, best first within each URL.
+        """
+        await self.build()
+        if not self.windows:
+            return []
+
+        vector = np.asarray(await self.embeddings.aembed_query(query), dtype=np.float32)
+        scores = self.vectors @ (vector / (np.linalg.norm(vector) + 1e-12))
+
+        selected: Dict[str, List[int]] = {}
+        for index in np.argsort(-scores):
+            window = self.windows[index]
+            selected.setdefault(window.url, [])
+            if len(selected[window.url]) < top:
+                selected[window.url].append(int(index))
+        return [self.windows[index] for indices in selected.values() for index in indices]
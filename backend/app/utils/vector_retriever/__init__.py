@@ -1,2 +1,6 @@
 from .azureaisearch import AzureAISearchVectorRetriever
-from .faiss import FaissVectorRetriever, Document
\ No newline at end of file
+from .faiss import FaissVectorRetriever, Document
+from .client_registry import AzureAISearchClientRegistry
+from .search_cache import AzureAISearchResultCache
+from .index_cache import FaissIndexCache
+from .faiss_store import MmapFAISS, SQLiteDocstore
@@ -1,11 +1,16 @@
-import os
 import re
+import time
 from datetime import datetime
 from typing import Optional, List
 from pydantic import BaseModel
-from azure.search.documents import SearchClient
-from azure.core.credentials import AzureKeyCredential
-from app.utils.langfuse_client import StatefulTraceClient
+from azure.search.documents.models import VectorizedQuery
+from app.config import get_settings
+from app.enums.search_enum import SearchModeEnum
+from app.utils.tracing import TraceHandle
+from app.utils.retriever import ProviderGuardRegistry
+from app.utils.openai.client_registry import AzureOpenAIClientRegistry
+from .client_registry import AzureAISearchClientRegistry
+from .search_cache import AzureAISearchResultCache
 
 class AzureAISearchResponse(BaseModel):
     score: float
@@ -15,20 +20,21 @@ class AzureAISearchResponse(BaseModel):
     
 
 class AzureAISearchVectorRetriever:
+    provider = "azure-ai-search"
     
     def __init__(
         self,
         service_name,
         index_name,
-        langfuse_trace: Optional[StatefulTraceClient] = None,
+        langfuse_trace: Optional[TraceHandle] = None,
         **kwargs
     ):
-        self.retriever = SearchClient(
-            endpoint=f"https://{service_name}.search.windows.net",
-            index_name=index_name,
-            credential=AzureKeyCredential(os.environ.get('AZURE_AI_SEARCH_API_KEY', "")),
-            api_version=os.environ.get('AZURE_AI_SEARCH_API_VERSION', "2024-05-01-preview")
-        )
+        # pooled async client, shared by every retriever of the same index
+        self.retriever = AzureAISearchClientRegistry().get_client(service_name=service_name, index_name=index_name)
+        self.settings = get_settings()
+        self.service_name = service_name
+        self.index_name = index_name
+        self.result_cache = AzureAISearchResultCache()
         self.langfuse_trace = langfuse_trace
     
     def __clean_result_content__(self, text):
@@ -57,9 +63,17 @@ class AzureAISearchVectorRetriever:
 
         return text
     
-    async def run(self, query: str, top: int = 5, **kwargs) -> List[AzureAISearchResponse]:
+    async def run(
+        self,
+        query: str,
+        top: int = 5,
+        cache: bool = True,
+        mode: Optional[SearchModeEnum] = None,
+        **kwargs
+    ) -> List[AzureAISearchResponse]:
         """
         Retrieve the most relevant chunks to the query.
+        Results are served from AzureAISearchResultCache when the same query was run on the index recently.
         
         Parameters:
         
@@ -67,6 +81,15 @@ class AzureAISearchVectorRetriever:
             
             top (int): number of chunks to fetch. Default is 5.
             
+            cache (bool): use the result cache. Default is True.
+            
+            mode (Optional[SearchModeEnum]): search mode. Default is AZURE_AI_SEARCH_DEFAULT_MODE.
+            
+                - TEXT: keyword search.
+                - VECTOR: vector search on the query embedding (embedded locally, cached).
+                - HYBRID: keyword and vector search, fused by Azure AI Search.
+                - SEMANTIC: keyword search reranked by the semantic ranker, with extractive captions.
+            
         Returns:
             
             List of chunks in AzureAISearchResponse.
@@ -79,6 +102,7 @@ class AzureAISearchVectorRetriever:
             }]
         """
         
+        mode = SearchModeEnum(mode or self.settings.AZURE_AI_SEARCH_DEFAULT_MODE)
         langfuse_span = None
         
         if self.langfuse_trace:
@@ -87,35 +111,81 @@ class AzureAISearchVectorRetriever:
                 input={
                     'query': query,
                     'top': top,
+                    'mode': mode.value,
                     **kwargs
                 },
                 start_time=datetime.now()
             )
             
-        results = self.retriever.search(
-            search_text=query,
-            top=top,
-            query_type="semantic",
-            query_caption="extractive",
-            semantic_configuration_name="my-semantic-config",
-            **kwargs
-        )
+        generation = await self.result_cache.get_generation(self.service_name, self.index_name)
+        cache_key = self.result_cache.make_key(self.service_name, self.index_name, query, top, generation=generation, mode=mode.value, **kwargs)
+        final_results = self.result_cache.get(cache_key) if cache else None
+        cache_hit = final_results is not None
         
-        final_results = [
-            AzureAISearchResponse(
-                source=result['FilePath'],
-                content=self.__clean_result_content__(result['Content']),
-                highlights=self.__clean_result_content__(result["@search.captions"][0].text),
-                score=result["@search.reranker_score"]
-            )
-            for i, result in enumerate(results)
-        ]
+        if not cache_hit:
+            start = time.monotonic()
+            final_results = await self.__search__(query=query, top=top, mode=mode, **kwargs)
+            self.result_cache.set(cache_key, final_results, latency=time.monotonic() - start)
         
         if langfuse_span:
             langfuse_span.update(
                 output=final_results,
+                metadata={"cache_hit": cache_hit},
                 end_time=datetime.now()
             )
                 
         return final_results
-        
\ No newline at end of file
+    
+    async def aretrieve(self, query: str, top: int = 5, **kwargs) -> List[AzureAISearchResponse]:
+        """
+        AsyncRetriever interface: `run` under the Azure AI Search provider guard.
+        """
+        return await ProviderGuardRegistry().get(self.provider).run(
+            lambda: self.run(query=query, top=top, **kwargs),
+            name=self.index_name
+        )
+    
+    async def __search__(self, query: str, top: int, mode: SearchModeEnum, **kwargs) -> List[AzureAISearchResponse]:
+        search_args = {"top": top}
+        
+        if mode != SearchModeEnum.VECTOR:
+            search_args["search_text"] = query
+        
+        if mode in (SearchModeEnum.VECTOR, SearchModeEnum.HYBRID):
+            search_args["vector_queries"] = [
+                VectorizedQuery(
+                    vector=await AzureOpenAIClientRegistry().get_embeddings().aembed_query(query),
+                    k_nearest_neighbors=top,
+                    fields=self.settings.AZURE_AI_SEARCH_VECTOR_FIELD
+                )
+            ]
+        
+        if mode == SearchModeEnum.SEMANTIC:
+            search_args.update(
+                query_type="semantic",
+                query_caption="extractive",
+                semantic_configuration_name=self.settings.AZURE_AI_SEARCH_SEMANTIC_CONFIGURATION
+            )
+        
+        results = await self.retriever.search(**search_args, **kwargs)
+        
+        final_results = [
+            AzureAISearchResponse(
+                source=result['FilePath'],
+                content=self.__clean_result_content__(result['Content']),
+                highlights=self.__get_highlights__(result),
+                # reranker score only exists in semantic mode
+                score=result.get("@search.reranker_score") or result["@search.score"]
+            )
+            async for result in results
+        ]
+        return final_results
+    
+    def __get_highlights__(self, result: dict) -> str:
+        """
+        Extractive caption in semantic mode, otherwise the beginning of the content.
+        """
+        captions = result.get("@search.captions")
+        if captions:
+            return self.__clean_result_content__(captions[0].text)
+        return self.__clean_result_content__(result['Content'][:self.settings.AZURE_AI_SEARCH_HIGHLIGHT_LENGTH])
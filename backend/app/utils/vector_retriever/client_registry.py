@@ -0,0 +1,59 @@
+import asyncio
+from threading import Lock
+from typing import Optional, Dict, Tuple
+from azure.core.credentials import AzureKeyCredential
+from azure.search.documents.aio import SearchClient
+from app.config import Settings, get_settings
+from app.utils.singleton import SingletonMeta
+from app.utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
+
+
+class AzureAISearchClientRegistry(metaclass=SingletonMeta):
+    """
+    Process-wide registry of async Azure AI Search clients, one per (service_name, index_name).
+
+    Each client keeps its own connection pool, so retrievers built per query or per message reuse
+    the same keep-alive connections instead of opening new ones.
+
+    Example:
+        >>> client = AzureAISearchClientRegistry().get_client(service_name="my-service", index_name="my-index")
+        >>> results = await client.search(search_text="query", top=5)
+    """
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or get_settings()
+        self._lock = Lock()
+        self._clients: Dict[Tuple[str, str], SearchClient] = {}
+
+    def get_client(self, service_name: str, index_name: str) -> SearchClient:
+        """
+        Get the pooled SearchClient of the index.
+
+        Parameters:
+
+            service_name (str): Azure AI Search service name.
+
+            index_name (str): index name.
+        """
+        key = (service_name, index_name)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = SearchClient(
+                    endpoint=f"https://{service_name}.search.windows.net",
+                    index_name=index_name,
+                    credential=AzureKeyCredential(self.settings.AZURE_AI_SEARCH_API_KEY),
+                    api_version=self.settings.AZURE_AI_SEARCH_API_VERSION
+                )
+            return self._clients[key]
+
+    async def aclose(self):
+        """
+        Close all clients. Called on server shutdown.
+        """
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients = {}
+        await asyncio.gather(*[client.close() for client in clients], return_exceptions=True)
+        if clients:
+            logger.info(f"Closed {len(clients)} Azure AI Search clients")
@@ -1,21 +1,25 @@
 import os
+import asyncio
 from typing import Optional, Any, List
 from datetime import datetime
 from langchain_core.documents import Document
-from langchain_community.vectorstores import FAISS
-from langchain_openai import AzureOpenAIEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from app.config import get_settings
 from app.utils.logging import AppLogger
-from app.utils.langfuse_client import StatefulTraceClient
+from app.utils.tracing import TraceHandle
+from app.utils.retriever import ProviderGuardRegistry
+from .index_cache import FaissIndexCache
+from .faiss_store import MmapFAISS
+from app.utils.openai.client_registry import AzureOpenAIClientRegistry
 
 logger = AppLogger().get_logger()
 
 class FaissVectorRetriever:
+    provider = "faiss"
     
     def __init__(
         self,
-        langfuse_trace: Optional[StatefulTraceClient] = None,
+        langfuse_trace: Optional[TraceHandle] = None,
         file_path: Optional[str] = "",
         embeddings: Optional[Any] = None,
         splitters: Optional[Any] = None,
@@ -23,10 +27,7 @@ class FaissVectorRetriever:
     ):
         self.settings = get_settings()
         if embeddings == None:
-            self.embeddings = AzureOpenAIEmbeddings(
-                azure_deployment=self.settings.AZURE_EMBEDDING_MODEL,
-                openai_api_version=self.settings.AZURE_OPENAI_API_VERSION
-            )
+            self.embeddings = AzureOpenAIClientRegistry().get_embeddings()
         else:
             self.embeddings = embeddings
         
@@ -39,14 +40,14 @@ class FaissVectorRetriever:
             self.splitters = splitters
         
         self.file_path = file_path_prefix + file_path
+        self.index_cache = FaissIndexCache()
+        self.db: Optional[MmapFAISS] = None
+        # whether self.db is the instance shared through the index cache, which is never written to
+        self.shared = False
         if self.file_path and os.path.exists(self.file_path):
-            self.db = FAISS.load_local(
-                self.file_path,
-                allow_dangerous_deserialization=True,
-                embeddings=self.embeddings
-            )
-        else:
-            self.db: FAISS = None
+            # shared with every retriever of the same index, loaded from disk only when it changed
+            self.db = self.index_cache.get(self.file_path, embeddings=self.embeddings)
+            self.shared = self.db is not None
         
         self.langfuse_trace = langfuse_trace
     
@@ -73,9 +74,52 @@ class FaissVectorRetriever:
         
         return result
     
+    async def aretrieve(self, query: str, top: int = 5, **kwargs) -> List[Document]:
+        """
+        AsyncRetriever interface: `asimilarity_search` under the FAISS provider guard. Empty when there is no index.
+        """
+        if not self.db:
+            return []
+        return await ProviderGuardRegistry().get(self.provider).run(
+            lambda: self.asimilarity_search(query=query, k=top, **kwargs),
+            name="similarity-search"
+        )
+    
+    def __batch__(self, docs: List[Document]) -> List[List[Document]]:
+        """
+        Split the documents into embedding batches of at most FAISS_EMBEDDING_BATCH_SIZE texts and
+        FAISS_EMBEDDING_BATCH_TOKENS estimated tokens (~4 characters per token).
+        """
+        batches, batch, tokens = [], [], 0
+        for doc in docs:
+            doc_tokens = len(doc.page_content) // 4 + 1
+            if batch and (len(batch) >= self.settings.FAISS_EMBEDDING_BATCH_SIZE or tokens + doc_tokens > self.settings.FAISS_EMBEDDING_BATCH_TOKENS):
+                batches.append(batch)
+                batch, tokens = [], 0
+            batch.append(doc)
+            tokens += doc_tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def __embed__(self, docs: List[Document]) -> List[List[float]]:
+        """
+        Embed the documents in batches, at most FAISS_EMBEDDING_CONCURRENCY requests in flight.
+        """
+        semaphore = asyncio.Semaphore(self.settings.FAISS_EMBEDDING_CONCURRENCY)
+
+        async def embed(batch: List[Document]) -> List[List[float]]:
+            async with semaphore:
+                # one request per batch, the batches already fit the request limits
+                return await self.embeddings.aembed_documents([doc.page_content for doc in batch], chunk_size=len(batch))
+
+        results = await asyncio.gather(*[embed(batch) for batch in self.__batch__(docs)])
+        return [vector for vectors in results for vector in vectors]
+
     async def add_documents(self, documents: List[Document], save_local: bool = True, split: bool = True, **kwargs) -> List[str]:
         """
         Add documents to FAISS vector store.
+        The chunks are embedded in concurrent batches, then added to the index in one call.
         
         Parameters:
             documents (List[Document]): documents to add
@@ -83,19 +127,44 @@ class FaissVectorRetriever:
             split (bool): Whether to split document with splitters. Default to True.
         """
         if split == True:
-            docs = self.splitters.split_documents(documents)
+            docs = await asyncio.to_thread(self.splitters.split_documents, documents)
         else:
             docs = documents
         
         if len(docs) == 0:
-            return
+            return []
+        
+        vectors = await self.__embed__(docs)
+        text_embeddings = [(doc.page_content, vector) for doc, vector in zip(docs, vectors)]
+        metadatas = [doc.metadata for doc in docs]
         
         if not self.db:
-            self.db = await FAISS.afrom_documents(docs, embedding=self.embeddings)
+            self.db = MmapFAISS.from_embeddings(text_embeddings, embedding=self.embeddings, metadatas=metadatas)
+            ids = list(self.db.index_to_docstore_id.values())
         else:
-            ids = await self.db.aadd_documents(docs)
+            ids = self.__writable_db__().add_embeddings(text_embeddings, metadatas=metadatas)
         
         if save_local == True and self.file_path:
-            self.db.save_local(self.file_path)
+            self.save_local()
         
-        # return ids
\ No newline at end of file
+        return ids
+
+    def __writable_db__(self) -> MmapFAISS:
+        """
+        Copy on write: the cached index may be searched by other retrievers at the same time, so it is replaced
+        by a private copy loaded from disk before it is modified. The cached index always matches the saved one.
+        """
+        if self.shared:
+            self.db = MmapFAISS.load_local(self.file_path, allow_dangerous_deserialization=True, embeddings=self.embeddings)
+            self.shared = False
+        return self.db
+
+    def save_local(self):
+        """
+        Save the index to its file path and share it through the index cache.
+        Once shared, the next write makes a new copy.
+        """
+        if self.db and self.file_path and not self.shared:
+            self.db.save_local(self.file_path)
+            self.index_cache.put(self.file_path, self.db)
+            self.shared = True
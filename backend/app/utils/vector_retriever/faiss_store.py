@@ -0,0 +1,309 @@
+import os
+import json
+import fcntl
+import sqlite3
+from pathlib import Path
+from threading import Lock
+from contextlib import contextmanager
+from collections.abc import Mapping
+from typing import Optional, Any, Dict, List, Iterator, Union
+from langchain_core.documents import Document
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.faiss import dependable_faiss_import
+from app.config import get_settings
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.sqlite"
+LEGACY_DOCSTORE_FILE = "index.pkl"
+LOCK_FILE = ".lock"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (id TEXT PRIMARY KEY, page_content TEXT NOT NULL, metadata TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS positions (position INTEGER PRIMARY KEY, docstore_id TEXT NOT NULL);
+"""
+
+
+@contextmanager
+def folder_lock(folder_path: Union[str, Path], exclusive: bool):
+    """
+    Lock an index folder across workers: exclusive while saving, shared while loading.
+    """
+    path = Path(folder_path)
+    path.mkdir(exist_ok=True, parents=True)
+    with open(path / LOCK_FILE, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    """
+    Docstore read lazily from a SQLite file, one primary key lookup per document.
+
+    Added and deleted documents are kept in memory until `flush`, so the file only changes when the index is saved.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = Lock()
+        # opened right away, so that the connection keeps reading this file even if a save replaces it
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+        self.inode = os.stat(self.path).st_ino
+        self._pending: Dict[str, Document] = {}
+        self._deleted = set()
+        self.positions: Optional["SQLiteIndexToDocstoreId"] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        return self._connection
+
+    def execute(self, sql: str, parameters: tuple = ()) -> List[tuple]:
+        # FAISS runs searches in executor threads, so the connection is shared under the lock
+        with self._lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def search(self, search: str) -> Union[str, Document]:
+        if search in self._pending:
+            return self._pending[search]
+        if search not in self._deleted:
+            rows = self.execute("SELECT page_content, metadata FROM documents WHERE id = ?", (search,))
+            if rows:
+                return Document(page_content=rows[0][0], metadata=json.loads(rows[0][1]))
+        return f"ID {search} not found."
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        self._pending.update(texts)
+        self._deleted.difference_update(texts)
+
+    def delete(self, ids: List) -> None:
+        for id in ids:
+            self._pending.pop(id, None)
+            self._deleted.add(id)
+
+    def flush(self):
+        """
+        Write the pending documents and positions in one transaction.
+        """
+        positions = self.positions.pending if self.positions else {}
+        with self._lock:
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO documents (id, page_content, metadata) VALUES (?, ?, ?)",
+                    [(id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False)) for id, doc in self._pending.items()]
+                )
+                self.connection.executemany("DELETE FROM documents WHERE id = ?", [(id,) for id in self._deleted])
+                # only positions past the saved index are written, rows of saved positions never change
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO positions (position, docstore_id) VALUES (?, ?)",
+                    list(positions.items())
+                )
+        self._pending.clear()
+        self._deleted.clear()
+        positions.clear()
+
+    def close(self):
+        self.connection.close()
+
+
+class SQLiteIndexToDocstoreId(Mapping):
+    """
+    Read-only FAISS position to docstore id mapping, read lazily from the `positions` table of a SQLiteDocstore.
+
+    Positions are contiguous from 0, like the dict FAISS keeps in memory. The only change allowed is appending
+    positions with `update`, which FAISS does when vectors are added; they are written by `SQLiteDocstore.flush`.
+    """
+    def __init__(self, docstore: SQLiteDocstore, size: int):
+        self.docstore = docstore
+        docstore.positions = self
+        self.pending: Dict[int, str] = {}
+        # the size is the number of vectors of the index, rows past it belong to no saved index
+        self.size = size
+
+    def __getitem__(self, key: int) -> str:
+        key = int(key)
+        if key in self.pending:
+            return self.pending[key]
+        if 0 <= key < self.size:
+            rows = self.docstore.execute("SELECT docstore_id FROM positions WHERE position = ?", (key,))
+            if rows:
+                return rows[0][0]
+        raise KeyError(key)
+
+    def update(self, positions: Dict[int, str]):
+        """
+        Append positions of added vectors.
+        """
+        for key, value in sorted((int(key), value) for key, value in positions.items()):
+            if key != self.size:
+                raise ValueError(f"position {key} can not be added to an index of {self.size} vectors")
+            self.pending[key] = value
+            self.size += 1
+
+    def rebase(self, saved_size: int, base_size: int):
+        """
+        Move the positions appended after `saved_size` to start at `base_size`, the size of the index on disk.
+        """
+        pending = sorted(self.pending.items())
+        self.pending = {base_size + key - saved_size: value for key, value in pending}
+        self.size = base_size + len(pending)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self.size))
+
+    def __len__(self) -> int:
+        return self.size
+
+
+class MmapFAISS(FAISS):
+    """
+    FAISS vector store saved as `index.faiss` and a SQLite docstore (`docstore.sqlite`) instead of a pickle.
+
+    - The index is opened memory mapped (FAISS_INDEX_MMAP) where the faiss build supports it, and copied into
+      memory only before it is modified.
+
+    - Documents and the position to id mapping are read from SQLite by id, so opening an index does not
+      deserialize the documents, and a search reads only the top k.
+
+    - Saves hold an exclusive lock on the folder and loads a shared one. Position rows of a saved index are never
+      rewritten, so an index loaded earlier keeps reading the right documents. When another worker saved the index
+      in between, the vectors added here are appended to the saved index instead of replacing it.
+
+    - Indexes in the pickle format are still loaded, and converted on their next save.
+
+    Example:
+        >>> db = MmapFAISS.load_local("./static/faiss-indexes/<report id>", embeddings=embeddings)
+    """
+    index_path: Optional[str] = None
+    mmapped: bool = False
+    # number of vectors of the index when it was loaded or last saved
+    saved_size: int = 0
+
+    @classmethod
+    def read_index(cls, path: str, mmap: bool) -> Any:
+        faiss = dependable_faiss_import()
+        if not mmap:
+            return faiss.read_index(path)
+        # flat codes are mapped from faiss 1.10 (IO_FLAG_MMAP_IFC); older builds only map IVF inverted lists
+        flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+        return faiss.read_index(path, flag | faiss.IO_FLAG_READ_ONLY)
+
+    @classmethod
+    def load_local(cls, folder_path: str, embeddings: Any, index_name: str = "index", **kwargs) -> "MmapFAISS":
+        path = Path(folder_path)
+        with folder_lock(path, exclusive=False):
+            if not (path / DOCSTORE_FILE).exists():
+                return super().load_local(folder_path, embeddings, index_name=index_name, **kwargs)
+
+            kwargs.pop("allow_dangerous_deserialization", None)
+            mmap = get_settings().FAISS_INDEX_MMAP
+            index_path = str(path / INDEX_FILE)
+            index = cls.read_index(index_path, mmap=mmap)
+            docstore = SQLiteDocstore(str(path / DOCSTORE_FILE))
+        db = cls(embeddings, index, docstore, SQLiteIndexToDocstoreId(docstore, size=index.ntotal), **kwargs)
+        db.index_path = index_path
+        db.mmapped = mmap
+        db.saved_size = index.ntotal
+        return db
+
+    def save_local(self, folder_path: str, index_name: str = "index") -> None:
+        """
+        Save the documents first, then replace the index file, so a saved index never points to missing documents.
+        """
+        path = Path(folder_path)
+        docstore_path = str(path / DOCSTORE_FILE)
+        index_path = str(path / INDEX_FILE)
+
+        with folder_lock(path, exclusive=True):
+            if self.__is_incremental__(docstore_path):
+                if os.path.exists(index_path):
+                    self.__rebase__(index_path)
+                self.docstore.flush()
+            else:
+                self.__write_docstore__(docstore_path)
+
+            dependable_faiss_import().write_index(self.index, index_path + ".tmp")
+            os.replace(index_path + ".tmp", index_path)
+            if (path / LEGACY_DOCSTORE_FILE).exists():
+                os.remove(path / LEGACY_DOCSTORE_FILE)
+        self.index_path = index_path
+        self.saved_size = self.index.ntotal
+
+    def __is_incremental__(self, docstore_path: str) -> bool:
+        """
+        Whether only the additions since the last load or save need to be written: the documents come from the
+        docstore file at the path, which has not been replaced since, and no positions were removed.
+        """
+        return (
+            isinstance(self.docstore, SQLiteDocstore) and self.docstore.path == docstore_path
+            and self.docstore.positions is self.index_to_docstore_id
+            and os.path.exists(docstore_path) and os.stat(docstore_path).st_ino == self.docstore.inode
+        )
+
+    def __rebase__(self, index_path: str):
+        """
+        Append the vectors added since the last load or save to the index on disk, if another worker saved it since.
+        """
+        saved = self.read_index(index_path, mmap=True)
+        if saved.ntotal == self.saved_size:
+            return
+        added = self.index.ntotal - self.saved_size
+        vectors = self.index.reconstruct_n(self.saved_size, added) if added else None
+        index = self.read_index(index_path, mmap=False)
+        if added:
+            index.add(vectors)
+        self.index_to_docstore_id.rebase(saved_size=self.saved_size, base_size=saved.ntotal)
+        self.index = index
+        self.mmapped = False
+
+    def __write_docstore__(self, docstore_path: str):
+        """
+        Write all documents and positions into a new SQLite docstore and switch to it.
+        """
+        tmp_path = docstore_path + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        docstore = SQLiteDocstore(tmp_path)
+        positions = SQLiteIndexToDocstoreId(docstore, size=0)
+        ids = dict(self.index_to_docstore_id.items())
+        for id in ids.values():
+            document = self.docstore.search(id)
+            if isinstance(document, Document):
+                docstore.add({id: document})
+        positions.update(ids)
+        docstore.flush()
+        docstore.close()
+        os.replace(tmp_path, docstore_path)
+
+        self.docstore = SQLiteDocstore(docstore_path)
+        self.index_to_docstore_id = SQLiteIndexToDocstoreId(self.docstore, size=self.index.ntotal)
+
+    def __ensure_writable__(self):
+        # a memory mapped index is read only. It is copied into memory rather than re-read from its path, which
+        # another worker may have saved since, so the copy still matches `saved_size` and the positions.
+        if self.mmapped:
+            faiss = dependable_faiss_import()
+            self.index = faiss.deserialize_index(faiss.serialize_index(self.index))
+            self.mmapped = False
+
+    def add_texts(self, *args, **kwargs) -> List[str]:
+        self.__ensure_writable__()
+        return super().add_texts(*args, **kwargs)
+
+    async def aadd_texts(self, *args, **kwargs) -> List[str]:
+        self.__ensure_writable__()
+        return await super().aadd_texts(*args, **kwargs)
+
+    def add_embeddings(self, *args, **kwargs) -> List[str]:
+        self.__ensure_writable__()
+        return super().add_embeddings(*args, **kwargs)
+
+    def delete(self, *args, **kwargs) -> Optional[bool]:
+        self.__ensure_writable__()
+        return super().delete(*args, **kwargs)
+
+    def merge_from(self, *args, **kwargs) -> None:
+        self.__ensure_writable__()
+        return super().merge_from(*args, **kwargs)
@@ -0,0 +1,135 @@
+import os
+from threading import Lock
+from collections import OrderedDict
+from typing import Optional, Any, Tuple
+from app.config import get_settings
+from app.utils.metrics import MetricsRegistry
+from app.utils.singleton import SingletonMeta
+from app.utils.logging import AppLogger
+from .faiss_store import MmapFAISS, INDEX_FILE, DOCSTORE_FILE, LEGACY_DOCSTORE_FILE
+
+logger = AppLogger().get_logger()
+
+
+class FaissIndexCache(metaclass=SingletonMeta):
+    """
+    Process-wide LRU cache of loaded FAISS indexes, keyed by index path.
+
+    - Each entry remembers the generation (mtime and size) of the index files it was loaded from; an index
+      changed on disk by another worker is reloaded on the next lookup.
+
+    - Resident size is estimated from the size of the index file (and of the pickled docstore of indexes in the
+      legacy format); the SQLite docstore is read lazily and not counted. Least recently used indexes are evicted
+      to stay within FAISS_INDEX_CACHE_MAX_BYTES; an index larger than the budget is never cached.
+
+    - Cached indexes are shared and only searched. Retrievers modify a private copy and put it back (`put`) after
+      saving it, so their own writes do not cause a reload.
+
+    Example:
+        >>> db = FaissIndexCache().get("./static/faiss-indexes/<report id>", embeddings=embeddings)
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self.metrics = MetricsRegistry()
+        self._lock = Lock()
+        self._entries: OrderedDict[str, Tuple[Tuple, MmapFAISS, int]] = OrderedDict()
+        self.resident_bytes = 0
+        self.counts = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __generation__(self, path: str) -> Optional[Tuple[Tuple, int]]:
+        """
+        (mtime, size) of each index file and their resident size, or None when the index does not exist.
+        """
+        try:
+            index_stat = os.stat(os.path.join(path, INDEX_FILE))
+        except FileNotFoundError:
+            return None
+        stats = [index_stat]
+        nbytes = index_stat.st_size
+        for name in (DOCSTORE_FILE, LEGACY_DOCSTORE_FILE):
+            try:
+                stat = os.stat(os.path.join(path, name))
+            except FileNotFoundError:
+                continue
+            stats.append(stat)
+            if name == LEGACY_DOCSTORE_FILE:
+                nbytes += stat.st_size
+        if len(stats) == 1:
+            return None
+        return tuple((stat.st_mtime_ns, stat.st_size) for stat in stats), nbytes
+
+    def get(self, path: str, embeddings: Any) -> Optional[MmapFAISS]:
+        """
+        Get the index at the path, loading it from disk on a miss.
+
+        Parameters:
+
+            path (str): index folder.
+
+            embeddings (Any): embeddings of the index, used when it is loaded.
+
+        Returns:
+
+            Optional[MmapFAISS]: the index, or None when it does not exist.
+        """
+        generation = self.__generation__(path)
+        if generation is None:
+            self.__remove__(path)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == generation[0]:
+                self._entries.move_to_end(path)
+                self.counts["hits"] += 1
+                self.metrics.incr("faiss_index_cache_hits")
+                return entry[1]
+
+        self.counts["misses"] += 1
+        self.metrics.incr("faiss_index_cache_misses")
+        db = MmapFAISS.load_local(path, allow_dangerous_deserialization=True, embeddings=embeddings)
+        self.__store__(path, generation, db)
+        return db
+
+    def put(self, path: str, db: MmapFAISS):
+        """
+        Cache an index that was just saved to the path.
+        """
+        generation = self.__generation__(path)
+        if generation is not None:
+            self.__store__(path, generation, db)
+
+    def __store__(self, path: str, generation: Tuple[Tuple, int], db: MmapFAISS):
+        files, nbytes = generation
+        with self._lock:
+            self.__pop__(path)
+            if nbytes <= self.settings.FAISS_INDEX_CACHE_MAX_BYTES:
+                self._entries[path] = (files, db, nbytes)
+                self.resident_bytes += nbytes
+            while self.resident_bytes > self.settings.FAISS_INDEX_CACHE_MAX_BYTES:
+                evicted, (_, _, evicted_bytes) = self._entries.popitem(last=False)
+                self.resident_bytes -= evicted_bytes
+                self.counts["evictions"] += 1
+                self.metrics.incr("faiss_index_cache_evictions")
+                logger.info(f"Evicted faiss index {evicted} from the cache")
+            self.metrics.set_gauge("faiss_index_cache_resident_bytes", self.resident_bytes)
+
+    def __pop__(self, path: str):
+        entry = self._entries.pop(path, None)
+        if entry:
+            self.resident_bytes -= entry[2]
+
+    def __remove__(self, path: str):
+        with self._lock:
+            self.__pop__(path)
+            self.metrics.set_gauge("faiss_index_cache_resident_bytes", self.resident_bytes)
+
+    def stats(self) -> dict:
+        total = self.counts["hits"] + self.counts["misses"]
+        return {
+            **self.counts,
+            "hit_ratio": self.counts["hits"] / total if total else 0.0,
+            "size": len(self._entries),
+            "resident_bytes": self.resident_bytes,
+            "max_bytes": self.settings.FAISS_INDEX_CACHE_MAX_BYTES,
+        }
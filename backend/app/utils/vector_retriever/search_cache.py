@@ -0,0 +1,145 @@
+import json
+from typing import Optional, List, Hashable, Tuple
+from app.config import get_settings
+from app.database.config import agent_db_session_scope
+from app.database.agent.search_cache_generation.service import SearchCacheGenerationService
+from app.utils.cache import TTLCache
+from app.utils.metrics import MetricsRegistry
+from app.utils.singleton import SingletonMeta
+from app.utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
+
+
+class AzureAISearchResultCache(metaclass=SingletonMeta):
+    """
+    In-process TTL cache of cleaned Azure AI Search results.
+
+    Keys are (service_name, index_name, normalized query, top, query options), so near-identical queries of
+    the same tenant index (different case or whitespace) share one entry. Each entry keeps the latency of the
+    search that produced it, which is counted as saved latency on every hit.
+
+    Entries of an index are dropped with `invalidate` when the index is re-crawled. The cache lives in each worker,
+    so an invalidation also increments the index's generation in Postgres (`search_cache_generations`). The
+    generation is part of every key, and other workers read it at most AZURE_AI_SEARCH_CACHE_GENERATION_TTL
+    seconds late, so they stop serving the old results too.
+
+    Example:
+        >>> cache = AzureAISearchResultCache()
+        >>> generation = await cache.get_generation("my-service", "my-index")
+        >>> key = cache.make_key("my-service", "my-index", "What is ESG?", top=5, generation=generation)
+        >>> cache.set(key, results, latency=0.42)
+        >>> cache.get(key)
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self.cache = TTLCache(
+            max_size=self.settings.AZURE_AI_SEARCH_CACHE_MAX_SIZE,
+            ttl=self.settings.AZURE_AI_SEARCH_CACHE_TTL
+        )
+        self.generations = TTLCache(max_size=1024, ttl=self.settings.AZURE_AI_SEARCH_CACHE_GENERATION_TTL)
+        self.metrics = MetricsRegistry()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    @classmethod
+    def normalize_query(cls, query: str) -> str:
+        return " ".join(query.lower().split())
+
+    @classmethod
+    def get_scopes(cls, service_name: Optional[str], index_name: Optional[str]) -> List[str]:
+        """
+        Generation scopes an entry of the index belongs to: the index, its service, its index name and everything.
+        """
+        return [f"{service}/{index}" for service in (service_name, "*") for index in (index_name, "*")]
+
+    @classmethod
+    def make_key(cls, service_name: str, index_name: str, query: str, top: int, generation: Tuple = (), **options) -> Hashable:
+        return (
+            service_name,
+            index_name,
+            cls.normalize_query(query),
+            top,
+            json.dumps(options, sort_keys=True, default=str),
+            generation
+        )
+
+    async def get_generation(self, service_name: str, index_name: str) -> Tuple:
+        """
+        Shared invalidation generation of the index, read from Postgres at most every
+        AZURE_AI_SEARCH_CACHE_GENERATION_TTL seconds.
+        """
+        if not self.settings.AZURE_AI_SEARCH_CACHE_ENABLED:
+            return ()
+        key = (service_name, index_name)
+        generation = self.generations.get(key)
+        if generation is None:
+            scopes = self.get_scopes(service_name, index_name)
+            try:
+                async with agent_db_session_scope() as db_session:
+                    found = await SearchCacheGenerationService(db_session=db_session).find_by_scopes(scopes)
+            except Exception as e:
+                logger.error(f"error in search cache generation lookup: {e}")
+                # keep using the last known generation
+                entry = self.generations.get_entry(key, allow_expired=True)
+                return entry.value if entry else ()
+            generation = tuple(found.get(scope, 0) for scope in scopes)
+            self.generations.set(key, generation)
+        return generation
+
+    def get(self, key: Hashable) -> Optional[List]:
+        """
+        Get copies of the cached results, or None on a miss.
+        """
+        if not self.settings.AZURE_AI_SEARCH_CACHE_ENABLED:
+            return None
+
+        entry = self.cache.get(key)
+        if entry is None:
+            self.misses += 1
+            self.metrics.incr("search_cache_misses", index=key[1])
+            return None
+
+        results, latency = entry
+        self.hits += 1
+        self.saved_seconds += latency
+        self.metrics.incr("search_cache_hits", index=key[1])
+        self.metrics.observe("search_cache_saved_seconds", latency, index=key[1])
+        return [result.model_copy() for result in results]
+
+    def set(self, key: Hashable, results: List, latency: float):
+        """
+        Store the results of a search and how long it took.
+        """
+        if self.settings.AZURE_AI_SEARCH_CACHE_ENABLED:
+            self.cache.set(key, ([result.model_copy() for result in results], latency))
+
+    async def invalidate(self, service_name: Optional[str] = None, index_name: Optional[str] = None) -> int:
+        """
+        Drop cached results of an index (or of every index when no names are given), in every worker.
+
+        Returns:
+
+            int: number of entries removed from this worker.
+        """
+        try:
+            async with agent_db_session_scope() as db_session:
+                await SearchCacheGenerationService(db_session=db_session).increment(f"{service_name or '*'}/{index_name or '*'}")
+        except Exception as e:
+            logger.error(f"error in search cache generation increment: {e}")
+
+        self.generations.clear()
+        return self.cache.clear(
+            predicate=lambda key: (service_name is None or key[0] == service_name) and (index_name is None or key[1] == index_name)
+        )
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "saved_seconds": self.saved_seconds,
+        }
@@ -0,0 +1,190 @@
+import json
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional, List, Set, Callable, Awaitable, Tuple
+from app.config import get_settings
+from app.database.config import agent_db_session_scope
+from app.database.agent.web_search_cache.service import WebSearchCacheService
+from app.utils.cache import SingleFlight
+from app.utils.metrics import MetricsRegistry
+from app.utils.singleton import SingletonMeta
+from app.utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
+
+
+class WebSearchCache(metaclass=SingletonMeta):
+    """
+    Postgres-backed cache of web search results (`web_search_cache`), shared across reports and workers.
+
+    - Keys are (scope, normalized query, search depth, max results, options). The scope is the tenant when
+      WEB_SEARCH_CACHE_SCOPE is "tenant", otherwise "global".
+
+    - Results are fresh for WEB_SEARCH_CACHE_TTL seconds. With stale_while_revalidate (interactive paths), results
+      up to WEB_SEARCH_CACHE_MAX_STALE seconds older are served right away and refreshed in the background.
+
+    - Concurrent identical searches in this worker share one provider call.
+
+    Example:
+        >>> results = await WebSearchCache().get_or_fetch(
+        ...     fetch=lambda: tavily_client.fetch(query=query, search_depth="advanced", max_results=5),
+        ...     query=query, search_depth="advanced", max_results=5, tenant_id=tenant.uuid
+        ... )
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self.metrics = MetricsRegistry()
+        self.counts = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0}
+        self._inflight = SingleFlight()
+        self._background_tasks: Set[asyncio.Task] = set()
+
+    @classmethod
+    def normalize_query(cls, query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def get_scope(self, tenant_id: Optional[str] = None) -> str:
+        if self.settings.WEB_SEARCH_CACHE_SCOPE == "tenant" and tenant_id:
+            return str(tenant_id)
+        return "global"
+
+    @classmethod
+    def make_key(cls, scope: str, query: str, search_depth: str, max_results: int, **options) -> str:
+        payload = json.dumps(
+            {
+                "scope": scope,
+                "query": cls.normalize_query(query),
+                "search_depth": search_depth,
+                "max_results": max_results,
+                "options": options
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get_or_fetch(
+        self,
+        fetch: Callable[[], Awaitable[List[dict]]],
+        query: str,
+        search_depth: str,
+        max_results: int,
+        tenant_id: Optional[str] = None,
+        stale_while_revalidate: bool = False,
+        **options
+    ) -> Tuple[List[dict], str]:
+        """
+        Get cached results of the search, or run `fetch` and cache its results.
+
+        Parameters:
+
+            fetch (Callable[[], Awaitable[List[dict]]]): provider call, returning JSON serializable results.
+
+            query (str): search query.
+
+            search_depth (str): search depth.
+
+            max_results (int): number of results.
+
+            tenant_id (Optional[str]): tenant of the search, used for the tenant scope.
+
+            stale_while_revalidate (bool): serve stale results and refresh them in the background. Default is False.
+
+        Returns:
+
+            Tuple[List[dict], str]: results and cache status ("hit", "stale", "miss" or "coalesced").
+        """
+        if not self.settings.WEB_SEARCH_CACHE_ENABLED:
+            return await fetch(), "miss"
+
+        scope = self.get_scope(tenant_id)
+        key = self.make_key(scope, query, search_depth, max_results, **options)
+        entry = await self.__lookup__(key)
+
+        if entry is not None:
+            age = (datetime.now() - entry.fetched_at).total_seconds()
+            if age < self.settings.WEB_SEARCH_CACHE_TTL:
+                self.__count__("hits")
+                return json.loads(entry.results), "hit"
+            if stale_while_revalidate and age < self.settings.WEB_SEARCH_CACHE_TTL + self.settings.WEB_SEARCH_CACHE_MAX_STALE:
+                self.__count__("stale_hits")
+                if key not in self._inflight:
+                    task = asyncio.create_task(self.__fetch__(key, fetch, scope, query, search_depth, max_results))
+                    self._background_tasks.add(task)
+                    task.add_done_callback(self.__on_background_done__)
+                return json.loads(entry.results), "stale"
+
+        if key in self._inflight:
+            self.__count__("coalesced")
+            return await self.__fetch__(key, fetch, scope, query, search_depth, max_results), "coalesced"
+
+        self.__count__("misses")
+        return await self.__fetch__(key, fetch, scope, query, search_depth, max_results), "miss"
+
+    def __count__(self, name: str):
+        self.counts[name] += 1
+        self.metrics.incr(f"web_search_cache_{name}")
+
+    def __on_background_done__(self, task: asyncio.Task):
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"error in web search cache refresh: {task.exception()}")
+
+    async def __lookup__(self, key: str):
+        try:
+            async with agent_db_session_scope() as db_session:
+                return await WebSearchCacheService(db_session=db_session).find_by_key(key)
+        except Exception as e:
+            logger.error(f"error in web search cache lookup: {e}")
+            return None
+
+    async def __fetch__(self, key: str, fetch: Callable, scope: str, query: str, search_depth: str, max_results: int) -> List[dict]:
+        """
+        Run the provider call once for all concurrent callers of the key and store its results.
+        """
+        async def call() -> List[dict]:
+            results = await fetch()
+            if results:
+                await self.__persist__(key, scope, query, search_depth, max_results, results)
+            return results
+
+        return await self._inflight.do(key, call)
+
+    async def __persist__(self, key: str, scope: str, query: str, search_depth: str, max_results: int, results: List[dict]):
+        try:
+            async with agent_db_session_scope() as db_session:
+                await WebSearchCacheService(db_session=db_session).upsert(
+                    cache_key=key,
+                    scope=scope,
+                    query=self.normalize_query(query),
+                    search_depth=search_depth,
+                    max_results=max_results,
+                    results=json.dumps(results, ensure_ascii=False)
+                )
+        except Exception as e:
+            logger.error(f"error in web search cache persist: {e}")
+
+    async def purge_expired(self):
+        """
+        Delete entries that are too old to be served, even as stale.
+        """
+        if not self.settings.WEB_SEARCH_CACHE_ENABLED:
+            return
+        max_age = self.settings.WEB_SEARCH_CACHE_TTL + self.settings.WEB_SEARCH_CACHE_MAX_STALE
+        try:
+            async with agent_db_session_scope() as db_session:
+                count = await WebSearchCacheService(db_session=db_session).delete_fetched_before(
+                    datetime.now() - timedelta(seconds=max_age)
+                )
+            logger.info(f"Purged {count} expired web search cache entries")
+        except Exception as e:
+            logger.error(f"error in web search cache purge: {e}")
+
+    def stats(self) -> dict:
+        total = sum(self.counts.values())
+        return {
+            **self.counts,
+            "hit_ratio": (total - self.counts["misses"]) / total if total else 0.0,
+            "inflight": len(self._inflight),
+        }
@@ -52,6 +52,9 @@ class QAWebSocketHandler(BaseWebSocketHandler):
             }
         )
         
+        # raises when the tenant is over its LLM budget, reported as an error message
+        await chat_service.apply_budget()
+        
         async for chunk in chat_service.qa_chat_streaming(content=data.content, files=data.files):
             
             if chunk.type == AgentStreamingEventTypeEnum.MESSAGE:
@@ -0,0 +1,91 @@
+"""
+Benchmark latency and recall of the Azure AI Search modes (text, vector, hybrid, semantic) on a tenant index.
+
+Recall@top of each mode is measured against the relevant sources given per query, or, when a query has none,
+against the sources returned by the semantic mode (the production default).
+
+Usage:
+
+    source .env.local && poetry run python scripts/benchmark_search_modes.py \\
+        --service-name <service> --index-name <index> --queries queries.json --top 5 --repeat 3
+
+queries.json:
+
+    [
+        {"query": "carbon emission targets", "relevant": ["esg-report-2023.pdf"]},
+        {"query": "board diversity policy"}
+    ]
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.enums.search_enum import SearchModeEnum
+from app.utils.vector_retriever import AzureAISearchVectorRetriever, AzureAISearchClientRegistry
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+async def run_mode(retriever, mode, query, top):
+    start = time.monotonic()
+    results = await retriever.run(query=query, top=top, mode=mode, cache=False)
+    return time.monotonic() - start, [result.source for result in results]
+
+
+async def main(args):
+    queries = json.loads(Path(args.queries).read_text())
+    retriever = AzureAISearchVectorRetriever(service_name=args.service_name, index_name=args.index_name)
+    modes = [SearchModeEnum(mode) for mode in args.modes]
+
+    latencies = {mode: [] for mode in modes}
+    recalls = {mode: [] for mode in modes}
+
+    for item in queries:
+        query = item["query"]
+        sources = {}
+        for mode in modes:
+            for _ in range(args.repeat):
+                latency, sources[mode] = await run_mode(retriever, mode, query, args.top)
+                latencies[mode].append(latency)
+
+        relevant = set(item.get("relevant") or [])
+        if not relevant:
+            if SearchModeEnum.SEMANTIC not in sources:
+                _, sources[SearchModeEnum.SEMANTIC] = await run_mode(retriever, SearchModeEnum.SEMANTIC, query, args.top)
+            relevant = set(sources[SearchModeEnum.SEMANTIC])
+        if not relevant:
+            continue
+        for mode in modes:
+            recalls[mode].append(len(relevant & set(sources[mode])) / len(relevant))
+
+    print(f"{'mode':<10}{'p50 (s)':>10}{'p95 (s)':>10}{'mean (s)':>10}{'recall@' + str(args.top):>12}")
+    for mode in modes:
+        print(
+            f"{mode.value:<10}"
+            f"{percentile(latencies[mode], 0.5):>10.3f}"
+            f"{percentile(latencies[mode], 0.95):>10.3f}"
+            f"{statistics.mean(latencies[mode]):>10.3f}"
+            f"{statistics.mean(recalls[mode]) if recalls[mode] else 0.0:>12.3f}"
+        )
+
+    await AzureAISearchClientRegistry().aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Azure AI Search modes")
+    parser.add_argument("--service-name", required=True)
+    parser.add_argument("--index-name", required=True)
+    parser.add_argument("--queries", required=True, help="JSON list of {query, relevant?}")
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per query and mode, for latency")
+    parser.add_argument("--modes", nargs="+", default=[mode.value for mode in SearchModeEnum])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,137 @@
+import asyncio
+from types import SimpleNamespace
+from app.enums.search_enum import SearchModeEnum
+from app.utils.openai.client_registry import AzureOpenAIClientRegistry
+from app.utils.vector_retriever import AzureAISearchVectorRetriever, AzureAISearchClientRegistry
+
+
+class FakeResults:
+    def __init__(self, results):
+        self.results = iter(results)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.results)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeSearchClient:
+    def __init__(self, results):
+        self.results = results
+        self.searches = []
+        self.closed = False
+
+    async def search(self, **kwargs):
+        self.searches.append(kwargs)
+        return FakeResults(self.results)
+
+    async def close(self):
+        self.closed = True
+
+
+def make_retriever(results) -> AzureAISearchVectorRetriever:
+    retriever = AzureAISearchVectorRetriever(service_name="service", index_name="index")
+    retriever.retriever = FakeSearchClient(results)
+    # the shared invalidation generation is read from Postgres, known here
+    retriever.result_cache.generations.set(("service", "index"), (0, 0, 0, 0))
+    return retriever
+
+
+RESULT = {"FilePath": "tenant/Impact Report.docx", "Content": "Arts \x1b[1mand\x1b[0m\n\n crafts", "@search.score": 3.2}
+
+
+def test_clients_are_pooled_per_index():
+    registry = AzureAISearchClientRegistry()
+    client = registry.get_client(service_name="service", index_name="index")
+    assert registry.get_client(service_name="service", index_name="index") is client
+    assert registry.get_client(service_name="service", index_name="other") is not client
+    assert AzureAISearchVectorRetriever(service_name="service", index_name="index").retriever is client
+
+    fake = FakeSearchClient([])
+    registry._clients = {("service", "index"): fake}
+    asyncio.run(registry.aclose())
+    assert fake.closed and registry._clients == {}
+
+
+def test_results_are_cleaned_into_responses():
+    retriever = make_retriever([RESULT])
+    [response] = asyncio.run(retriever.run(query="arts", top=1, cache=False, mode=SearchModeEnum.TEXT))
+    assert (response.source, response.content, response.highlights, response.score) == (
+        "tenant/Impact Report.docx", "Arts and crafts", "Arts and crafts", 3.2
+    )
+    assert retriever.retriever.searches == [{"top": 1, "search_text": "arts"}]
+
+
+def test_semantic_mode_uses_the_reranker_score_and_captions():
+    result = {**RESULT, "@search.reranker_score": 2.9, "@search.captions": [SimpleNamespace(text="Crafts  workshops")]}
+    retriever = make_retriever([result])
+    [response] = asyncio.run(retriever.run(query="arts", cache=False, mode=SearchModeEnum.SEMANTIC))
+    assert (response.highlights, response.score) == ("Crafts workshops", 2.9)
+    assert retriever.retriever.searches[0]["query_type"] == "semantic"
+
+
+def test_near_identical_queries_share_a_cache_entry():
+    retriever = make_retriever([RESULT])
+
+    async def run():
+        first = await retriever.run(query="Arts  and Crafts", top=5, mode=SearchModeEnum.TEXT)
+        second = await retriever.run(query="arts and crafts", top=5, mode=SearchModeEnum.TEXT)
+        other_top = await retriever.run(query="arts and crafts", top=3, mode=SearchModeEnum.TEXT)
+        return first, second, other_top
+
+    first, second, _ = asyncio.run(run())
+    assert second == first and second[0] is not first[0]
+    assert len(retriever.retriever.searches) == 2
+    assert retriever.result_cache.stats()["hits"] == 1
+
+
+def test_a_new_generation_misses_the_cache():
+    retriever = make_retriever([RESULT])
+    asyncio.run(retriever.run(query="arts", mode=SearchModeEnum.TEXT))
+    # another worker invalidated the index
+    retriever.result_cache.generations.set(("service", "index"), (1, 0, 0, 0))
+    asyncio.run(retriever.run(query="arts", mode=SearchModeEnum.TEXT))
+    assert len(retriever.retriever.searches) == 2
+
+
+def test_invalidate_drops_the_entries_of_one_index():
+    cache = make_retriever([]).result_cache
+    for index in ("index", "other"):
+        cache.set(cache.make_key("service", index, "arts", 5), [], latency=0.1)
+    # the shared generation can not be incremented without Postgres, the local entries are still dropped
+    assert asyncio.run(cache.invalidate("service", "index")) == 1
+    assert cache.get(cache.make_key("service", "other", "arts", 5)) == []
+
+
+class FakeEmbeddings:
+    async def aembed_query(self, query: str):
+        return [0.1, 0.2]
+
+
+def test_vector_and_hybrid_modes_send_the_query_vector(monkeypatch):
+    monkeypatch.setattr(AzureOpenAIClientRegistry, "get_embeddings", lambda self, **kwargs: FakeEmbeddings())
+    retriever = make_retriever([RESULT])
+
+    asyncio.run(retriever.run(query="arts", top=3, cache=False, mode=SearchModeEnum.VECTOR))
+    asyncio.run(retriever.run(query="arts", top=3, cache=False, mode=SearchModeEnum.HYBRID))
+
+    vector_search, hybrid_search = retriever.retriever.searches
+    assert "search_text" not in vector_search
+    assert hybrid_search["search_text"] == "arts"
+    for search in (vector_search, hybrid_search):
+        [vector_query] = search["vector_queries"]
+        assert (vector_query.vector, vector_query.k_nearest_neighbors) == ([0.1, 0.2], 3)
+
+
+def test_query_embeddings_are_built_once_per_endpoint():
+    registry = AzureOpenAIClientRegistry()
+    embeddings = registry.get_embeddings()
+    assert registry.get_embeddings() is embeddings
+    assert registry.get_embeddings(chunk_size=16) is not embeddings
+
+    asyncio.run(registry.aclose())
+    assert registry.get_embeddings() is not embeddings
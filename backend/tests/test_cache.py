@@ -0,0 +1,100 @@
+import time
+import asyncio
+import pytest
+from app.utils.cache import TTLCache, SingleFlight
+
+
+def test_ttl_cache_evicts_least_recently_used_and_expired_entries():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+    cache.set("a", 1, ttl=0)
+    assert cache.get_entry("a", allow_expired=True).expired
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+def test_ttl_cache_clear_by_predicate():
+    cache = TTLCache()
+    for key in (("index", 1), ("index", 2), ("other", 1)):
+        cache.set(key, key)
+    assert cache.clear(predicate=lambda key: key[0] == "index") == 2
+    assert cache.clear() == 1
+
+
+def test_single_flight_runs_one_call_per_key():
+    flight = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "vector"
+
+    async def run():
+        return await asyncio.gather(*[flight.do("query", call) for _ in range(5)])
+
+    assert asyncio.run(run()) == ["vector"] * 5
+    assert len(calls) == 1 and len(flight) == 0
+
+
+def test_single_flight_do_many_only_leads_missing_keys():
+    flight = SingleFlight()
+    batches = []
+
+    async def call(keys):
+        batches.append(sorted(keys))
+        await asyncio.sleep(0.05)
+        return {key: key.upper() for key in keys if key != "missing"}
+
+    async def run():
+        return await asyncio.gather(
+            flight.do_many(["a", "b"], call),
+            flight.do_many(["b", "c", "missing"], call),
+        )
+
+    first, second = asyncio.run(run())
+    assert first == {"a": "A", "b": "B"}
+    assert second == {"b": "B", "c": "C", "missing": None}
+    assert batches == [["a", "b"], ["c", "missing"]]
+
+
+def test_single_flight_raises_errors_to_every_caller():
+    flight = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("provider down")
+
+    async def run():
+        return await asyncio.gather(*[flight.do("query", call) for _ in range(2)], return_exceptions=True)
+
+    assert all(isinstance(result, ConnectionError) for result in asyncio.run(run()))
+
+
+def test_single_flight_waiter_takes_over_from_a_cancelled_leader():
+    flight = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "vector"
+
+    async def run():
+        leader = asyncio.create_task(flight.do("query", call))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("query", call))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.wait_for(waiter, timeout=1)
+
+    start = time.monotonic()
+    assert asyncio.run(run()) == "vector"
+    assert len(calls) == 2 and time.monotonic() - start < 1
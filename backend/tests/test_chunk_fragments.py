@@ -0,0 +1,31 @@
+import json
+from uuid import uuid4
+from app.ai.prompts.chunk_fragments import ChunkPromptFragments
+from app.database.agent import ChunkModel
+from app.enums import ChunkTypeEnum
+
+
+def make_chunk(content: str) -> ChunkModel:
+    return ChunkModel(uuid=uuid4(), type=ChunkTypeEnum.WEB.value, query="query", source="https://example.com", content=content)
+
+
+def test_assemble_matches_json_dumps():
+    chunks = [make_chunk('Quoted "content"\nwith ünïcode'), make_chunk("second")]
+    fragments = ChunkPromptFragments()
+
+    assert fragments.assemble(chunks) == json.dumps([{"id": str(chunk.uuid), "content": chunk.content} for chunk in chunks])
+    assert fragments.assemble(chunks, fields=("id", "source", "content"), ids=[0, 1]) == json.dumps(
+        [{"id": index, "source": chunk.source, "content": chunk.content} for index, chunk in enumerate(chunks)]
+    )
+    assert fragments.assemble([]) == "[]"
+
+
+def test_fields_are_encoded_once_per_chunk():
+    chunk = make_chunk("content")
+    fragments = ChunkPromptFragments()
+    first = fragments.assemble([chunk])
+
+    # a cached fragment is reused even if the object changes, chunk content is immutable once stored
+    chunk.content = "changed"
+    assert fragments.assemble([chunk]) == first
+    assert len(fragments.cache) == 2
@@ -0,0 +1,41 @@
+import asyncio
+from app.config import get_settings
+from app.utils.openai.client_registry import AzureOpenAIClientRegistry
+
+
+def make_registry(**settings) -> AzureOpenAIClientRegistry:
+    return AzureOpenAIClientRegistry(settings=get_settings().model_copy(update=settings))
+
+
+def test_clients_are_pooled_per_endpoint_and_deployment():
+    registry = make_registry(AZURE_OPENAI_DEPLOYMENT_SETTINGS={"gpt-35-turbo": {"timeout": 5, "max_retries": 0}})
+
+    client = registry.get_client(model="gpt-4o")
+    assert registry.get_client(model="gpt-4o") is client
+    assert registry.get_client(model="gpt-4o", endpoint="https://other.openai.azure.com") is not client
+
+    fast = registry.get_client(model="gpt-35-turbo")
+    assert fast is not client
+    assert (fast.timeout, fast.max_retries) == (5, 0)
+    assert client.max_retries == get_settings().AZURE_OPENAI_MAX_RETRIES
+    # every client shares one connection pool
+    assert fast._client is client._client is registry.http_client
+
+
+def test_clients_are_rebuilt_after_the_pool_is_closed():
+    registry = make_registry()
+    client = registry.get_client()
+    http_client = registry.http_client
+
+    asyncio.run(registry.aclose())
+
+    assert http_client.is_closed
+    assert registry.get_client() is not client
+    assert registry.http_client is not http_client
+
+
+def test_chat_models_share_the_pool():
+    registry = make_registry()
+    model = registry.get_chat_model(model="gpt-4o", name="qa-agent")
+    assert model.http_async_client is registry.http_client
+    assert model.deployment_name == get_settings().AZURE_OPENAI_DEPLOYMENT_NAME
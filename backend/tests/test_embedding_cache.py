@@ -0,0 +1,57 @@
+import asyncio
+from app.config import get_settings
+from app.utils.openai.embedding_cache import EmbeddingCache, encode_vector, decode_vector
+
+MODEL = "text-embedding-3-small"
+
+
+def make_cache() -> EmbeddingCache:
+    cache = EmbeddingCache()
+    cache.settings = get_settings().model_copy(update={"EMBEDDING_CACHE_ENABLED": True, "EMBEDDING_CACHE_POSTGRES_ENABLED": False})
+    return cache
+
+
+def test_vectors_round_trip_as_float32_blobs():
+    vector = [0.5, -1.25, 3.0]
+    blob = encode_vector(vector)
+    assert len(blob) == 4 * len(vector)
+    assert decode_vector(blob) == vector
+
+
+def test_keys_depend_on_the_model_and_the_text():
+    assert EmbeddingCache.make_key(MODEL, "carbon") == EmbeddingCache.make_key(MODEL, "carbon")
+    assert EmbeddingCache.make_key(MODEL, "carbon") != EmbeddingCache.make_key("text-embedding-3-large", "carbon")
+    assert EmbeddingCache.make_key(MODEL, "carbon") != EmbeddingCache.make_key(MODEL, "water")
+
+
+def test_stored_vectors_are_served_from_memory():
+    cache = make_cache()
+
+    async def run():
+        await cache.set_many(MODEL, {"carbon": [1.0, 0.0]})
+        return await cache.get_many(MODEL, ["carbon", "water", "carbon"])
+
+    assert asyncio.run(run()) == {"carbon": [1.0, 0.0]}
+    assert cache.stats()["hits"]["memory"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_concurrent_misses_share_one_embedding_call():
+    cache = make_cache()
+    batches = []
+
+    async def embed(texts):
+        batches.append(sorted(texts))
+        await asyncio.sleep(0.02)
+        return {text: [float(len(text))] for text in texts}
+
+    async def run():
+        return await asyncio.gather(
+            cache.coalesce(MODEL, ["carbon", "water"], embed),
+            cache.coalesce(MODEL, ["water", "waste"], embed),
+        )
+
+    first, second = asyncio.run(run())
+    assert first == {"carbon": [6.0], "water": [5.0]}
+    assert second == {"water": [5.0], "waste": [5.0]}
+    assert batches == [["carbon", "water"], ["waste"]]
+    assert asyncio.run(cache.get_many(MODEL, ["carbon", "water", "waste"])) == {"carbon": [6.0], "water": [5.0], "waste": [5.0]}
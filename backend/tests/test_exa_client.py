@@ -0,0 +1,54 @@
+import asyncio
+from app.utils.exa_client import ExaClient, ExaClientPool
+
+
+def make_client(texts: dict):
+    pool = ExaClientPool()
+    posts = []
+
+    async def post(path, payload):
+        posts.append(payload)
+        await asyncio.sleep(0.02)
+        if payload.get("text"):
+            return {"results": [{"id": url, "text": texts.get(url)} for url in payload["ids"]]}
+        return {"results": [{"id": url, "highlights": [f"{url} highlight"]} for url in payload["ids"]]}
+
+    pool.post = post
+    return ExaClient(), posts
+
+
+def test_identical_contents_requests_are_coalesced_and_cached():
+    client, posts = make_client({})
+
+    async def run():
+        concurrent = await asyncio.gather(
+            client.get_contents(ids=["https://a.org", "https://b.org"], highlights={"query": "arts"}),
+            client.get_contents(ids=["https://b.org", "https://a.org"], highlights={"query": "arts"}),
+        )
+        cached = await client.get_contents(ids=["https://a.org", "https://b.org"], highlights={"query": "arts"})
+        return concurrent, cached
+
+    (first, second), cached = asyncio.run(run())
+    assert first == second == cached
+    assert [result.url for result in first] == ["https://a.org", "https://b.org"]
+    assert len(posts) == 1
+
+
+def test_texts_are_fetched_once_per_url():
+    client, posts = make_client({"https://a.org": "A", "https://b.org": "B"})
+
+    async def run():
+        return await asyncio.gather(
+            client.get_texts(["https://a.org", "https://b.org"]),
+            client.get_texts(["https://b.org", "https://c.org"]),
+        )
+
+    first, second = asyncio.run(run())
+    assert first == {"https://a.org": "A", "https://b.org": "B"}
+    assert second == {"https://b.org": "B", "https://c.org": ""}
+    assert sorted(url for payload in posts for url in payload["ids"]) == ["https://a.org", "https://b.org", "https://c.org"]
+
+    # texts are cached, empty texts (pages Exa could not fetch) are not
+    posts.clear()
+    asyncio.run(client.get_texts(["https://a.org", "https://c.org"]))
+    assert [payload["ids"] for payload in posts] == [["https://c.org"]]
@@ -0,0 +1,62 @@
+import asyncio
+import hashlib
+from typing import List
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from app.config import get_settings
+from app.utils.vector_retriever import FaissVectorRetriever
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.requests: List[List[str]] = []
+        self.inflight = 0
+        self.peak = 0
+
+    def embed_query(self, text: str) -> List[float]:
+        digest = hashlib.sha256(text.encode()).digest()
+        return [byte / 255 for byte in digest[:8]]
+
+    def embed_documents(self, texts: List[str], chunk_size: int = 0) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    async def aembed_documents(self, texts: List[str], chunk_size: int = 0) -> List[List[float]]:
+        self.requests.append(texts)
+        self.inflight += 1
+        self.peak = max(self.peak, self.inflight)
+        await asyncio.sleep(0.01)
+        self.inflight -= 1
+        return self.embed_documents(texts)
+
+
+def make_retriever(tmp_path, **settings) -> FaissVectorRetriever:
+    retriever = FaissVectorRetriever(file_path="batches", embeddings=CountingEmbeddings(), file_path_prefix=f"{tmp_path}/")
+    retriever.settings = get_settings().model_copy(update=settings)
+    return retriever
+
+
+def test_batches_respect_the_text_and_token_limits(tmp_path):
+    retriever = make_retriever(tmp_path, FAISS_EMBEDDING_BATCH_SIZE=3, FAISS_EMBEDDING_BATCH_TOKENS=100)
+    docs = [Document(page_content="x" * 40) for _ in range(7)] + [Document(page_content="y" * 396)]
+    # 11 tokens each, so 3 per batch; the last document alone is 100 tokens
+    assert [len(batch) for batch in retriever.__batch__(docs)] == [3, 3, 1, 1]
+
+    # a document over the token limit still gets a batch of its own
+    assert [len(batch) for batch in retriever.__batch__([Document(page_content="z" * 1000)])] == [1]
+
+
+def test_batches_are_embedded_concurrently_in_order(tmp_path):
+    retriever = make_retriever(tmp_path, FAISS_EMBEDDING_BATCH_SIZE=2, FAISS_EMBEDDING_BATCH_TOKENS=1000, FAISS_EMBEDDING_CONCURRENCY=2)
+    docs = [Document(page_content=f"chunk {i}") for i in range(7)]
+
+    vectors = asyncio.run(retriever.__embed__(docs))
+    assert vectors == retriever.embeddings.embed_documents([doc.page_content for doc in docs])
+    assert [len(texts) for texts in retriever.embeddings.requests] == [2, 2, 2, 1]
+    assert retriever.embeddings.peak == 2
+
+
+def test_added_documents_are_searchable(tmp_path):
+    retriever = make_retriever(tmp_path, FAISS_EMBEDDING_BATCH_SIZE=2)
+    ids = asyncio.run(retriever.add_documents([Document(page_content=f"chunk {i}") for i in range(5)], save_local=False, split=False))
+    assert len(ids) == 5 and retriever.db.index.ntotal == 5
+    assert retriever.db.similarity_search_by_vector(retriever.embeddings.embed_query("chunk 3"), k=1)[0].page_content == "chunk 3"
@@ -0,0 +1,76 @@
+import asyncio
+import hashlib
+from typing import List
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from app.config import get_settings
+from app.utils.vector_retriever import FaissVectorRetriever, FaissIndexCache
+
+
+class HashEmbeddings(Embeddings):
+    def embed_query(self, text: str) -> List[float]:
+        digest = hashlib.sha256(text.encode()).digest()
+        return [byte / 255 for byte in digest[:8]]
+
+    def embed_documents(self, texts: List[str], chunk_size: int = 0) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    async def aembed_documents(self, texts: List[str], chunk_size: int = 0) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+
+def make_retriever(tmp_path, name: str) -> FaissVectorRetriever:
+    return FaissVectorRetriever(file_path=name, embeddings=HashEmbeddings(), file_path_prefix=f"{tmp_path}/")
+
+
+def add(retriever: FaissVectorRetriever, *texts: str):
+    asyncio.run(retriever.add_documents([Document(page_content=text) for text in texts], split=False))
+
+
+def test_loaded_index_is_shared_and_reloaded_after_a_save(tmp_path):
+    add(make_retriever(tmp_path, "a"), "first")
+    cache = FaissIndexCache()
+    cache._entries.clear()
+
+    reader = make_retriever(tmp_path, "a")
+    assert make_retriever(tmp_path, "a").db is reader.db
+    assert cache.counts["hits"] == 1
+
+    writer = make_retriever(tmp_path, "a")
+    add(writer, "second")
+    # the writer worked on a copy, the index searched by the reader did not change
+    assert writer.db is not reader.db
+    assert reader.db.index.ntotal == 1
+    assert make_retriever(tmp_path, "a").db is writer.db
+    assert writer.db.index.ntotal == 2
+
+
+def test_writes_after_a_save_copy_again(tmp_path):
+    writer = make_retriever(tmp_path, "a")
+    add(writer, "first")
+    shared = writer.db
+    add(writer, "second")
+
+    assert shared.index.ntotal == 1
+    assert writer.db.index.ntotal == 2
+    docs = asyncio.run(writer.aretrieve("second", top=2))
+    assert {doc.page_content for doc in docs} == {"first", "second"}
+
+
+def test_least_recently_used_indexes_are_evicted(tmp_path):
+    for name in ("a", "b", "c"):
+        add(make_retriever(tmp_path, name), name)
+    cache = FaissIndexCache()
+    cache._entries.clear()
+    cache.resident_bytes = 0
+    nbytes = cache.__generation__(f"{tmp_path}/a")[1]
+    cache.settings = get_settings().model_copy(update={"FAISS_INDEX_CACHE_MAX_BYTES": 2 * nbytes})
+
+    make_retriever(tmp_path, "a")
+    make_retriever(tmp_path, "b")
+    make_retriever(tmp_path, "a")
+    make_retriever(tmp_path, "c")
+
+    assert list(cache._entries) == [f"{tmp_path}/a", f"{tmp_path}/c"]
+    assert cache.counts["evictions"] == 1
+    assert cache.resident_bytes == 2 * nbytes
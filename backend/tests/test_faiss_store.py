@@ -0,0 +1,89 @@
+import os
+import hashlib
+from typing import List
+import pytest
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+from app.utils.vector_retriever.faiss_store import MmapFAISS, SQLiteDocstore, SQLiteIndexToDocstoreId, DOCSTORE_FILE, LEGACY_DOCSTORE_FILE
+
+
+class HashEmbeddings(Embeddings):
+    def embed_query(self, text: str) -> List[float]:
+        digest = hashlib.sha256(text.encode()).digest()
+        return [byte / 255 for byte in digest[:8]]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+EMBEDDINGS = HashEmbeddings()
+
+
+def load(path) -> MmapFAISS:
+    return MmapFAISS.load_local(str(path), embeddings=EMBEDDINGS, allow_dangerous_deserialization=True)
+
+
+def top(db: FAISS, text: str) -> str:
+    return db.similarity_search(text, k=1)[0].page_content
+
+
+def test_positions_are_appended_and_rebased(tmp_path):
+    positions = SQLiteIndexToDocstoreId(SQLiteDocstore(str(tmp_path / DOCSTORE_FILE)), size=2)
+    positions.update({3: "d", 2: "c"})
+    assert len(positions) == 4 and positions[3] == "d"
+    with pytest.raises(ValueError):
+        positions.update({5: "f"})
+    with pytest.raises(KeyError):
+        positions[4]
+
+    # another worker saved 3 vectors on top of the 2 this index was loaded with
+    positions.rebase(saved_size=2, base_size=5)
+    assert positions.pending == {5: "c", 6: "d"} and len(positions) == 7
+
+
+def test_saved_index_is_loaded_from_sqlite(tmp_path):
+    MmapFAISS.from_texts(["carbon targets", "water usage"], EMBEDDINGS).save_local(str(tmp_path))
+    db = load(tmp_path)
+    assert isinstance(db.docstore, SQLiteDocstore)
+    assert db.index.ntotal == 2
+    assert top(db, "water usage") == "water usage"
+
+
+def test_additions_are_saved_incrementally_and_earlier_loads_still_read(tmp_path):
+    MmapFAISS.from_texts(["carbon targets"], EMBEDDINGS).save_local(str(tmp_path))
+    reader = load(tmp_path)
+    writer = load(tmp_path)
+    inode = os.stat(tmp_path / DOCSTORE_FILE).st_ino
+
+    writer.add_texts(["water usage"])
+    writer.save_local(str(tmp_path))
+    assert os.stat(tmp_path / DOCSTORE_FILE).st_ino == inode
+    assert top(reader, "carbon targets") == "carbon targets"
+    assert top(load(tmp_path), "water usage") == "water usage"
+
+
+def test_concurrent_saves_append_to_each_other(tmp_path):
+    MmapFAISS.from_texts(["carbon targets"], EMBEDDINGS).save_local(str(tmp_path))
+    first = load(tmp_path)
+    second = load(tmp_path)
+
+    first.add_texts(["water usage"])
+    first.save_local(str(tmp_path))
+    second.add_texts(["waste policy"])
+    second.save_local(str(tmp_path))
+
+    db = load(tmp_path)
+    assert db.index.ntotal == 3
+    assert [top(db, text) for text in ("carbon targets", "water usage", "waste policy")] == ["carbon targets", "water usage", "waste policy"]
+
+
+def test_pickled_indexes_are_converted_on_save(tmp_path):
+    FAISS.from_texts(["carbon targets"], EMBEDDINGS).save_local(str(tmp_path))
+    db = load(tmp_path)
+    db.add_texts(["water usage"])
+    db.save_local(str(tmp_path))
+
+    assert not (tmp_path / LEGACY_DOCSTORE_FILE).exists()
+    db = load(tmp_path)
+    assert isinstance(db.docstore, SQLiteDocstore)
+    assert top(db, "water usage") == "water usage"
@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+from app.config import get_settings
+from app.utils.openai.azureopenai_client import AzureOpenAIClient
+from app.utils.openai.hedging import LatencyTracker
+
+
+def make_tracker(**settings) -> LatencyTracker:
+    tracker = LatencyTracker()
+    tracker.settings = get_settings().model_copy(update={
+        "LLM_HEDGE_MIN_SAMPLES": 5,
+        "LLM_HEDGE_PERCENTILE": 0.9,
+        "LLM_HEDGE_MIN_DELAY": 0.01,
+        "LLM_HEDGE_DEFAULT_DELAY": 0.05,
+        **settings
+    })
+    return tracker
+
+
+def make_client(*calls):
+    """
+    Client whose n-th completion request runs calls[n]. Returns the client and the started request tasks.
+    """
+    client = AzureOpenAIClient()
+    started = []
+    behaviours = iter(calls)
+
+    async def create_completion(name=None, **kwargs):
+        started.append(asyncio.current_task())
+        return await next(behaviours)()
+
+    client.__create_completion__ = create_completion
+    return client, started
+
+
+def respond(content, delay=0.0):
+    async def call():
+        await asyncio.sleep(delay)
+        return content
+    return call
+
+
+def fail(error, delay=0.0):
+    async def call():
+        await asyncio.sleep(delay)
+        raise error
+    return call
+
+
+def test_hedge_delay_follows_the_latency_percentile():
+    tracker = make_tracker()
+    assert tracker.hedge_delay("score") == 0.05
+    for seconds in (0.1, 0.2, 0.3, 0.4, 5.0):
+        tracker.record("score", seconds)
+    assert tracker.hedge_delay("score") == 5.0
+    assert tracker.hedge_delay("other") == 0.05
+
+
+def test_fast_primary_is_not_hedged():
+    make_tracker()
+    client, started = make_client(respond("primary"))
+    assert asyncio.run(client.__create_hedged_completion__(name="score", model="gpt-35-turbo")) == "primary"
+    assert len(started) == 1
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    tracker = make_tracker()
+    client, started = make_client(respond("primary", delay=5), respond("hedge"))
+    assert asyncio.run(client.__create_hedged_completion__(name="score", model="gpt-35-turbo")) == "hedge"
+    assert started[0].cancelled()
+    assert tracker.stats()["score"]["hedge_wins"] == 1
+
+
+def test_failed_hedge_waits_for_the_primary():
+    make_tracker()
+    client, _ = make_client(respond("primary", delay=0.1), fail(RuntimeError("hedge failed")))
+    assert asyncio.run(client.__create_hedged_completion__(name="score", model="gpt-35-turbo")) == "primary"
+
+
+def test_both_failures_raise_the_first_error():
+    make_tracker()
+    client, _ = make_client(fail(ValueError("primary failed"), delay=0.1), fail(RuntimeError("hedge failed"), delay=0.2))
+    with pytest.raises(ValueError):
+        asyncio.run(client.__create_hedged_completion__(name="score", model="gpt-35-turbo"))
+
+
+def test_cancelled_caller_cancels_the_requests():
+    make_tracker()
+    client, started = make_client(respond("primary", delay=5), respond("hedge", delay=5))
+
+    async def run():
+        caller = asyncio.create_task(client.__create_hedged_completion__(name="score", model="gpt-35-turbo"))
+        await asyncio.sleep(0.1)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert len(started) == 2
+    assert all(task.cancelled() for task in started)
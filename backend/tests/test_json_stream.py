@@ -0,0 +1,51 @@
+from app.utils.openai.json_stream import JsonArrayStreamParser
+
+
+def feed_all(parser: JsonArrayStreamParser, pieces):
+    elements = []
+    for piece in pieces:
+        elements.extend(parser.feed(piece))
+    return elements
+
+
+def test_elements_are_emitted_as_they_close():
+    parser = JsonArrayStreamParser(key="chunks")
+    assert parser.feed('{"chunks": [{"id": 1, "sc') == []
+    assert parser.feed('ore": 97}, {"id": 2') == [{"id": 1, "score": 97}]
+    assert parser.feed(', "score": 3}]}') == [{"id": 2, "score": 3}]
+    assert parser.done
+    assert parser.emitted == 2
+
+
+def test_document_split_per_character():
+    document = '{"title": "a [b] {c}", "outlines": [{"t": "x, \\"y\\"", "n": [1, 2]}, "s", 3, true]}'
+    parser = JsonArrayStreamParser(key="outlines")
+    assert feed_all(parser, document) == [{"t": 'x, "y"', "n": [1, 2]}, "s", 3, True]
+
+
+def test_null_elements_reach_the_caller():
+    parser = JsonArrayStreamParser(key="items")
+    assert feed_all(parser, ['{"items": [null, 1, ', 'null', ']}']) == [None, 1, None]
+    assert parser.emitted == 3
+
+
+def test_top_level_array():
+    parser = JsonArrayStreamParser()
+    assert parser.feed('[1, {"a": [2]}, null ]') == [1, {"a": [2]}, None]
+
+
+def test_other_keys_are_ignored():
+    parser = JsonArrayStreamParser(key="outlines")
+    assert parser.feed('{"other": [1, 2], "nested": {"outlines": [3]}, "outlines": [4]}') == [4]
+
+
+def test_missing_array_emits_nothing():
+    parser = JsonArrayStreamParser(key="outlines")
+    assert parser.feed('{"sections": [1, 2]}') == []
+    assert parser.emitted == 0
+    assert not parser.done
+
+
+def test_malformed_element_is_skipped():
+    parser = JsonArrayStreamParser(key="items")
+    assert parser.feed('{"items": [1, tru, 2]}') == [1, 2]
@@ -0,0 +1,96 @@
+import time
+import asyncio
+from app.config import get_settings
+from app.utils.openai.client_registry import AzureOpenAIClientRegistry
+from app.utils.openai.load_balancer import AzureOpenAILoadBalancer, AzureOpenAIEndpoint
+
+ENDPOINTS = [
+    {"name": "eastus", "endpoint": "https://eastus.openai.azure.com", "api_key": "east", "api_version": "2024-02-01"},
+    {"name": "westus", "endpoint": "https://westus.openai.azure.com", "api_key": "west", "api_version": "2024-02-01", "deployments": {"gpt-4o": "gpt-4o-west"}},
+]
+
+
+def make_balancer(**settings) -> AzureOpenAILoadBalancer:
+    balancer = AzureOpenAILoadBalancer()
+    balancer.settings = get_settings().model_copy(update={
+        "LLM_ENDPOINT_EJECT_AFTER_FAILURES": 2,
+        "LLM_ENDPOINT_EJECT_SECONDS": 30,
+        **settings
+    })
+    balancer.endpoints = [AzureOpenAIEndpoint(**endpoint) for endpoint in ENDPOINTS]
+    return balancer
+
+
+def names(endpoints):
+    return [endpoint.name for endpoint in endpoints]
+
+
+def test_only_endpoints_serving_the_model_are_candidates():
+    balancer = make_balancer()
+    assert sorted(names(balancer.candidates("gpt-4o"))) == ["eastus", "westus"]
+    assert names(balancer.candidates("gpt-35-turbo")) == ["eastus"]
+    assert balancer.endpoints[1].deployment_for("gpt-4o") == "gpt-4o-west"
+
+
+def test_throttled_endpoint_comes_last():
+    balancer = make_balancer()
+    east, west = balancer.endpoints
+    balancer.record_throttle(east, "gpt-4o", retry_after=30)
+    for _ in range(10):
+        assert names(balancer.candidates("gpt-4o")) == ["westus", "eastus"]
+
+
+def test_ejected_endpoint_stays_out_until_a_health_check_passes():
+    balancer = make_balancer()
+    east, west = balancer.endpoints
+    balancer.record_failure(east, "gpt-4o")
+    assert balancer.stats()["eastus"]["ejected"] is False
+    balancer.record_failure(east, "gpt-4o")
+    assert balancer.stats()["eastus"]["ejected"] is True
+
+    # past the ejection period, the endpoint is only due for a health check
+    balancer._ejected["eastus"] = time.monotonic() - 1
+    assert names(balancer.candidates("gpt-4o")) == ["westus", "eastus"]
+
+    class Models:
+        def __init__(self, healthy):
+            self.healthy = healthy
+
+        async def list(self):
+            if not self.healthy:
+                raise ConnectionError("unreachable")
+
+    class Client:
+        def __init__(self, healthy):
+            self.models = Models(healthy)
+
+        def with_options(self, **kwargs):
+            return self
+
+    registry = AzureOpenAIClientRegistry()
+    registry.get_client = lambda **kwargs: Client(healthy=False)
+    asyncio.run(balancer.__check_endpoint__(east))
+    assert balancer._ejected["eastus"] > time.monotonic()
+
+    registry.get_client = lambda **kwargs: Client(healthy=True)
+    asyncio.run(balancer.__check_endpoint__(east))
+    assert "eastus" not in balancer._ejected
+
+
+def test_latency_and_errors_steer_the_first_pick():
+    balancer = make_balancer()
+    east, west = balancer.endpoints
+    for _ in range(20):
+        balancer.record_success(east, "gpt-4o", latency=0.2)
+        balancer.record_success(west, "gpt-4o", latency=5.0)
+    picks = [balancer.candidates("gpt-4o")[0].name for _ in range(200)]
+    assert picks.count("eastus") > 150
+
+
+def test_chat_models_and_embeddings_use_the_picked_endpoint():
+    balancer = make_balancer()
+    east, west = balancer.endpoints
+    balancer.record_throttle(east, "gpt-4o", retry_after=30)
+
+    model = AzureOpenAIClientRegistry().get_chat_model(model="gpt-4o")
+    assert (model.azure_endpoint, model.deployment_name) == (west.endpoint, "gpt-4o-west")
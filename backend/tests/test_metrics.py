@@ -0,0 +1,12 @@
+from app.utils.metrics import MetricsRegistry
+
+
+def test_labels_are_folded_into_the_key():
+    metrics = MetricsRegistry()
+    metrics.incr("llm_cache_hits", tier="memory", name="score-chunks")
+    metrics.incr("llm_cache_hits", 2, name="score-chunks", tier="memory")
+    metrics.observe("llm_latency_seconds", 1.5, name="score-chunks")
+
+    assert metrics.get_counter("llm_cache_hits", tier="memory", name="score-chunks") == 3
+    assert metrics.get_counter("llm_cache_hits", tier="memory") == 0
+    assert metrics._timers["llm_latency_seconds{name=score-chunks}"] == {"count": 1, "total": 1.5, "max": 1.5}
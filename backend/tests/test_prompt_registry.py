@@ -0,0 +1,72 @@
+import time
+import asyncio
+import pytest
+from types import SimpleNamespace
+from app.config import get_settings
+from app.exceptions.langfuse_exceptions import PromptNotExit
+from app.utils.prompt_registry import PromptRegistry
+
+
+class FakeLangfuse:
+    def __init__(self, prompts: dict):
+        self.prompts = prompts
+        self.calls = []
+
+    def get_prompt(self, name: str, label: str, cache_ttl_seconds: int):
+        self.calls.append((name, label))
+        if self.prompts is None:
+            raise ConnectionError("Langfuse is unreachable")
+        return SimpleNamespace(prompt=self.prompts[(name, label)])
+
+
+def make_registry(tmp_path, monkeypatch, prompts, **settings):
+    langfuse = FakeLangfuse(prompts)
+    monkeypatch.setattr(PromptRegistry, "client", property(lambda self: langfuse))
+    registry = PromptRegistry()
+    registry.settings = get_settings().model_copy(update=settings)
+    registry.fallback_dir = tmp_path
+    return registry, langfuse
+
+
+def test_prompts_are_fetched_once_and_kept_as_local_copies(tmp_path, monkeypatch):
+    registry, langfuse = make_registry(tmp_path, monkeypatch, {("generate-report", "latest"): "Report for {organization_name}"})
+
+    async def run():
+        return [await registry.aget_prompt_str(name="generate-report") for _ in range(3)]
+
+    assert asyncio.run(run()) == ["Report for {organization_name}"] * 3
+    assert langfuse.calls == [("generate-report", "latest")]
+    assert (tmp_path / "generate-report.latest.txt").read_text() == "Report for {organization_name}"
+
+
+def test_labels_are_configured_per_prompt(tmp_path, monkeypatch):
+    registry, langfuse = make_registry(
+        tmp_path, monkeypatch,
+        {("generate-report", "production"): "v2", ("order-chunks", "latest"): "v1"},
+        LANGFUSE_PROMPT_LABELS={"generate-report": "production"}
+    )
+    asyncio.run(registry.warm(["generate-report", "order-chunks"]))
+    assert sorted(langfuse.calls) == [("generate-report", "production"), ("order-chunks", "latest")]
+    assert asyncio.run(registry.aget_prompt_str(name="generate-report")) == "v2"
+
+
+def test_expired_prompts_are_served_while_they_refresh(tmp_path, monkeypatch):
+    registry, langfuse = make_registry(tmp_path, monkeypatch, {("generate-report", "latest"): "old"})
+    registry.cache.set(("generate-report", "latest"), "old", ttl=0)
+    langfuse.prompts[("generate-report", "latest")] = "new"
+
+    assert asyncio.run(registry.aget_prompt_str(name="generate-report")) == "old"
+    for _ in range(100):
+        if registry.cache.get(("generate-report", "latest")) == "new":
+            break
+        time.sleep(0.01)
+    assert asyncio.run(registry.aget_prompt_str(name="generate-report")) == "new"
+
+
+def test_local_copy_is_used_when_langfuse_is_down(tmp_path, monkeypatch):
+    registry, _ = make_registry(tmp_path, monkeypatch, None)
+    (tmp_path / "generate-report.latest.txt").write_text("local copy")
+
+    assert asyncio.run(registry.aget_prompt_str(name="generate-report")) == "local copy"
+    with pytest.raises(PromptNotExit):
+        asyncio.run(registry.aget_prompt_str(name="order-chunks"))
@@ -0,0 +1,84 @@
+import asyncio
+import httpx
+import pytest
+from app.config import get_settings
+from app.utils.retriever import ProviderGuard, ProviderGuardRegistry, is_retryable
+
+
+def make_guard(**kwargs) -> ProviderGuard:
+    return ProviderGuard(**{"provider": "tavily", "concurrency": 2, "timeout": 1, "max_attempts": 3, "base_delay": 0, **kwargs})
+
+
+def status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://api.tavily.com/search")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status, request=request))
+
+
+def test_only_transient_errors_are_retryable():
+    assert is_retryable(asyncio.TimeoutError())
+    assert is_retryable(httpx.ConnectError("refused"))
+    assert is_retryable(status_error(429)) and is_retryable(status_error(503))
+    assert not is_retryable(status_error(400))
+    assert not is_retryable(ValueError("bad query"))
+
+
+def test_concurrent_calls_are_limited():
+    guard = make_guard(concurrency=2)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        peak = max(peak, guard.inflight)
+        await asyncio.sleep(0.02)
+        return "results"
+
+    async def run():
+        return await asyncio.gather(*[guard.run(call) for _ in range(6)])
+
+    assert asyncio.run(run()) == ["results"] * 6
+    assert peak == 2 and guard.inflight == 0
+
+
+def test_transient_errors_are_retried_and_others_are_raised():
+    guard = make_guard()
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise status_error(503)
+        return "results"
+
+    assert asyncio.run(guard.run(flaky)) == "results"
+    assert guard.stats()["retries"] == 2
+
+    async def bad_request():
+        attempts.append(1)
+        raise status_error(400)
+
+    attempts.clear()
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(guard.run(bad_request))
+    assert len(attempts) == 1 and guard.stats()["failures"] == 1
+
+
+def test_each_attempt_has_a_deadline():
+    guard = make_guard(timeout=0.02, max_attempts=2)
+
+    async def hang():
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(guard.run(hang))
+    assert guard.stats()["timeouts"] == 2
+
+
+def test_registry_shares_one_guard_per_provider_with_overrides():
+    registry = ProviderGuardRegistry()
+    registry.settings = get_settings().model_copy(update={
+        "RETRIEVER_CONCURRENCY": 4, "RETRIEVER_PROVIDER_SETTINGS": {"exa": {"concurrency": 1, "timeout": 5}}
+    })
+    assert registry.get("tavily") is registry.get("tavily")
+    assert registry.get("tavily").concurrency == 4
+    assert (registry.get("exa").concurrency, registry.get("exa").timeout) == (1, 5)
+    assert set(registry.stats()) == {"tavily", "exa"}
@@ -0,0 +1,98 @@
+import time
+import asyncio
+import httpx
+from app.utils.openai.rate_limiter import (
+    TokenBucket, AdaptiveConcurrencyLimiter, LLMRateLimiterRegistry, estimate_tokens, parse_retry_after
+)
+
+
+def test_estimate_tokens_counts_text_and_completion():
+    messages = [{"role": "user", "content": "x" * 400}, {"role": "user", "content": [{"type": "text", "text": "y" * 40}]}]
+    assert estimate_tokens(messages) == 110 + 512
+    assert estimate_tokens(messages, max_tokens=100) == 210
+
+
+def test_parse_retry_after_prefers_milliseconds():
+    assert parse_retry_after(httpx.Headers({"retry-after-ms": "1500", "retry-after": "9"})) == 1.5
+    assert parse_retry_after(httpx.Headers({"retry-after": "3"})) == 3.0
+    assert parse_retry_after(httpx.Headers({"retry-after": "soon"}), default=2.0) == 2.0
+
+
+def test_token_bucket_waits_for_the_refill():
+    bucket = TokenBucket(rate_per_minute=600, capacity=1)
+
+    async def run():
+        start = time.monotonic()
+        await bucket.acquire(1)
+        await bucket.acquire(1)
+        return time.monotonic() - start
+
+    # 10 tokens per second, the second token needs ~0.1s
+    assert 0.08 <= asyncio.run(run()) < 0.5
+
+
+def test_token_bucket_adjust_is_capped_at_capacity():
+    bucket = TokenBucket(rate_per_minute=60, capacity=100)
+    bucket.adjust(-50)
+    assert 49 <= bucket.tokens <= 51
+    bucket.adjust(500)
+    assert bucket.tokens == 100
+
+
+def test_aimd_grows_additively_and_shrinks_multiplicatively():
+    limiter = AdaptiveConcurrencyLimiter(initial=4, min_limit=2, max_limit=5)
+
+    async def succeed(count):
+        for _ in range(count):
+            await limiter.acquire()
+            await limiter.release(success=True)
+
+    asyncio.run(succeed(4))
+    assert 4.9 < limiter.limit <= 5
+    asyncio.run(succeed(10))
+    assert limiter.limit == 5
+
+    limiter.on_throttle(retry_after=0)
+    assert limiter.limit == 2.5
+    # the rest of the same burst of 429s does not count again
+    limiter.on_throttle(retry_after=0)
+    assert limiter.limit == 2.5
+    limiter._last_decrease = 0
+    limiter.on_throttle(retry_after=0)
+    assert limiter.limit == 2
+
+
+def test_aimd_caps_in_flight_requests_and_honours_retry_after():
+    limiter = AdaptiveConcurrencyLimiter(initial=2, min_limit=1, max_limit=2)
+
+    async def run():
+        await limiter.acquire()
+        await limiter.acquire()
+        third = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        assert not third.done()
+        await limiter.release()
+        await asyncio.wait_for(third, timeout=1)
+
+        limiter.on_throttle(retry_after=0.1)
+        await limiter.release()
+        start = time.monotonic()
+        await limiter.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.08
+
+
+def test_429_responses_throttle_their_deployment():
+    registry = LLMRateLimiterRegistry()
+    request = httpx.Request("POST", "https://eastus.openai.azure.com/openai/deployments/gpt-4o/chat/completions")
+
+    async def run():
+        await registry.observe_response(httpx.Response(200, request=request))
+        await registry.observe_response(httpx.Response(429, request=request, headers={"retry-after-ms": "200"}))
+
+    asyncio.run(run())
+    limiter = registry.get("gpt-4o", endpoint="eastus.openai.azure.com")
+    assert limiter.concurrency.blocked_until > time.monotonic()
+    assert limiter.concurrency.limit < limiter.concurrency.max_limit
+    assert registry.get("gpt-35-turbo", endpoint="eastus.openai.azure.com").concurrency.blocked_until == 0
@@ -0,0 +1,87 @@
+import json
+import asyncio
+from uuid import uuid4
+from contextlib import asynccontextmanager
+from app.config import get_settings
+from app.database.agent import ReportService, ReportModel, ChunkService, ChunkModel
+from app.database.main import TenantService, TenantModel
+from app.enums import ChunkTypeEnum
+from app.routers.report import router as report_router
+from app.routers.report.schema import GenerateReportRequestModel
+from app.utils.openai.batch import LLMBatchExecutor, LocalBatchBackend
+from app.utils.prompt_registry import PromptRegistry
+
+
+class FakeSession:
+    async def commit(self):
+        pass
+
+
+@asynccontextmanager
+async def session_scope():
+    yield FakeSession()
+
+
+def completion(body: dict) -> dict:
+    return {
+        "id": "chatcmpl-batch",
+        "object": "chat.completion",
+        "created": 0,
+        "model": body["model"],
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": json.dumps({"content": "Batched report"})}}],
+        "usage": {"prompt_tokens": 100, "completion_tokens": 10, "total_tokens": 110},
+    }
+
+
+def test_batch_report_job_generates_the_report_through_the_batch_executor(tmp_path, monkeypatch):
+    tenant = TenantModel(name="Cadenza", org_info="")
+    report = ReportModel(tenant_id=tenant.uuid, report_objective="objective")
+    chunk = ChunkModel(uuid=uuid4(), type=ChunkTypeEnum.WEB.value, query="query", source="https://example.com", content="content", report_id=report.uuid)
+
+    async def find_report(self, id):
+        return report
+
+    async def find_tenant(self, uuid):
+        return tenant
+
+    async def find_chunks(self, report_id, type, skip=0, limit=10):
+        return [chunk] if type == ChunkTypeEnum.WEB.value else []
+
+    async def get_prompt(self, name, label=None):
+        return "{report_objective}"
+
+    monkeypatch.setattr(report_router, "agent_db_session_scope", session_scope)
+    monkeypatch.setattr(report_router, "main_db_session_scope", session_scope)
+    monkeypatch.setattr(ReportService, "find_by_id", find_report)
+    monkeypatch.setattr(TenantService, "find_by_uuid", find_tenant)
+    monkeypatch.setattr(ChunkService, "find_chunks_by_report_id_and_type", find_chunks)
+    monkeypatch.setattr(PromptRegistry, "aget_prompt_str", get_prompt)
+
+    requests = []
+    def responder(body: dict) -> dict:
+        requests.append(body)
+        return completion(body)
+
+    executor = LLMBatchExecutor(backend=LocalBatchBackend(directory=str(tmp_path), responder=responder))
+    executor.settings = get_settings().model_copy(update={"LLM_BATCH_FLUSH_INTERVAL": 0.0, "LLM_BATCH_POLL_INTERVAL": 0.0})
+
+    asyncio.run(report_router.generate_report_batch_job(report_id=report.uuid, model=GenerateReportRequestModel()))
+
+    assert [body["messages"][0]["content"] for body in requests] == ["objective"]
+    assert report.report_content == "Batched report"
+    assert report.chunk_ids == [str(chunk.uuid)]
+    assert len(list(tmp_path.glob("batch_*/input.jsonl"))) == 1
+
+
+def test_local_backend_completes_a_batch_once_its_output_appears(tmp_path):
+    backend = LocalBatchBackend(directory=str(tmp_path))
+
+    async def run():
+        batch_id = await backend.submit([{"custom_id": "a", "body": {"model": "gpt-4o"}}])
+        assert await backend.poll(batch_id) is None
+        (tmp_path / batch_id / "output.jsonl").write_text(json.dumps({"custom_id": "a", "response": {"status_code": 500, "body": {"error": "boom"}}}))
+        return await backend.poll(batch_id)
+
+    results = asyncio.run(run())
+    assert results["a"].response is None
+    assert "boom" in results["a"].error
@@ -0,0 +1,58 @@
+import time
+import asyncio
+from app.config import get_settings
+from app.database.main import TenantModel
+# the services are imported through the routers, like the app does, to avoid their circular import
+from app.routers.report.router import ReportFlowService
+from app.utils.metrics import MetricsRegistry
+
+
+class FailingRetriever:
+    provider = "tavily"
+
+    async def aretrieve(self, query: str, top: int = 5, **kwargs):
+        raise ConnectionError("provider down")
+
+
+def make_service(reserve: float = 0.0) -> ReportFlowService:
+    service = ReportFlowService(tenant=TenantModel(name="Cadenza", org_info=""), report=None, db_session=None)
+    service.settings = get_settings().model_copy(update={"RESEARCH_SCORING_RESERVE": reserve})
+    return service
+
+
+async def search(result, seconds: float):
+    await asyncio.sleep(seconds)
+    return [result]
+
+
+def test_all_queries_are_gathered_without_a_deadline():
+    service = make_service()
+    results = asyncio.run(service.__gather_queries__([search("a", 0.02), search("b", 0.01)]))
+    assert results == [["a"], ["b"]]
+
+
+def test_slow_queries_are_cancelled_before_the_deadline():
+    service = make_service(reserve=0.5)
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def run():
+        service.research_deadline_at = time.monotonic() + 0.6
+        return await service.__gather_queries__([search("fast", 0), slow()])
+
+    start = time.monotonic()
+    assert asyncio.run(run()) == [["fast"]]
+    assert time.monotonic() - start < 1
+    assert cancelled == [1]
+    assert MetricsRegistry().get_counter("research_query_timeouts") == 1
+
+
+def test_a_failing_provider_yields_no_results():
+    service = make_service()
+    assert asyncio.run(service.__retrieve__(FailingRetriever(), query="carbon targets")) == []
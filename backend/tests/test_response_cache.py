@@ -0,0 +1,63 @@
+import asyncio
+from openai.types.chat import ChatCompletion
+from app.utils.openai.azureopenai_client import AzureOpenAIClient
+from app.utils.openai.response_cache import LLMResponseCache
+
+MESSAGES = [{"role": "user", "content": "Score the chunks"}]
+
+
+def completion(content: str) -> ChatCompletion:
+    return ChatCompletion.model_validate({
+        "id": "chatcmpl",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+    })
+
+
+def make_client(*contents: str):
+    client = AzureOpenAIClient()
+    calls = []
+    responses = iter(contents)
+
+    async def create_completion(name=None, **kwargs):
+        calls.append(kwargs)
+        return completion(next(responses))
+
+    client.__create_completion__ = create_completion
+    return client, calls
+
+
+def test_make_key_is_canonical():
+    key = LLMResponseCache.make_key("gpt-4o", MESSAGES, {"type": "json_object"}, 0)
+    assert key == LLMResponseCache.make_key("gpt-4o", [{"content": "Score the chunks", "role": "user"}], {"type": "json_object"}, 0)
+    assert key != LLMResponseCache.make_key("gpt-35-turbo", MESSAGES, {"type": "json_object"}, 0)
+    assert key != LLMResponseCache.make_key("gpt-4o", MESSAGES, None, 0)
+    assert key != LLMResponseCache.make_key("gpt-4o", MESSAGES, {"type": "json_object"}, 0.7)
+
+
+def test_identical_requests_are_served_from_the_cache():
+    client, calls = make_client('{"score": 1}', '{"score": 2}')
+
+    async def run():
+        first = await client.ainvoke(name="score", cache=True, model="gpt-4o", messages=MESSAGES, response_format={"type": "json_object"})
+        second = await client.ainvoke(name="score", cache=True, model="gpt-4o", messages=MESSAGES, response_format={"type": "json_object"})
+        uncached = await client.ainvoke(name="score", model="gpt-4o", messages=MESSAGES, response_format={"type": "json_object"})
+        return first, second, uncached
+
+    assert asyncio.run(run()) == ('{"score": 1}', '{"score": 1}', '{"score": 2}')
+    assert len(calls) == 2
+    assert LLMResponseCache().stats()["hits"]["memory"] == 1
+
+
+def test_unparsable_json_completions_are_not_cached():
+    client, calls = make_client('{"score": ', '{"score": 1}')
+
+    async def run():
+        for _ in range(2):
+            await client.ainvoke(name="score", cache=True, model="gpt-4o", messages=MESSAGES, response_format={"type": "json_object"})
+
+    asyncio.run(run())
+    assert len(calls) == 2
+    assert len(LLMResponseCache().memory) == 1
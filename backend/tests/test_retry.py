@@ -0,0 +1,77 @@
+import asyncio
+import httpx
+import openai
+import pytest
+from app.exceptions.llm_exceptions import LLMResponseParseError
+from app.utils.openai.azureopenai_client import AzureOpenAIClient
+from app.utils.openai.retry import RetryPolicy, classify_error
+
+REQUEST = httpx.Request("POST", "https://eastus.openai.azure.com/openai/deployments/gpt-4o/chat/completions")
+
+
+def status_error(error_class, status_code: int, headers: dict = {}):
+    return error_class("error", response=httpx.Response(status_code, request=REQUEST, headers=headers), body=None)
+
+
+def test_classify_error():
+    assert classify_error(openai.APITimeoutError(request=REQUEST)) == "timeout"
+    assert classify_error(asyncio.TimeoutError()) == "timeout"
+    assert classify_error(status_error(openai.RateLimitError, 429)) == "rate_limit"
+    assert classify_error(status_error(openai.InternalServerError, 500)) == "server"
+    assert classify_error(LLMResponseParseError(name="generate-report")) == "parse"
+    assert classify_error(status_error(openai.BadRequestError, 400)) == "fatal"
+    assert classify_error(KeyError("content")) == "fatal"
+
+
+def test_delay_is_bounded_and_honours_retry_after():
+    policy = RetryPolicy(max_attempts=3, base_delay=1, max_delay=4)
+    server_error = status_error(openai.InternalServerError, 500)
+    assert all(0 <= policy.delay(attempt, server_error) <= 4 for attempt in range(10))
+    assert policy.delay(0, LLMResponseParseError()) == 0.0
+    assert policy.delay(0, status_error(openai.RateLimitError, 429, {"retry-after": "7"})) >= 7
+
+
+def test_run_retries_retryable_errors_up_to_max_attempts():
+    policy = RetryPolicy(max_attempts=3, base_delay=0, max_delay=0)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise LLMResponseParseError(name="generate-report")
+        return {"content": "report"}
+
+    assert asyncio.run(policy.run(flaky, name="generate-report")) == {"content": "report"}
+    assert len(attempts) == 3
+
+    async def always_failing():
+        attempts.append(1)
+        raise status_error(openai.InternalServerError, 500)
+
+    attempts.clear()
+    with pytest.raises(openai.InternalServerError):
+        asyncio.run(policy.run(always_failing))
+    assert len(attempts) == 3
+
+
+def test_run_does_not_retry_fatal_errors():
+    attempts = []
+
+    async def bad_request():
+        attempts.append(1)
+        raise status_error(openai.BadRequestError, 400)
+
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(RetryPolicy(max_attempts=3, base_delay=0).run(bad_request))
+    assert len(attempts) == 1
+
+
+def test_parse_json_repairs_locally():
+    client = AzureOpenAIClient()
+    assert client.parse_json('{"content": "report"}') == {"content": "report"}
+    assert client.parse_json('{"content": "report"} trailing') == {"content": "report"}
+    assert client.parse_json('{"content": "report", "citations": ["a", "b"') == {"content": "report", "citations": ["a", "b"]}
+    with pytest.raises(LLMResponseParseError):
+        client.parse_json("I can not answer that")
+    with pytest.raises(LLMResponseParseError):
+        client.parse_json(None)
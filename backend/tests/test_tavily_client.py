@@ -0,0 +1,48 @@
+import json
+import asyncio
+import httpx
+from app.config import get_settings
+from app.utils.tavily_client import TavilyClient, TavilyClientPool
+
+
+def make_client(results, **settings):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json={"query": "arts", "results": results})
+
+    pool = TavilyClientPool()
+    pool._http_client = httpx.AsyncClient(base_url=pool.settings.TAVILY_API_URL, transport=httpx.MockTransport(handler))
+    client = TavilyClient()
+    client.settings = get_settings().model_copy(update=settings)
+    return client, requests
+
+
+def test_search_parses_results_once_and_keeps_the_score():
+    client, requests = make_client([
+        {"url": "https://a.org", "content": "first", "score": 0.9, "raw_content": None},
+        {"url": None, "content": None, "score": 0.5},
+    ])
+    results = asyncio.run(client.search(query="arts", search_depth="advanced", max_results=2, cache=False))
+
+    assert [result.model_dump() for result in results] == [
+        {"url": "https://a.org", "content": "first", "score": 0.9},
+        {"url": "", "content": "", "score": 0.5},
+    ]
+    assert requests == [{"api_key": get_settings().TAVILY_API_KEY, "query": "arts", "search_depth": "advanced", "max_results": 2}]
+
+
+def test_results_are_trimmed_to_the_context_budget():
+    client, _ = make_client(
+        [{"url": f"https://{index}.org", "content": "x" * 30, "score": 1 - index / 10} for index in range(5)],
+        TAVILY_MAX_CONTEXT_TOKENS=20
+    )
+    results = asyncio.run(client.search(query="arts", cache=False))
+    # 20 tokens ~ 80 characters, the best two results fit
+    assert [result.url for result in results] == ["https://0.org", "https://1.org"]
+
+
+def test_clients_share_one_pool():
+    make_client([])
+    assert TavilyClient().pool.http_client is TavilyClient().pool.http_client
@@ -0,0 +1,51 @@
+from app.config import get_settings
+from app.utils.tracing import TracingClient
+
+
+def make_tracer(**settings) -> TracingClient:
+    tracer = TracingClient()
+    tracer.settings = get_settings().model_copy(update={
+        "LANGFUSE_TRACING_ENABLED": True,
+        "LANGFUSE_MAX_STRING_LENGTH": 50,
+        "LANGFUSE_MAX_LIST_ITEMS": 3,
+        "LANGFUSE_MAX_DEPTH": 3,
+        **settings
+    })
+    return tracer
+
+
+def test_truncate_bounds_payloads():
+    tracer = make_tracer()
+    truncated = tracer.truncate({"text": "x" * 200, "items": list(range(10)), "deep": {"a": {"b": {"c": 1}}}, "n": 1})
+
+    assert len(truncated["text"]) <= 50
+    assert truncated["text"].startswith("x") and truncated["text"].endswith(f"[{200 - truncated['text'].count('x')} chars truncated]")
+    assert truncated["items"] == [0, 1, "[8 items truncated]"]
+    assert truncated["deep"] == {"a": {"b": "[truncated]"}}
+    assert truncated["n"] == 1
+
+
+def test_truncate_twice_changes_nothing():
+    tracer = make_tracer()
+    payload = {"messages": [{"content": "y" * 500}] * 10, "output": "z" * 51}
+    once = tracer.truncate(payload)
+    assert tracer.mask(data=once) == once
+
+
+def test_unsampled_traces_get_no_handle():
+    assert make_tracer(LANGFUSE_SAMPLE_RATE=0.0).start_trace({"name": "report"}) is None
+    assert make_tracer(LANGFUSE_SAMPLE_RATES={"report": 0.0}).start_trace({"name": "report"}) is None
+    assert make_tracer(LANGFUSE_TRACING_ENABLED=False).start_trace({"id": "trace"}) is None
+
+
+def test_langchain_handler_is_bound_to_the_trace():
+    tracer = make_tracer()
+    trace = tracer.start_trace({"id": "trace"})
+    handler = trace.get_langchain_handler(update_parent=True)
+
+    assert handler.trace.id == "trace"
+    assert handler.update_stateful_client is True
+    assert tracer.client.task_manager._mask == tracer.mask
+
+    tracer.settings = tracer.settings.model_copy(update={"LANGFUSE_TRACING_ENABLED": False})
+    assert trace.get_langchain_handler() is None
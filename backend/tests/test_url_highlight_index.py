@@ -0,0 +1,74 @@
+import asyncio
+from app.config import get_settings
+from app.utils.url_highlight_index import URLHighlightIndex
+
+TEXT = "Alpha one. Beta two. Gamma three. Delta four. Epsilon five."
+
+
+class FakeExaClient:
+    def __init__(self, texts: dict):
+        self.texts = texts
+        self.calls = 0
+
+    async def get_texts(self, urls):
+        self.calls += 1
+        return {url: self.texts.get(url, "") for url in urls}
+
+
+class FakeEmbeddings:
+    """
+    One dimension per keyword, so a query scores the windows that mention it.
+    """
+    KEYWORDS = ["alpha", "gamma", "epsilon", "carbon"]
+
+    def __embed__(self, text: str):
+        return [float(keyword in text.lower()) + 0.01 for keyword in self.KEYWORDS]
+
+    async def aembed_documents(self, texts):
+        return [self.__embed__(text) for text in texts]
+
+    async def aembed_query(self, query):
+        return self.__embed__(query)
+
+
+def make_index(texts: dict, **settings) -> URLHighlightIndex:
+    index = URLHighlightIndex(urls=list(texts), exa_client=FakeExaClient(texts))
+    index.settings = get_settings().model_copy(update=settings)
+    index.embeddings = FakeEmbeddings()
+    return index
+
+
+def test_windows_overlap_and_cover_every_sentence():
+    index = make_index({}, URL_HIGHLIGHT_WINDOW_SENTENCES=3, URL_HIGHLIGHT_WINDOW_OVERLAP=1)
+    windows = [window.highlight for window in index.__windows__("https://a.org", TEXT)]
+    assert windows == [
+        "Alpha one. Beta two. Gamma three.",
+        "Gamma three. Delta four. Epsilon five.",
+    ]
+
+
+def test_short_pages_make_one_window_and_the_window_count_is_capped():
+    index = make_index({}, URL_HIGHLIGHT_WINDOW_SENTENCES=10, URL_HIGHLIGHT_WINDOW_OVERLAP=1)
+    assert [window.highlight for window in index.__windows__("https://a.org", "Only one.")] == ["Only one."]
+
+    index.settings = index.settings.model_copy(update={
+        "URL_HIGHLIGHT_WINDOW_SENTENCES": 1, "URL_HIGHLIGHT_WINDOW_OVERLAP": 0, "URL_HIGHLIGHT_MAX_WINDOWS_PER_URL": 2
+    })
+    assert len(index.__windows__("https://a.org", TEXT)) == 2
+
+
+def test_search_returns_the_best_windows_per_url_and_builds_once():
+    index = make_index(
+        {"https://a.org": TEXT, "https://b.org": "Carbon targets. Alpha plan.", "https://empty.org": ""},
+        URL_HIGHLIGHT_WINDOW_SENTENCES=1, URL_HIGHLIGHT_WINDOW_OVERLAP=0
+    )
+
+    async def run():
+        return await asyncio.gather(index.search("epsilon", top=1), index.search("alpha", top=1))
+
+    epsilon, alpha = asyncio.run(run())
+    assert index.exa_client.calls == 1
+    assert [(window.url, window.highlight) for window in epsilon][0] == ("https://a.org", "Epsilon five.")
+    assert {(window.url, window.highlight) for window in alpha} == {
+        ("https://a.org", "Alpha one."), ("https://b.org", "Alpha plan.")
+    }
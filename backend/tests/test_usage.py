@@ -0,0 +1,94 @@
+import asyncio
+import contextvars
+from uuid import uuid4
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from app.config import get_settings
+from app.enums.budget_enum import BudgetStatusEnum
+from app.utils.openai.usage import LLMUsageLedger, LLMUsageCallbackHandler, set_usage_context
+
+
+def make_ledger(**settings) -> LLMUsageLedger:
+    ledger = LLMUsageLedger()
+    ledger.settings = get_settings().model_copy(update={
+        "LLM_MODEL_PRICES": {"gpt-4o": {"prompt": 0.005, "completion": 0.015}},
+        **settings
+    })
+    return ledger
+
+
+def in_context(call, **usage_context):
+    def run():
+        set_usage_context(**usage_context)
+        return call()
+    return contextvars.copy_context().run(run)
+
+
+def test_cost_uses_prices_per_1k_tokens():
+    ledger = make_ledger()
+    assert ledger.cost("gpt-4o", prompt_tokens=2000, completion_tokens=1000) == 0.025
+    assert ledger.cost("unknown", prompt_tokens=2000, completion_tokens=1000) == 0.0
+
+
+def test_record_buffers_the_call_and_updates_the_cached_spend():
+    ledger = make_ledger()
+    tenant_id = str(uuid4())
+    ledger._spend.set(tenant_id, 1.0)
+
+    in_context(lambda: ledger.record(model="gpt-4o", kind="chat", prompt_tokens=1000, completion_tokens=1000), tenant_id=tenant_id)
+
+    assert len(ledger._buffer) == 1
+    assert ledger._buffer[0]["tenant_id"] == tenant_id
+    assert ledger._buffer[0]["total_tokens"] == 2000
+    assert ledger._spend.get(tenant_id) == 1.02
+
+
+def test_record_is_skipped_when_disabled():
+    ledger = make_ledger(LLM_USAGE_LEDGER_ENABLED=False)
+    ledger.record(model="gpt-4o", kind="chat", prompt_tokens=10)
+    assert ledger._buffer == []
+
+
+def test_check_budget_statuses():
+    tenant_id = uuid4()
+    ledger = make_ledger(LLM_TENANT_BUDGETS={str(tenant_id): {"monthly_limit": 100, "economy_ratio": 0.8}})
+
+    def status(spend: float) -> BudgetStatusEnum:
+        async def get_monthly_spend(tenant_id):
+            return spend
+        ledger.get_monthly_spend = get_monthly_spend
+        return asyncio.run(ledger.check_budget(tenant_id))
+
+    assert status(10) == BudgetStatusEnum.OK
+    assert status(85) == BudgetStatusEnum.ECONOMY
+    assert status(100) == BudgetStatusEnum.EXCEEDED
+    assert asyncio.run(ledger.check_budget(uuid4())) == BudgetStatusEnum.OK
+    assert asyncio.run(ledger.check_budget(None)) == BudgetStatusEnum.OK
+
+
+def test_callback_records_agent_usage_from_the_response():
+    ledger = make_ledger()
+    handler = LLMUsageCallbackHandler(model="gpt-4o", name="qa-agent")
+    run_id = uuid4()
+    message = AIMessage(content="answer", usage_metadata={"input_tokens": 120, "output_tokens": 30, "total_tokens": 150})
+
+    def run():
+        handler.on_chat_model_start({}, [[HumanMessage(content="question")]], run_id=run_id)
+        handler.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=run_id)
+    in_context(run, tenant_id="tenant", session_id="session")
+
+    [usage] = ledger._buffer
+    assert (usage["tenant_id"], usage["session_id"], usage["name"]) == ("tenant", "session", "qa-agent")
+    assert (usage["prompt_tokens"], usage["completion_tokens"], usage["estimated"]) == (120, 30, False)
+    assert handler._runs == {}
+
+
+def test_callback_estimates_streamed_calls_without_usage():
+    ledger = make_ledger()
+    handler = LLMUsageCallbackHandler(model="gpt-4o")
+    run_id = uuid4()
+    handler.on_chat_model_start({}, [[HumanMessage(content="q" * 400)]], run_id=run_id)
+    handler.on_llm_end(LLMResult(generations=[[ChatGeneration(message=AIMessage(content="a" * 80))]]), run_id=run_id)
+
+    [usage] = ledger._buffer
+    assert (usage["prompt_tokens"], usage["completion_tokens"], usage["estimated"]) == (100, 20, True)
@@ -0,0 +1,90 @@
+import json
+import asyncio
+from types import SimpleNamespace
+from datetime import datetime, timedelta
+from app.config import get_settings
+from app.utils.web_search_cache import WebSearchCache
+
+
+def make_cache(**settings):
+    """
+    Cache whose Postgres table is a dict of key -> (results, fetched_at).
+    """
+    cache = WebSearchCache()
+    cache.settings = get_settings().model_copy(update={"WEB_SEARCH_CACHE_TTL": 60, "WEB_SEARCH_CACHE_MAX_STALE": 600, **settings})
+    table = {}
+
+    async def lookup(key):
+        if key in table:
+            return SimpleNamespace(results=json.dumps(table[key][0]), fetched_at=table[key][1])
+        return None
+
+    async def persist(key, scope, query, search_depth, max_results, results):
+        table[key] = (results, datetime.now())
+
+    cache.__lookup__ = lookup
+    cache.__persist__ = persist
+    return cache, table
+
+
+def make_fetch(results, delay=0.0):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return results
+
+    return fetch, calls
+
+
+def test_keys_normalize_the_query_and_scope_by_tenant():
+    cache, _ = make_cache()
+    assert cache.make_key("global", "Arts  and Crafts", "basic", 5) == cache.make_key("global", "arts and crafts", "basic", 5)
+    assert cache.make_key("global", "arts", "basic", 5) != cache.make_key("global", "arts", "advanced", 5)
+    assert cache.get_scope("tenant") == "global"
+    tenant_cache, _ = make_cache(WEB_SEARCH_CACHE_SCOPE="tenant")
+    assert tenant_cache.get_scope("tenant") == "tenant"
+
+
+def test_fresh_results_are_served_from_the_table():
+    cache, _ = make_cache()
+    fetch, calls = make_fetch([{"url": "https://a.org"}])
+
+    async def run():
+        return [await cache.get_or_fetch(fetch, query="arts", search_depth="basic", max_results=5) for _ in range(2)]
+
+    assert asyncio.run(run()) == [([{"url": "https://a.org"}], "miss"), ([{"url": "https://a.org"}], "hit")]
+    assert len(calls) == 1
+
+
+def test_stale_results_are_served_and_refreshed_in_the_background():
+    cache, table = make_cache()
+    key = cache.make_key("global", "arts", "basic", 5)
+    table[key] = ([{"url": "https://old.org"}], datetime.now() - timedelta(seconds=120))
+    fetch, calls = make_fetch([{"url": "https://new.org"}])
+
+    async def run():
+        stale = await cache.get_or_fetch(fetch, query="arts", search_depth="basic", max_results=5, stale_while_revalidate=True)
+        await asyncio.gather(*cache._background_tasks)
+        return stale
+
+    assert asyncio.run(run()) == ([{"url": "https://old.org"}], "stale")
+    assert table[key][0] == [{"url": "https://new.org"}]
+
+    # without stale_while_revalidate, expired results are fetched again
+    table[key] = ([{"url": "https://old.org"}], datetime.now() - timedelta(seconds=120))
+    assert asyncio.run(cache.get_or_fetch(fetch, query="arts", search_depth="basic", max_results=5)) == ([{"url": "https://new.org"}], "miss")
+    assert len(calls) == 2
+
+
+def test_concurrent_identical_searches_share_one_fetch():
+    cache, _ = make_cache()
+    fetch, calls = make_fetch([{"url": "https://a.org"}], delay=0.05)
+
+    async def run():
+        return await asyncio.gather(*[cache.get_or_fetch(fetch, query="Arts", search_depth="basic", max_results=5) for _ in range(3)])
+
+    statuses = sorted(status for _, status in asyncio.run(run()))
+    assert statuses == ["coalesced", "coalesced", "miss"]
+    assert len(calls) == 1